@@ -5,8 +5,10 @@ from collections.abc import Iterable
 import debug
 from base.hierarchy_layout import layout as hierarchy_layout, get_purpose
 from base import hierarchy_spice
+from base import libcell_cache
 from base import utils
 from base.geometry import rectangle
+from base.shape_index import ShapeIndex
 from base.vector import vector
 from globals import OPTS
 from tech import drc, info
@@ -39,6 +41,8 @@ class design(hierarchy_spice.spice, hierarchy_layout):
     has_dummy = PO_DUMMY in tech_layers
     num_poly_dummies = info.get("num_poly_dummies", int(has_dummy))
     has_pwell = info["has_pwell"]
+    # design tokens of the get_layer_shapes query in progress
+    shape_tokens = None
 
     def __init__(self, name):
         self.gds_file = os.path.join(OPTS.openram_tech, "gds_lib", name + ".gds")
@@ -71,8 +75,6 @@ class design(hierarchy_spice.spice, hierarchy_layout):
             'ptx_spice',
             'SignalGate',
             'sram',
-            'hierarchical_predecode2x4',
-            'hierarchical_predecode3x8',
             'RotationWrapper',
             'reram_bitcell',
             'push_bitcell',
@@ -87,6 +89,9 @@ class design(hierarchy_spice.spice, hierarchy_layout):
 
     def rename(self, new_name):
         self.name = new_name
+        # the parents' subckts include the name
+        hierarchy_spice.spice.names_version += 1
+        self.invalidate_netlist()
         self.drc_gds_name = new_name
         self.name_map.append(new_name)
         self.gds_read()
@@ -321,32 +326,76 @@ class design(hierarchy_spice.spice, hierarchy_layout):
         if self.gds.from_file:
             return self.get_gds_layer_rects(layer, purpose, recursive=recursive)
 
-        def filter_match(x):
-            if isinstance(x, rectangle):
-                if layer is None:
-                    return True
-                return (x.layerNumber == tech_layers[layer] and
-                        x.layerPurpose == get_purpose(layer))
-            return False
-
-        pin_rects = []
-        for pins in self.pin_map.values():
-            for pin in pins:
-                if layer and not pin.layer == layer:
-                    continue
-                layer_purpose = get_purpose(pin.layer)
-                pin_rects.append(rectangle(layerNumber=tech_layers[pin.layer],
-                                           layerPurpose=layer_purpose,
-                                           offset=pin.ll(), width=pin.rx() - pin.lx(),
-                                           height=pin.uy() - pin.by()))
-        shapes = list(filter(filter_match, self.objs + pin_rects))
-        if recursive or insts:
-            if insts is None:
-                insts = self.insts
+        shape_index = self.get_shape_index()
+        if layer is None:
+            shapes = shape_index.get_rects(self.objs)
+        else:
+            shapes = shape_index.get_rects(self.objs, tech_layers[layer], get_purpose(layer))
+        shapes.extend(shape_index.get_pin_rects(self.pin_map, layer))
+        if recursive and insts is None:
+            shapes.extend(map(copy.copy, self.get_flat_inst_shapes(layer, purpose)))
+        elif recursive or insts:
             for inst in insts:
                 shapes.extend(inst.get_layer_shapes(layer, purpose, recursive))
         return shapes
 
+    def get_shape_index(self):
+        if getattr(self, "shape_index", None) is None:
+            self.shape_index = ShapeIndex()
+        return self.shape_index
+
+    def translate_all(self, offset):
+        super().translate_all(offset)
+        # the indexed rects have been moved
+        self.get_shape_index().invalidate()
+
+    def get_shapes_token(self, tokens):
+        """
+        Changes whenever the shapes of this design (get_layer_shapes with recursive=True) may change
+        :param tokens: id(design) -> token for the designs visited by the current query
+        """
+        token = tokens.get(id(self))
+        if token is None:
+            own_token = self.get_shape_index().get_token(self.objs, self.pin_map)
+            if self.gds.from_file:
+                token = (self.gds, own_token)
+            else:
+                token = (own_token, self.get_insts_token(tokens))
+            tokens[id(self)] = token
+        return token
+
+    def get_insts_token(self, tokens):
+        return tuple((inst.mod.get_shapes_token(tokens), inst.offset.x, inst.offset.y,
+                      inst.mirror, inst.rotate) for inst in self.insts)
+
+    def get_flat_inst_shapes(self, layer, purpose=None):
+        """
+        Shapes of all the instances, recursively, in this design's coordinates.
+        Memoized per (layer, purpose) and reused until an instance or a design in its subtree changes,
+        so a subtree shared by several instances is only flattened once.
+        Changes are detected from the objs and pins of each design, not the geometry of the objs,
+        so a rect already in objs that is modified in place isn't seen;
+        call get_shape_index().invalidate() on its design after such edits.
+        The shapes are shared between calls so callers must copy them before modifying them.
+        """
+        outermost = design.shape_tokens is None
+        if outermost:
+            design.shape_tokens = {}
+        try:
+            token = self.get_insts_token(design.shape_tokens)
+            flat_shapes = self.__dict__.setdefault("flat_shapes", {})
+            cached = flat_shapes.get((layer, purpose))
+            if cached is not None and cached[0] == token:
+                return cached[1]
+            shapes = []
+            for inst in self.insts:
+                shapes.extend(inst.get_layer_shapes(layer, purpose, recursive=True))
+            flat_shapes[(layer, purpose)] = (token, shapes)
+            return shapes
+        finally:
+            if outermost:
+                design.shape_tokens = None
+
     def get_max_shape(self, layer, prop_name, recursive=False):
         shapes = self.get_layer_shapes(layer, recursive=recursive)
         return self.get_max_shape_(shapes, prop_name)
@@ -372,10 +421,18 @@ class design(hierarchy_spice.spice, hierarchy_layout):
         else:
             layer_number = tech_layers[layer]
             purpose_number = get_purpose(layer)
-        if recursive:
-            return cell.gds.getShapesInLayerRecursive(layer_number, purpose_number)
-        else:
-            return cell.gds.getShapesInLayer(layer_number, purpose_number)
+
+        def get_shapes():
+            if recursive:
+                return cell.gds.getShapesInLayerRecursive(layer_number, purpose_number)
+            else:
+                return cell.gds.getShapesInLayer(layer_number, purpose_number)
+
+        # shapes only come from the gds file if nothing has been added to the cell
+        if cell.gds.from_file and not cell.insts and not cell.objs:
+            key = ("shapes", layer_number, purpose_number, recursive)
+            return libcell_cache.cached(cell.gds.from_file, key, get_shapes)
+        return get_shapes()
 
     def get_gds_layer_rects(self, layer, purpose=None, recursive=False):
 
@@ -0,0 +1,220 @@
+"""
+Persistent on-disk cache of fully constructed modules (layout objects, instances, pins and
+spice connections) so processes that generate the same configuration, e.g. the simulation
+scripts spawned by the delay optimizers, load the module instead of rebuilding it.
+Modules are keyed by their class, constructor arguments, technology and the options that
+affect generation. An entry is discarded when any of the source files it was built from changes.
+Options changed while building the module (e.g. by the buffer optimizers) are saved with it and
+restored when it is loaded so the rest of the design is generated as after a fresh build.
+"""
+import copy
+import gc
+import hashlib
+import os
+import pickle
+import sys
+import time
+
+import debug
+from globals import OPTS
+
+# options that only affect simulation, verification or the output files
+IGNORED_OPTIONS = {"openram_temp", "output_name", "debug_level", "print_banner", "check_lvsdrc",
+                   "export_drc_cadence", "run_drc", "run_lvs", "run_pex", "purge_temp",
+                   "use_pex", "trim_netlist", "verbose_save", "pex_spice", "reduced_spice",
+                   "sense_trigger_delay", "energy", "probe_bits", "probe_cols",
+                   "design_cache", "design_cache_dir", "libcell_cache", "libcell_cache_dir",
+                   "gds_array_references", "gds_structure_cache", "prefetch_gds",
+                   "prefetch_gds_workers"}
+IGNORED_OPTION_PREFIXES = ("spice_", "spectre_", "ultrasim_", "xyce_", "simulator_")
+IGNORED_OPTION_SUFFIXES = ("_file", "_exe", "_path", "_dir")
+
+
+def get_cache_dir():
+    if OPTS.design_cache_dir:
+        return OPTS.design_cache_dir
+    cache_home = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cache_home, "openram", "designs")
+
+
+def get_key_value(value):
+    """Deterministic representation of value for the cache key, None if value can't be keyed"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        values = [get_key_value(x) for x in value]
+        if any(x is None and y is not None for x, y in zip(values, value)):
+            return None
+        return type(value).__name__, tuple(values)
+    if isinstance(value, dict):
+        items = get_key_value(sorted(value.items(), key=repr))
+        return None if items is None else ("dict", items)
+    if callable(value) and hasattr(value, "__qualname__"):
+        return "{}.{}".format(value.__module__, value.__qualname__)
+    return None
+
+
+def get_options_key():
+    options = {**vars(type(OPTS)), **vars(OPTS)}
+    key = []
+    for name in sorted(options):
+        if (name.startswith("_") or name in IGNORED_OPTIONS or
+                name.startswith(IGNORED_OPTION_PREFIXES) or name.endswith(IGNORED_OPTION_SUFFIXES)):
+            continue
+        value = get_key_value(options[name])
+        if value is not None:
+            key.append((name, value))
+    return key
+
+
+def get_cache_file(mod_class, args, kwargs):
+    """Cache file for mod_class(*args, **kwargs), None if the arguments can't be keyed"""
+    arguments = get_key_value((args, kwargs))
+    if arguments is None:
+        return None
+    key = (mod_class.__module__, mod_class.__qualname__, arguments, OPTS.tech_name,
+           get_options_key())
+    key_hash = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    return os.path.join(get_cache_dir(), "{}_{}.pickle".format(mod_class.__name__, key_hash))
+
+
+def get_modules(module):
+    """module and all its submodules"""
+    modules = {}
+    pending = [module]
+    while pending:
+        mod = pending.pop()
+        if id(mod) not in modules:
+            modules[id(mod)] = mod
+            pending.extend(inst.mod for inst in mod.insts)
+    return list(modules.values())
+
+
+def get_sources(module):
+    """(file, size, mtime) of the python modules and library cells module was generated from"""
+    directories = tuple(os.path.abspath(os.environ[x]) + os.sep
+                        for x in ["OPENRAM_HOME", "OPENRAM_TECH"] if x in os.environ)
+    files = {getattr(x, "__file__", None) for x in list(sys.modules.values())}
+    files = {os.path.abspath(x) for x in files if x}
+    files = {x for x in files if x.startswith(directories)}
+    for mod in get_modules(module):
+        if mod.is_library_cell:
+            files.update(x for x in [mod.gds_file, mod.sp_file] if os.path.isfile(x))
+    sources = []
+    for file_name in sorted(files):
+        stat = os.stat(file_name)
+        sources.append((file_name, stat.st_size, stat.st_mtime_ns))
+    return sources
+
+
+def sources_changed(sources):
+    for file_name, size, mtime in sources:
+        try:
+            stat = os.stat(file_name)
+        except OSError:
+            return True
+        if (stat.st_size, stat.st_mtime_ns) != (size, mtime):
+            return True
+    return False
+
+
+def register_modules(module):
+    """Add the modules loaded from the cache to the module name registry and the Unique caches"""
+    from base.design import design
+    from base.unique_meta import Unique
+    for mod in get_modules(module):
+        if mod.name not in design.name_map:
+            design.name_map.append(mod.name)
+        if isinstance(type(mod), Unique):
+            type(mod)._cache.setdefault(mod.name, mod)
+
+
+def get_options():
+    """Copy of the option values to detect options changed in place"""
+    options = {}
+    for name, value in vars(OPTS).items():
+        try:
+            options[name] = copy.copy(value)
+        except Exception:
+            options[name] = value
+    return options
+
+
+def option_changed(previous, value):
+    try:
+        return bool(previous != value)
+    except Exception:
+        return previous is not value
+
+
+def get_changed_options(previous_options):
+    """name -> value of the options set or changed since previous_options was taken"""
+    return {name: value for name, value in vars(OPTS).items()
+            if name not in previous_options or option_changed(previous_options[name], value)}
+
+
+def load_module(cache_file):
+    """Load the module saved in cache_file
+    :return: (module, options changed while building it), None if missing or out of date"""
+    if not os.path.exists(cache_file):
+        return None
+    # loading creates many objects and garbage collection passes dominate the load time
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(cache_file, "rb") as f:
+            if sources_changed(pickle.load(f)):
+                debug.info(2, "Design cache {} is out of date".format(cache_file))
+                return None
+            return pickle.load(f), pickle.load(f)
+    except Exception as ex:
+        debug.info(2, "Ignoring corrupt design cache {}: {}".format(cache_file, ex))
+        return None
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def save_module(cache_file, module, changed_options):
+    # write to a temporary file first so concurrent runs never see a partial file
+    temp_file = "{}.{}.tmp".format(cache_file, os.getpid())
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(temp_file, "wb") as f:
+            pickle.dump(get_sources(module), f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(module, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(changed_options, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, cache_file)
+    except (OSError, pickle.PicklingError, AttributeError, TypeError) as ex:
+        debug.info(2, "Unable to write design cache {}: {}".format(cache_file, ex))
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def create(mod_class, *args, **kwargs):
+    """
+    Create mod_class(*args, **kwargs), loading it from the design cache if it was previously generated
+    Arguments must be plain values (numbers, strings, lists, dicts) for the module to be cached
+    """
+    cache_file = get_cache_file(mod_class, args, kwargs) if OPTS.design_cache else None
+    if cache_file is None:
+        return mod_class(*args, **kwargs)
+    start_time = time.time()
+    cached = load_module(cache_file)
+    if cached is not None:
+        module, changed_options = cached
+        register_modules(module)
+        for name, value in changed_options.items():
+            setattr(OPTS, name, value)
+        debug.info(1, "Loaded {} from design cache in {:.3g}s".format(module.name,
+                                                                      time.time() - start_time))
+        return module
+    options = get_options()
+    module = mod_class(*args, **kwargs)
+    save_module(cache_file, module, get_changed_options(options))
+    return module
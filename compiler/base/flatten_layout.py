@@ -2,7 +2,7 @@ import io
 from typing import List
 
 from base.design import design
-from base.geometry import geometry, rectangle
+from base.geometry import geometry, rectangle, rectangle_array
 from base.pin_layout import pin_layout
 from tech import layer as tech_layers
 
@@ -12,7 +12,7 @@ IntList = List[int]
 
 def export_spice(cell: design):
     sp = io.StringIO('')
-    cell.sp_write_file(sp, [])
+    cell.sp_write_file(sp, set())
     flatten_subckts(cell)
     sp.seek(0)
     cell.spice = sp.read().split('\n')
@@ -41,7 +41,7 @@ def flatten_rects(self: design, insts: InstList = None,
         export_spice(self)
 
     flat_rects = self.get_layer_shapes(layer=None, recursive=True, insts=insts)
-    other_obj = [x for x in self.objs if not isinstance(x, rectangle)]
+    other_obj = [x for x in self.objs if not isinstance(x, (rectangle, rectangle_array))]
 
     # turn pins to rects
     pin_indices = []
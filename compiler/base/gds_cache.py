@@ -0,0 +1,176 @@
+"""
+In memory cache of encoded GDS structures keyed by structure name and the content hash
+of the module that generated them. Writing designs that share submodules (e.g. parameter sweeps)
+streams the already encoded structures instead of regenerating them and the output file
+is assembled by concatenating the structures of the modules in the hierarchy.
+The cache is bounded by the total size of the encoded structures, least recently used are evicted first.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+import debug
+from base import geometry
+from base.hierarchy_layout import layout
+from gdsMill import gdsMill
+from globals import OPTS
+from tech import GDS
+
+# (structure name, content hash) -> [(structure name, encoded structure)], least recently used first
+encoded_structures = OrderedDict()
+max_cached_bytes = 256 * 1024 * 1024
+cached_bytes = 0
+
+
+def clear():
+    global cached_bytes
+    encoded_structures.clear()
+    cached_bytes = 0
+
+
+def get_entries_size(entries):
+    return sum(len(encoded) for _, encoded in entries)
+
+
+def get_cached(key):
+    """Encoded structures for key, None if not cached"""
+    entries = encoded_structures.get(key)
+    if entries is not None:
+        encoded_structures.move_to_end(key)
+    return entries
+
+
+def add_cached(key, entries):
+    """Cache entries for key, evicting the least recently used entries when over max_cached_bytes"""
+    global cached_bytes
+    encoded_structures[key] = entries
+    cached_bytes += get_entries_size(entries)
+    while cached_bytes > max_cached_bytes and len(encoded_structures) > 1:
+        _, evicted = encoded_structures.popitem(last=False)
+        cached_bytes -= get_entries_size(evicted)
+
+
+def get_obj_key(obj):
+    """What obj contributes to the GDS of its module, None if unknown"""
+    obj_type = type(obj)
+    if obj_type is geometry.rectangle:
+        return ("rect", obj.layerNumber, obj.layerPurpose, obj.offset[0], obj.offset[1],
+                obj.width, obj.height)
+    elif obj_type is geometry.rectangle_array:
+        return ("rect_array", obj.layerNumber, obj.layerPurpose, obj.offsets.tobytes(),
+                obj.sizes.tobytes())
+    elif obj_type is geometry.label:
+        return ("label", obj.text, obj.layerNumber, obj.layerPurpose, obj.offset[0], obj.offset[1],
+                obj.zoom)
+    return None
+
+
+def writes_own_structure(module):
+    """Whether the GDS of module is written by layout.gds_write_file"""
+    return type(module).gds_write_file is layout.gds_write_file
+
+
+def get_insts_key(module, hashes):
+    """What the instances contribute to the GDS of module, None if unknown"""
+    # (id(mod), mirror, rotate) -> index into orientations
+    orientation_indices = {}
+    orientations = []
+    indices = []
+    for inst in module.insts:
+        orientation = (id(inst.mod), inst.mirror, inst.rotate)
+        index = orientation_indices.get(orientation)
+        if index is None:
+            mod_hash = get_content_hash(inst.mod, hashes)
+            if mod_hash is None or type(inst) is not geometry.instance:
+                return None
+            index = orientation_indices[orientation] = len(orientations)
+            orientations.append((mod_hash, inst.mirror, inst.rotate))
+        indices.append(index)
+    offsets = np.array([(inst.offset.x, inst.offset.y) for inst in module.insts], dtype=float)
+    return orientations, np.array(indices).tobytes(), offsets.tobytes()
+
+
+def get_content_hash(module, hashes):
+    """
+    Hash of the GDS of module and all its submodules
+    :param hashes: id(module) -> hash of the modules already hashed in this write
+    :return: the hash, None if the GDS of module can't be derived from its content
+    """
+    if id(module) in hashes:
+        return hashes[id(module)]
+    hashes[id(module)] = None  # guards against cycles
+    content_hash = None
+    if not writes_own_structure(module):
+        pass
+    elif module.is_library_cell:
+        if not module.insts and not module.objs:
+            stat = os.stat(module.gds.from_file)
+            content_hash = hashlib.sha1(repr(("library", module.gds.from_file, stat.st_size,
+                                              stat.st_mtime_ns)).encode()).hexdigest()
+    else:
+        keys = [module.name, OPTS.gds_array_references, get_insts_key(module, hashes)]
+        keys.extend(map(get_obj_key, module.objs))
+        if None not in keys:
+            for pin_name in module.pin_map:
+                for pin in module.pin_map[pin_name]:
+                    keys.append((pin.name, pin.layer, pin.lx(), pin.by(), pin.rx(), pin.uy()))
+            content_hash = hashlib.sha1(repr(keys).encode()).hexdigest()
+    hashes[id(module)] = content_hash
+    return content_hash
+
+
+def encode_all_structures(gds):
+    writer = gdsMill.Gds2bufferedWriter(gds)
+    return [(name, bytes(writer.encodeStructure(name))) for name in gds.structures]
+
+
+def encode_module(module):
+    """
+    Encode the structures written by module
+    :return: ([(structure name, encoded structure)], whether the structures include the submodules)
+    """
+    if not writes_own_structure(module) or module.is_library_cell:
+        module.gds_write_file(module.gds)
+        return encode_all_structures(module.gds), True
+    name = module.gds.rootStructureName
+    new_layout = gdsMill.VlsiLayout(name=name, units=GDS["unit"])
+    for attribute in ["createDate", "modDate"]:
+        setattr(new_layout.structures[name], attribute,
+                getattr(module.gds.structures[name], attribute))
+    module.gds_write_elements(new_layout, recursive=False)
+    writer = gdsMill.Gds2bufferedWriter(new_layout)
+    return [(name, bytes(writer.encodeStructure(name)))], False
+
+
+def collect_structures(module, structures, visited, hashes):
+    """Add the encoded structures of module and its submodules to structures (name -> encoded)"""
+    if id(module) in visited:
+        return
+    visited.add(id(module))
+    content_hash = get_content_hash(module, hashes)
+    key = (module.gds.rootStructureName, content_hash)
+    entries = get_cached(key) if content_hash is not None else None
+    if entries is not None:
+        complete = module.is_library_cell
+    else:
+        entries, complete = encode_module(module)
+        if content_hash is not None:
+            add_cached(key, entries)
+    for name, encoded in entries:
+        # the first structure with a name wins as in VlsiLayout.addInstance
+        structures.setdefault(name, encoded)
+    if not complete:
+        for mod in {id(inst.mod): inst.mod for inst in module.insts}.values():
+            collect_structures(mod, structures, visited, hashes)
+
+
+def write_gds(module, gds_name):
+    """Write the GDS of module and its submodules to gds_name"""
+    structures = {}
+    hashes = {}
+    collect_structures(module, structures, set(), hashes)
+    debug.info(3, "Writing {} structures to {}".format(len(structures), gds_name))
+    writer = gdsMill.Gds2bufferedWriter(module.gds)
+    writer.writeEncodedToFile(gds_name, structures.values())
@@ -0,0 +1,71 @@
+"""
+Parse the library cell GDS files a configuration needs in parallel worker processes and
+seed the VlsiLayout cache so later VlsiLayout(from_file=...) calls don't read the files
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import debug
+from gdsMill import gdsMill
+from globals import OPTS
+
+
+def load_layout(gds_file, units):
+    """Fully decoded layout of gds_file. Runs in the worker processes"""
+    layout = gdsMill.VlsiLayout(units=units, from_file=gds_file)
+    layout.load_from_file()
+    return layout
+
+
+def get_config_cells():
+    """Library cells named by the options (bitcell_mod, sense_amp_mod, ms_flop_mod, ...)
+    which have a gds file in the technology library"""
+    from base import utils
+    cell_names = set()
+    for option_name in dir(OPTS):
+        value = getattr(OPTS, option_name, None)
+        if (not isinstance(value, str) or not value or option_name.startswith("_")
+                or os.path.isabs(value)):
+            continue
+        gds_file = utils.get_libcell_gds_file(value)
+        if gds_file.endswith(".gds") and os.path.isfile(gds_file):
+            cell_names.add(value)
+    return sorted(cell_names)
+
+
+def prefetch_gds(cell_names=None, max_workers=None):
+    """
+    Load the gds files of cell_names concurrently and add them to the VlsiLayout cache
+    :param cell_names: library cell names, defaults to the cells named in the options
+    :param max_workers: number of worker processes, defaults to the number of cpus
+    :return: the gds files that were loaded
+    """
+    from base import utils
+    from tech import GDS
+    if cell_names is None:
+        cell_names = get_config_cells()
+    gds_files = []
+    for cell_name in cell_names:
+        gds_file = utils.get_libcell_gds_file(cell_name)
+        if (os.path.isfile(gds_file) and gds_file not in gdsMill.VlsiLayout._cache
+                and gds_file not in gds_files):
+            gds_files.append(gds_file)
+    if len(gds_files) == 0:
+        return []
+
+    max_workers = min(len(gds_files), max_workers or os.cpu_count() or 1)
+    debug.info(2, "Prefetching {} gds files with {} workers".format(len(gds_files), max_workers))
+    loaded = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(load_layout, gds_file, GDS["unit"]) for gds_file in gds_files]
+        for gds_file, future in zip(gds_files, futures):
+            try:
+                layout = future.result()
+            except Exception as ex:
+                # the file will be read again, and the error reported, when it is first used
+                debug.warning("Unable to prefetch {}: {}".format(gds_file, ex))
+                continue
+            # don't replace a layout created while the workers were running
+            gdsMill.VlsiLayout._cache.setdefault(gds_file, layout)
+            loaded.append(gds_file)
+    return loaded
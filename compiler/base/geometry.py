@@ -4,10 +4,12 @@ This provides a set of useful generic types for the gdsMill interface.
 import copy
 import math
 
+import numpy as np
+
 import debug
 import tech
-from base.pin_layout import pin_layout
-from base.vector import vector
+from base.pin_layout import pin_layout, transformed_pin
+from base.vector import vector, snapped_vector, snap_array_to_grid
 
 
 NO_MIRROR = "R0"
@@ -143,11 +145,13 @@ class instance(geometry):
         self.mod = mod
         self.gds = mod.gds
         self.rotate = rotate
-        self.offset = vector(offset).snap_to_grid()
+        self.offset = snapped_vector(offset)
         self.mirror = mirror
         self.width = mod.width
         self.height = mod.height
         self.compute_boundary(offset,mirror,rotate)
+        # pin name -> transformed pins, see get_transformed_pins
+        self.pin_cache = {}
         
         debug.info(4, "creating instance: " + self.name)
 
@@ -198,22 +202,43 @@ class instance(geometry):
         # (it will only be written the first time though)
         self.mod.gds_write_file(self.gds)
         # now write an instance of my module/structure
+        self.gds_write_reference(new_layout)
+
+    def gds_write_reference(self, new_layout):
+        """Writes a reference to the module structure without writing the module"""
         new_layout.addInstance(self.gds,
                               offsetInMicrons=self.offset,
                               mirror=self.mirror,
                               rotate=self.rotate)
 
+    def get_transformed_pins(self, name):
+        """ Transformed pins of the module pins called name and the module pins they were derived from.
+        Cached per pin name, recomputed if the instance was moved or the module pins changed """
+        mod_pins = self.mod.get_pins(name)
+        placement = (self.offset[0], self.offset[1], self.mirror, self.rotate)
+        pin_cache = self.pin_cache
+        cached = pin_cache.get(name)
+        if (cached is not None and cached[0] is mod_pins and cached[1] == placement and
+                len(mod_pins) == len(cached[2]) and
+                all(pin.rect is rect for pin, rect in zip(mod_pins, cached[2]))):
+            return mod_pins, cached[3]
+        pins = [transformed_pin(pin, self.offset, self.mirror, self.rotate) for pin in mod_pins]
+        pin_cache[name] = (mod_pins, placement, [pin.rect for pin in mod_pins], pins)
+        return mod_pins, pins
+
     def get_pin(self, name,index=-1):
         """ Return an absolute pin that is offset and transformed based on
-        this instance location. Index will return one of several pins."""
+        this instance location. Index will return one of several pins.
+        The pin is shared between calls and can't be modified."""
 
         if index == -1:
             pin = self.mod.get_pin(name)
-        else:
-            pin = self.mod.get_pins(name)[index]
-        new_pin = pin_layout(pin.name, pin.rect, pin.layer)
-        new_pin.transform(self.offset, self.mirror, self.rotate)
-        return new_pin
+            mod_pins, pins = self.get_transformed_pins(name)
+            if len(mod_pins) > 0 and pin is mod_pins[0]:
+                return pins[0]
+            # module overrides get_pin
+            return transformed_pin(pin, self.offset, self.mirror, self.rotate)
+        return self.get_transformed_pins(name)[1][index]
 
     def get_num_pins(self, name):
         """ Return the number of pins of a given name """
@@ -221,15 +246,8 @@ class instance(geometry):
     
     def get_pins(self,name):
         """ Return an absolute pin that is offset and transformed based on
-        this instance location. """
-        
-        pin = copy.deepcopy(self.mod.get_pins(name))
-        
-        new_pins = []
-        for p in pin:
-            p.transform(self.offset,self.mirror,self.rotate)                
-            new_pins.append(p)
-        return new_pins
+        this instance location. The pins are shared between calls and can't be modified."""
+        return list(self.get_transformed_pins(name)[1])
 
     def get_layer_shapes(self, layer, purpose=None, recursive=False):
         angle, mirr = self.get_angle_mirror()
@@ -307,7 +325,7 @@ class label(geometry):
         self.text = text
         self.layerNumber = layerNumber
         self.layerPurpose= layerPurpose
-        self.offset = vector(offset).snap_to_grid()
+        self.offset = snapped_vector(offset)
 
         if zoom<0:
             self.zoom = tech.GDS["zoom"]
@@ -349,8 +367,8 @@ class rectangle(geometry):
         self.name = "rect"
         self.layerNumber = layerNumber
         self.layerPurpose= layerPurpose
-        self.offset = vector(offset).snap_to_grid()
-        self.size = vector(width, height).snap_to_grid()
+        self.offset = snapped_vector(offset)
+        self.size = snapped_vector(width, height)
         self.width = self.size.x
         self.height = self.size.y
         self.compute_boundary(offset,"",0)
@@ -401,3 +419,78 @@ class rectangle(geometry):
     def __repr__(self):
         """ override print function output """
         return self.__str__()
+
+
+class rectangle_array(geometry):
+    """
+    Many rectangles on the same layer stored as arrays of offsets and sizes
+    instead of a rectangle object each. Created by hierarchy_layout.add_rects.
+    """
+
+    def __init__(self, layerNumber, offsets, sizes, layerPurpose=0):
+        geometry.__init__(self)
+        self.name = "rect_array"
+        self.layerNumber = layerNumber
+        self.layerPurpose = layerPurpose
+        offsets = np.asarray(offsets, dtype=float).reshape(-1, 2)
+        sizes = np.asarray(sizes, dtype=float).reshape(-1, 2)
+        # store normalized, snapped rects
+        self.offsets = snap_array_to_grid(np.minimum(offsets, offsets + sizes))
+        self.sizes = snap_array_to_grid(np.abs(sizes))
+        self.compute_boundary()
+
+    def compute_boundary(self):
+        """ Bounding box of all the rectangles """
+        self.rects = None
+        ll = self.offsets.min(axis=0).tolist()
+        ur = (self.offsets + self.sizes).max(axis=0).tolist()
+        self.boundary = [vector(ll), vector(ur)]
+        self.width = ur[0] - ll[0]
+        self.height = ur[1] - ll[1]
+        self.size = vector(self.width, self.height)
+
+    @property
+    def offset(self):
+        return self.boundary[0]
+
+    @offset.setter
+    def offset(self, offset):
+        """ Move all the rectangles so the bounding box starts at offset """
+        self.offsets = snap_array_to_grid(self.offsets + (np.array([offset[0], offset[1]]) -
+                                                          self.offsets.min(axis=0)))
+        self.compute_boundary()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def get_rects(self):
+        """ rectangle objects for the rectangles, created the first time they are needed.
+        Modifying them doesn't modify the array. """
+        if self.rects is None:
+            self.rects = [rectangle(self.layerNumber, vector(offset), width=size[0], height=size[1],
+                                    layerPurpose=self.layerPurpose)
+                          for offset, size in zip(self.offsets.tolist(), self.sizes.tolist())]
+        return self.rects
+
+    def get_blockages(self, layer):
+        """ Returns the rectangles if they are on this layer"""
+        if self.layerNumber == layer:
+            return [[vector(offset), vector(offset[0] + size[0], offset[1] + size[1])]
+                    for offset, size in zip(self.offsets.tolist(), self.sizes.tolist())]
+        return []
+
+    def gds_write_file(self, newLayout):
+        """Writes all the rectangles to GDS"""
+        debug.info(4, "writing {} rectangles ({})".format(len(self), self.layerNumber))
+        newLayout.addBoxes(layerNumber=self.layerNumber,
+                           purposeNumber=self.layerPurpose,
+                           offsetsInMicrons=self.offsets,
+                           sizesInMicrons=self.sizes)
+
+    def __str__(self):
+        """ override print function output """
+        return "rect_array: {} rects @{} layer={}".format(len(self), self.boundary, self.layerNumber)
+
+    def __repr__(self):
+        """ override print function output """
+        return self.__str__()
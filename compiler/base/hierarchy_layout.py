@@ -2,8 +2,11 @@ import itertools
 import math
 import os
 
+import numpy as np
+
 import debug
 from base import geometry
+from base import instance_arrays
 from base import lef
 from base.pin_layout import pin_layout
 from base.vector import vector
@@ -147,12 +150,49 @@ class layout(lef.lef):
         if offset is None:
             offset = vector(0, 0)
         self.insts.append(geometry.instance(name, mod, offset, mirror, rotate))
+        self.invalidate_netlist()
         debug.info(3, "adding instance {}".format(self.insts[-1]))
 
         if (OPTS.debug_level >= 4):
             debug.info(4, "instance list: {}".format(",".join(x.name for x in self.insts)))
         return self.insts[-1]
 
+    def add_inst_array(self, name, mod, offsets, mirror="R0", rotate=0, connections=None):
+        """
+        Adds an instance of mod at each of offsets
+        :param name: instance name or list with the name of each instance
+        :param offsets: N x 2 array-like of offsets
+        :param mirror: mirror or list with the mirror of each instance
+        :param rotate: rotation or list with the rotation of each instance
+        :param connections: list with the net connections of each instance
+        :return: list of the instances
+        """
+        offsets = np.asarray(offsets, dtype=float).reshape(-1, 2).tolist()
+        num_insts = len(offsets)
+
+        def expand(value):
+            return value if isinstance(value, (list, tuple)) else [value] * num_insts
+        names, mirrors, rotations = expand(name), expand(mirror), expand(rotate)
+        debug.check(len(names) == len(mirrors) == len(rotations) == num_insts,
+                    "There should be a name, mirror and rotation for each offset")
+        insts = [geometry.instance(names[i], mod, vector(offsets[i]), mirrors[i], rotations[i])
+                 for i in range(num_insts)]
+        self.insts.extend(insts)
+        self.invalidate_netlist()
+        debug.info(3, "adding {} instances of {}".format(num_insts, mod.name))
+
+        if connections is not None:
+            debug.check(len(connections) == num_insts, "There should be connections for each offset")
+            for conns in connections:
+                if len(conns) != len(mod.pins):
+                    debug.error("Number of net connections ({0}) does not match module {1} connections ({2})"
+                                .format(len(conns), mod.name, len(mod.pins)), 1)
+                self.connect_inst(conns, check=False)
+            debug.check(len(self.insts) == len(self.conns),
+                        "{0} : Not all instance pins ({1}) are connected ({2}).".format(
+                            self.name, len(self.insts), len(self.conns)))
+        return insts
+
     def get_inst(self, name):
         """Retrieve an instance by name"""
         for inst in self.insts:
@@ -181,6 +221,35 @@ class layout(lef.lef):
             return self.objs[-1]
         return None
 
+    def add_rects(self, layer, offsets, sizes=None, layer_purpose=None):
+        """
+        Adds many rectangles on a given layer at once. They are stored in one rectangle_array
+        instead of a rectangle object each.
+        :param offsets: N x 2 array-like of the lower left corners
+        :param sizes: N x 2 array-like of (width, height) or one (width, height) for all,
+                      min width squares if not given
+        :return: the rectangle_array or None if no rectangle was added
+        """
+        offsets = np.asarray(offsets, dtype=float).reshape(-1, 2)
+        if len(offsets) == 0:
+            return None
+        if sizes is None:
+            sizes = drc["minwidth_{}".format(layer)]
+        sizes = np.broadcast_to(np.asarray(sizes, dtype=float), offsets.shape)
+        tolerance = 0.1 * drc["grid"]
+        valid = (np.abs(sizes) > tolerance).all(axis=1)
+        # negative layers indicate "unused" layers in a given technology
+        layer_num = techlayer[layer]
+        if layer_num < 0 or not valid.any():
+            return None
+        if layer_purpose is None:
+            layer_purpose = get_purpose(layer)
+        else:
+            layer_purpose = get_purpose(layer_purpose)
+        self.objs.append(geometry.rectangle_array(layer_num, offsets[valid], sizes[valid],
+                                                  layerPurpose=layer_purpose))
+        return self.objs[-1]
+
     def add_rect_center(self, layer, offset, width=0, height=0):
         """Adds a rectangle on a given layer at the center point with width and height"""
         if width==0:
@@ -492,7 +561,7 @@ class layout(lef.lef):
             debug.info(3, "opening %s" % self.gds_file)
             self.is_library_cell=True
             self.gds = gdsMill.VlsiLayout(units=GDS["unit"], from_file=self.gds_file)
-            self.gds.load_from_file()
+            self.gds.load_from_file(lazy=True)
         else:
             debug.info(4, "creating structure %s" % self.name)
             self.gds = gdsMill.VlsiLayout(name=self.name, units=GDS["unit"])
@@ -518,15 +587,52 @@ class layout(lef.lef):
         # Visited means that we already prepared self.gds for this subtree
         if self.visited:
             return
-        for i in self.insts:
-            i.gds_write_file(newLayout)
+        self.gds_write_elements(newLayout)
+        self.visited = True
+
+    def gds_write_elements(self, newLayout, recursive=True):
+        """Write the instances, objects and pins of this module.
+        The modules of the instances are only written if recursive"""
+        if OPTS.gds_array_references:
+            self.gds_write_insts(newLayout, recursive)
+        else:
+            for i in self.insts:
+                if recursive:
+                    i.gds_write_file(newLayout)
+                else:
+                    i.gds_write_reference(newLayout)
         for i in self.objs:
             i.gds_write_file(newLayout)
         if not self.is_library_cell:
             for pin_name in self.pin_map.keys():
                 for pin in self.pin_map[pin_name]:
                     pin.gds_write_file(newLayout)
-        self.visited = True
+
+    def gds_write_insts(self, newLayout, recursive=True):
+        """Write instances of the same module and orientation placed on a regular grid as array references"""
+        groups = {}
+        for inst in self.insts:
+            if type(inst).gds_write_file is not geometry.instance.gds_write_file:
+                inst.gds_write_file(newLayout)
+                continue
+            groups.setdefault((id(inst.gds), inst.mirror, inst.rotate), []).append(inst)
+
+        for insts in groups.values():
+            first_inst = insts[0]
+            if recursive:
+                # the module structure is only written the first time
+                first_inst.mod.gds_write_file(first_inst.gds)
+            placements = [(int(newLayout.userUnits(inst.offset[0])), int(newLayout.userUnits(inst.offset[1])))
+                          for inst in insts]
+            for (indices, origin, column_pitch, row_pitch, columns, rows) in instance_arrays.find_arrays(placements):
+                if len(indices) == 1:
+                    insts[indices[0]].gds_write_reference(newLayout)
+                    continue
+                debug.info(4, "writing {}x{} array of {}".format(columns, rows, first_inst.mod.name))
+                newLayout.addArrayInstance(first_inst.gds, offsetInLayoutUnits=origin,
+                                           columnPitch=column_pitch, rowPitch=row_pitch,
+                                           columns=columns, rows=rows,
+                                           mirror=first_inst.mirror, rotate=first_inst.rotate)
 
     def gds_write(self, gds_name):
         """Write the entire gds of the object to the file."""
@@ -543,7 +649,12 @@ class layout(lef.lef):
             wrapped_cell.gds_write(gds_name)
             return
 
-        writer = gdsMill.Gds2writer(self.gds)
+        if OPTS.gds_structure_cache:
+            from base import gds_cache
+            gds_cache.write_gds(self, gds_name)
+            return
+
+        writer = gdsMill.Gds2bufferedWriter(self.gds)
         # MRG: 3/2/18 We don't want to clear the visited flag since
         # this would result in duplicates of all instances being placed in self.gds
         # which may have been previously processed!
@@ -23,6 +23,16 @@ class spice(verilog.verilog):
     layout/netlist and perform LVS/DRC.
     Class consisting of a set of modules and instances of these modules
     """
+    # (name, pins, insts, len(insts), conns, len(conns), names_version, text) of the last rendered subckt
+    subckt_spice = None
+    # (insts, len(insts), conns, len(conns), index) see get_connectivity_index
+    connectivity_index = None
+    # (netlist_version, connectivity index, (inst index, pin index) -> direction) see get_inst_pin_dir
+    inst_pin_dirs = None
+    # incremented when any module is renamed since the parents' subckts include the module names
+    names_version = 0
+    # incremented when the netlist of any module changes since pin directions depend on the submodules
+    netlist_version = 0
 
     def __init__(self, name):
         self.name = name
@@ -48,6 +58,17 @@ class spice(verilog.verilog):
         """ Adds a pin to the pins list. Default type is INOUT signal. """
         self.pins.append(name)
         self.pin_type[name]=pin_type
+        self.invalidate_netlist()
+
+    def invalidate_netlist(self):
+        """
+        Drop the cached subckt, connectivity index and pin directions.
+        Called by add_inst, connect_inst and rename, code that edits the insts or conns in place
+        (e.g. renaming an instance or replacing its connections) must call it too.
+        """
+        self.subckt_spice = None
+        self.connectivity_index = None
+        spice.netlist_version += 1
 
     def add_pin_list(self, pin_list, pin_type_list=None):
         """ Adds a pin_list to the pins list """
@@ -103,15 +124,9 @@ class spice(verilog.verilog):
 
     def get_pin_dir(self, name):
         """ Returns the direction of the pin. (Supply/ground are INOUT). """
-        name_lower = name.lower()
         all_types = set()
-        conns = [(conn_index, conn) for conn_index, conn in enumerate(self.conns)
-                 if name_lower in [y.lower() for y in conn]]
-        if conns:
-            for conn_index, conn in conns:
-                conn = [y.lower() for y in conn]
-                pin = self.insts[conn_index].mod.pins[conn.index(name_lower)]
-                all_types.add(self.insts[conn_index].mod.get_pin_dir(pin))
+        for inst_index, pin_index in self.get_net_connections(name):
+            all_types.add(self.get_inst_pin_dir(inst_index, pin_index))
         if all_types:
             if len(all_types) == 1:
                 return all_types.pop()
@@ -123,6 +138,52 @@ class spice(verilog.verilog):
         else:
             return pin_type
 
+    def get_connectivity_index(self):
+        """
+        Index of the connections, rebuilt after invalidate_netlist or when the insts or conns lists
+        are replaced or resized
+        :return: (lower case net -> [(inst index, pin index)] of the first pin of each instance on the net,
+                  lower case instance name -> index of the first instance with the name)
+        """
+        cached = self.connectivity_index
+        if (cached is not None and cached[0] is self.insts and cached[1] == len(self.insts) and
+                cached[2] is self.conns and cached[3] == len(self.conns)):
+            return cached[4]
+        net_index = {}
+        for inst_index, conn in enumerate(self.conns):
+            for pin_index, net in enumerate(conn):
+                entries = net_index.setdefault(net.lower(), [])
+                if not entries or entries[-1][0] != inst_index:
+                    entries.append((inst_index, pin_index))
+        inst_index = {}
+        for index, inst in enumerate(self.insts):
+            inst_index.setdefault(inst.name.lower().strip(), index)
+        index = (net_index, inst_index)
+        self.connectivity_index = (self.insts, len(self.insts), self.conns, len(self.conns), index)
+        return index
+
+    def get_net_connections(self, net):
+        """(inst index, pin index) of the instance pins connected to net (case insensitive)"""
+        return self.get_connectivity_index()[0].get(net.lower(), [])
+
+    def get_inst_pin_dir(self, inst_index, pin_index):
+        """Direction of the pin at pin_index of the instance at inst_index"""
+        index = self.get_connectivity_index()
+        cached = self.inst_pin_dirs
+        # the directions are recomputed after any module's netlist changes
+        if cached is None or cached[0] != spice.netlist_version or cached[1] is not index:
+            cached = self.inst_pin_dirs = (spice.netlist_version, index, {})
+        pin_dirs = cached[2]
+        key = (inst_index, pin_index)
+        if key not in pin_dirs:
+            child_module = self.insts[inst_index].mod
+            pin_dirs[key] = child_module.get_pin_dir(child_module.pins[pin_index])
+        return pin_dirs[key]
+
+    def get_inst_index(self, name):
+        """Index of the first instance named name (case insensitive), None if there's none"""
+        return self.get_connectivity_index()[1].get(name.lower().strip())
+
     def get_input_pins(self):
         return [pin for pin in self.pins if self.get_pin_dir(pin) == INPUT]
 
@@ -164,6 +225,7 @@ class spice(verilog.verilog):
             debug.error("Number of net connections ({0}) does not match last module instance connections ({1})"
                         .format(len(args), len(self.insts[-1].mod.pins)), 1)
         self.conns.append(args)
+        self.invalidate_netlist()
 
         if check and (len(self.insts)!=len(self.conns)):
             debug.error("{0} : Not all instance pins ({1}) are connected ({2}).".format(self.name,
@@ -186,75 +248,82 @@ class spice(verilog.verilog):
         else:
             self.spice = []
 
-    def contains(self, mod, modlist):
-        for x in modlist:
-            if x.name == mod.name:
-                return True
-        return False
+    def get_subckt_spice(self):
+        """
+        Rendered subckt of the generated module excluding its submodules, empty if there's nothing to write.
+        The rendered text is reused until invalidate_netlist is called, a module is renamed
+        or the pins, insts or conns lists are replaced or resized
+        """
+        cached = self.subckt_spice
+        # the cache holds the lists rather than their ids so the ids can't be reused by new lists
+        if (cached is not None and cached[0] == self.name and cached[1] == self.pins and
+                cached[2] is self.insts and cached[3] == len(self.insts) and
+                cached[4] is self.conns and cached[5] == len(self.conns) and
+                cached[6] == self.names_version):
+            return cached[7]
+
+        if len(self.insts) == 0 or self.pins == []:
+            return ""
+
+        # every instance must have a set of connections, even if it is empty.
+        if len(self.insts) != len(self.conns):
+            debug.error("{0} : Not all instance pins ({1}) are connected ({2}).".format(self.name,
+                                                                                        len(self.insts),
+                                                                                        len(self.conns)))
+            debug.error("Instances: \n"+str(self.insts))
+            debug.error("-----")
+            debug.error("Connections: \n"+str(self.conns),1)
+
+        # write out the first spice line (the subcircuit)
+        pins_str = " ".join(self.pins)
+        spice = [f"\n.SUBCKT {self.name} {pins_str}"]
+        for inst, conns in zip(self.insts, self.conns):
+            # we don't need to output connections of empty instances.
+            # these are wires and paths
+            if conns == []:
+                continue
+            conn_str = " ".join(conns)
+            if hasattr(inst.mod, "spice_device"):
+                spice.append(inst.mod.spice_device.format(inst.name, conn_str))
+            else:
+                spice.append(f"X{inst.name} {conn_str} {inst.mod.name}")
+
+        spice.append(f".ENDS {self.name}\n")
+        subckt_spice = "\n".join(spice)
+        self.subckt_spice = (self.name, list(self.pins), self.insts, len(self.insts),
+                             self.conns, len(self.conns), self.names_version, subckt_spice)
+        return subckt_spice
 
     def sp_write_file(self, sp, usedMODS):
         """ Recursive spice subcircuit write;
-            Writes the spice subcircuit from the library or the dynamically generated one"""
+            Writes the spice subcircuit from the library or the dynamically generated one
+            :param sp: file like object to write to
+            :param usedMODS: set of the names of the modules already written
+        """
         if not self.spice:
             # recursively write the modules
             for i in self.mods:
-                if self.contains(i, usedMODS):
+                if i.name in usedMODS:
                     continue
-                usedMODS.append(i)
+                usedMODS.add(i.name)
                 i.sp_write_file(sp, usedMODS)
-
-            if len(self.insts) == 0:
-                return
-            if self.pins == []:
-                return
-
-            # every instance must have a set of connections, even if it is empty.
-            if  len(self.insts)!=len(self.conns):
-                debug.error("{0} : Not all instance pins ({1}) are connected ({2}).".format(self.name,
-                                                                                            len(self.insts),
-                                                                                            len(self.conns)))
-                debug.error("Instances: \n"+str(self.insts))
-                debug.error("-----")
-                debug.error("Connections: \n"+str(self.conns),1)
-
-            # write out the first spice line (the subcircuit)
-            pins_str = " ".join(self.pins)
-            spice = [f"\n.SUBCKT {self.name} {pins_str}"]
-            for i in range(len(self.insts)):
-                # we don't need to output connections of empty instances.
-                # these are wires and paths
-                if self.conns[i] == []:
-                    continue
-                conn_str = " ".join(self.conns[i])
-                inst_name = self.insts[i].name
-                if hasattr(self.insts[i].mod,"spice_device"):
-                    device_spice = self.insts[i].mod.spice_device
-                    spice.append(device_spice.format(inst_name, conn_str))
-                else:
-                    mod_name = self.insts[i].mod.name
-                    spice.append(f"X{inst_name} {conn_str} {mod_name}")
-
-            spice.append(f".ENDS {self.name}")
-
+            sp.write(self.get_subckt_spice())
         else:
             # write the subcircuit itself
             # Including the file path makes the unit test fail for other users.
             # if os.path.isfile(self.sp_file):
             #    sp.write("\n* {0}\n".format(self.sp_file))
-            spice = self.spice
-        sp.write("\n".join(spice))
-
-        sp.write("\n")
+            sp.write("\n".join(self.spice) + "\n")
 
     def sp_write(self, spname):
         """Writes the spice to files"""
         debug.info(3, "Writing to {0}".format(spname))
-        spfile = open(spname, 'w')
-        spfile.write("*FIRST LINE IS A COMMENT\n")
-        usedMODS = list()
-        self.sp_write_file(spfile, usedMODS)
-        del usedMODS
-        spfile.close()
+        # render the whole hierarchy to memory and write it at once
+        buffer = io.StringIO()
+        buffer.write("*FIRST LINE IS A COMMENT\n")
+        self.sp_write_file(buffer, set())
+        with open(spname, 'w') as spfile:
+            spfile.write(buffer.getvalue())
 
     def is_delay_primitive(self):
         """Whether to descend into this module to evaluate sub-modules for delay"""
@@ -267,9 +336,7 @@ class spice(verilog.verilog):
         """
         if self.spice_content is None:
             spring_writer = io.StringIO("")
-            used_mods = []
-            self.sp_write_file(spring_writer, used_mods)
-            del used_mods
+            self.sp_write_file(spring_writer, set())
             self.spice_content = spring_writer.getvalue()
             spring_writer.close()
         return self.spice_content
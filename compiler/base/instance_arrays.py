@@ -0,0 +1,75 @@
+"""
+Detection of regularly placed instances so they can be written as GDS array references (AREF)
+instead of one structure reference (SREF) per instance.
+"""
+
+# colRow is stored as two signed 16 bit integers
+MAX_ARRAY_COUNT = 32767
+
+
+def arithmetic_runs(values, max_count=MAX_ARRAY_COUNT):
+    """
+    Split sorted distinct values into runs with a constant pitch, greedily from the smallest value
+    :return: list of (start, pitch, count), pitch is 0 for single value runs
+    """
+    runs = []
+    index = 0
+    while index < len(values):
+        if index + 1 == len(values):
+            runs.append((values[index], 0, 1))
+            break
+        pitch = values[index + 1] - values[index]
+        end = index + 1
+        while (end + 1 < len(values) and values[end + 1] - values[end] == pitch
+               and end + 1 - index < max_count):
+            end += 1
+        runs.append((values[index], pitch, end + 1 - index))
+        index = end + 1
+    return runs
+
+
+def find_arrays(placements):
+    """
+    Group placements into rectangular grids with a constant column and row pitch.
+    Rows are placements with the same y, each row is split into runs with a constant x pitch
+     and identical runs in rows with a constant y pitch are stacked.
+    :param placements: (x, y) integer offsets, all with the same module and orientation
+    :return: list of (indices, origin, column_pitch, row_pitch, columns, rows),
+        indices are in row major order and (columns, rows) is (1, 1) for placements that aren't in an array
+    """
+    rows = {}
+    duplicates = []
+    for index, (x, y) in enumerate(placements):
+        row = rows.setdefault(y, {})
+        if x in row:
+            # overlapping instances can't be in the same array
+            duplicates.append(index)
+        else:
+            row[x] = index
+
+    # (x start, x pitch, columns) -> [(y, indices)]
+    row_runs = {}
+    for y in sorted(rows):
+        row = rows[y]
+        xs = sorted(row)
+        position = 0
+        for run in arithmetic_runs(xs):
+            indices = [row[x] for x in xs[position:position + run[2]]]
+            row_runs.setdefault(run, []).append((y, indices))
+            position += run[2]
+
+    arrays = []
+    for (x_start, x_pitch, columns), stacked_rows in row_runs.items():
+        ys = [y for y, _ in stacked_rows]
+        position = 0
+        for (y_start, y_pitch, num_rows) in arithmetic_runs(ys):
+            indices = [index for _, row_indices in stacked_rows[position:position + num_rows]
+                       for index in row_indices]
+            position += num_rows
+            # the unused direction of a one dimensional array still needs a non zero displacement
+            column_pitch = (x_pitch or y_pitch or 1, 0)
+            row_pitch = (0, y_pitch or x_pitch or 1)
+            arrays.append((indices, (x_start, y_start), column_pitch, row_pitch, columns, num_rows))
+    arrays.extend(([index], placements[index], (1, 0), (0, 1), 1, 1) for index in duplicates)
+    arrays.sort(key=lambda x: x[0][0])
+    return arrays
@@ -0,0 +1,91 @@
+"""
+Sweep-line operations on intervals and rectangles: union of intervals, the parts of ranges
+left after removing intervals and grouping of overlapping rectangles.
+Used to find clearances (open routing channels) and to combine overlapping shapes.
+"""
+import bisect
+import heapq
+import math
+
+import numpy as np
+
+
+def merge_intervals(starts, ends, merge_touching=False):
+    """
+    Union of the intervals (starts[i], ends[i])
+    :param starts: interval starts
+    :param ends: interval ends, not less than the starts
+    :param merge_touching: also merge intervals that only share an end point
+    :return: (starts, ends) numpy arrays of the disjoint merged intervals in increasing order
+    """
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    if len(starts) == 0:
+        return starts, ends
+    order = np.lexsort((ends, starts))
+    starts = starts[order]
+    running_end = np.maximum.accumulate(ends[order])
+    if merge_touching:
+        new_block = starts[1:] > running_end[:-1]
+    else:
+        new_block = starts[1:] >= running_end[:-1]
+    first_indices = np.concatenate(([0], np.flatnonzero(new_block) + 1))
+    last_indices = np.concatenate((first_indices[1:] - 1, [len(starts) - 1]))
+    return starts[first_indices], running_end[last_indices]
+
+
+def subtract_intervals(ranges, starts, ends):
+    """
+    Parts of ranges that are not covered by the intervals (starts[i], ends[i]).
+    The intervals are open so ranges touching an interval are not affected
+     and a zero width interval splits the range it falls in.
+    :param ranges: list of (low, high)
+    :return: list of (low, high) with high > low, ordered by the range they came from then by position
+    """
+    block_starts, block_ends = merge_intervals(starts, ends)
+    # gaps between the merged intervals
+    gap_starts = [-math.inf] + block_ends.tolist()
+    gap_ends = block_starts.tolist() + [math.inf]
+    results = []
+    for low, high in ranges:
+        gap_index = bisect.bisect_right(gap_ends, low)
+        while gap_index < len(gap_ends) and gap_starts[gap_index] < high:
+            piece = (max(low, gap_starts[gap_index]), min(high, gap_ends[gap_index]))
+            if piece[1] > piece[0]:
+                results.append(piece)
+            gap_index += 1
+    return results
+
+
+def group_overlapping_rects(boundaries, min_space=0):
+    """
+    Group rectangles that overlap, directly or through other rectangles
+    :param boundaries: (lx, by, rx, uy) of each rectangle
+    :param min_space: rectangles closer than min_space are also considered overlapping
+    :return: list of lists of rectangle indices, ordered by the first rectangle in each group
+    """
+    boundaries = np.asarray(boundaries, dtype=float).reshape(-1, 4)
+    num_rects = len(boundaries)
+    parents = list(range(num_rects))
+
+    def find(index):
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    lx, by, rx, uy = boundaries.T.tolist() if num_rects else ([], [], [], [])
+    # rectangles whose x range can still reach the sweep line, heap ordered by right edge
+    active = []
+    for index in np.argsort(boundaries[:, 0], kind="stable").tolist():
+        while active and active[0][0] + min_space < lx[index]:
+            heapq.heappop(active)
+        for _, other in active:
+            if by[index] - min_space <= uy[other] and by[other] <= uy[index] + min_space:
+                parents[find(index)] = find(other)
+        heapq.heappush(active, (rx[index], index))
+
+    groups = {}
+    for index in range(num_rects):
+        groups.setdefault(find(index), []).append(index)
+    return sorted(groups.values(), key=lambda x: x[0])
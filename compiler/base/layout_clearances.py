@@ -1,5 +1,8 @@
 # find open space in a module given the layer
+import numpy as np
+
 from base.geometry import rectangle
+from base.intervals import subtract_intervals, group_overlapping_rects
 from base.utils import round_to_grid
 from base.design import design
 from base.vector import vector
@@ -48,28 +51,22 @@ def find_clearances(module: design, layer, direction=HORIZONTAL, existing=None,
     if recursive_insts:
         for inst in recursive_insts:
             rects.extend(inst.get_layer_shapes(layer, recursive=True))
-    for rect in rects:
-        # ensure rect is within considered range
-        region_edges = get_extremities(rect, HORIZONTAL if direction == VERTICAL else VERTICAL)
-        if not get_range_overlap(region_edges, region):
-            continue
-
-        edges = get_extremities(rect, direction)
-        if not get_range_overlap(full_range, edges):
-            continue
-
-        new_clearances = []
-        for clearance in existing:
-            if get_range_overlap(clearance, edges):
-                if clearance[0] <= edges[0]:
-                    new_clearances.extend([(clearance[0], edges[0]), (edges[1], clearance[1])])
-                else:
-                    new_clearances.append((edges[1], clearance[1]))
-            else:
-                new_clearances.append(clearance)
-        existing = validate_clearances(new_clearances)
-
-    return existing
+    if not rects:
+        return existing
+
+    region_direction = HORIZONTAL if direction == VERTICAL else VERTICAL
+    region_edges = np.array([get_extremities(rect, region_direction) for rect in rects])
+    edges = np.array([get_extremities(rect, direction) for rect in rects])
+    region_edges.sort(axis=1)
+    edges.sort(axis=1)
+    # only rects within the considered range
+    region = sorted(region)
+    in_range = ((np.maximum(region_edges[:, 0], region[0]) <= np.minimum(region_edges[:, 1], region[1])) &
+                (np.maximum(edges[:, 0], full_range[0]) <= np.minimum(edges[:, 1], full_range[1])))
+    if not in_range.any():
+        return existing
+    edges = edges[in_range]
+    return subtract_intervals(existing, edges[:, 0], edges[:, 1])
 
 
 def combine_rects(rect_1, rect_2):
@@ -85,21 +82,12 @@ def combine_rects(rect_1, rect_2):
 
 
 def extract_unique_rects(rects, min_space=0):
+    """Combine rects that are within min_space of each other into their bounding rect"""
+    boundaries = [(rect.lx(), rect.by(), rect.rx(), rect.uy()) for rect in rects]
     unique_rects = []
-    for original_rect in rects:
-        overlap = False
-        expanded_rect = rectangle(layerNumber=0,
-                                  offset=original_rect.ll() - vector(min_space, min_space),
-                                  width=original_rect.width + 2 * min_space,
-                                  height=original_rect.height + 2 * min_space)
-
-        for existing_index, existing_rect in enumerate(unique_rects):
-            if expanded_rect.overlaps(existing_rect):
-                combined_rect = combine_rects(original_rect, existing_rect)
-                unique_rects[existing_index] = combined_rect
-                overlap = True
-                break
-        if not overlap:
-            unique_rects.append(original_rect)
-
+    for group in group_overlapping_rects(boundaries, min_space):
+        combined_rect = rects[group[0]]
+        for index in group[1:]:
+            combined_rect = combine_rects(combined_rect, rects[index])
+        unique_rects.append(combined_rect)
     return unique_rects
@@ -0,0 +1,120 @@
+"""
+Persistent on-disk cache of properties measured from library cell GDS files
+(size, pin shapes, layer shapes) so warm runs don't need to decode the GDS files.
+The entries of a GDS file are discarded when the file content changes.
+New entries are written once per process by flush, merged with the entries other processes saved.
+"""
+import atexit
+import copy
+import hashlib
+import os
+import pickle
+
+import debug
+from globals import OPTS
+
+# gds file -> {"signature": (size, mtime), "hash": content hash, "entries": {key: value}}
+loaded_records = {}
+# gds files with entries that haven't been saved
+modified_files = set()
+
+
+def get_cache_dir():
+    if OPTS.libcell_cache_dir:
+        return OPTS.libcell_cache_dir
+    cache_home = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cache_home, "openram", "libcells")
+
+
+def get_cache_file(gds_file):
+    path_hash = hashlib.sha1(gds_file.encode()).hexdigest()[:16]
+    return os.path.join(get_cache_dir(), "{}_{}.pickle".format(os.path.basename(gds_file),
+                                                               path_hash))
+
+
+def get_signature(gds_file):
+    stat = os.stat(gds_file)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def get_content_hash(gds_file):
+    with open(gds_file, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def read_record(cache_file):
+    if not os.path.exists(cache_file):
+        return None
+    try:
+        with open(cache_file, "rb") as f:
+            return pickle.load(f)
+    except Exception as ex:
+        debug.info(2, "Ignoring corrupt libcell cache {}: {}".format(cache_file, ex))
+        return None
+
+
+def write_record(cache_file, record):
+    # write to a temporary file first so concurrent runs never see a partial file
+    temp_file = "{}.{}.tmp".format(cache_file, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(temp_file, "wb") as f:
+            pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, cache_file)
+    except OSError as ex:
+        debug.info(2, "Unable to write libcell cache {}: {}".format(cache_file, ex))
+
+
+def get_record(gds_file):
+    """Load the cache record for gds_file, validating it against the file's current content"""
+    signature = get_signature(gds_file)
+    record = loaded_records.get(gds_file)
+    if record is not None and record["signature"] == signature:
+        return record
+    cache_file = get_cache_file(gds_file)
+    record = read_record(cache_file)
+    if record is None or record["signature"] != signature:
+        # mtime changes without content changes e.g. on checkout, so compare the content hash
+        content_hash = get_content_hash(gds_file)
+        if record is None or record["hash"] != content_hash:
+            record = {"hash": content_hash, "entries": {}}
+        record["signature"] = signature
+        write_record(cache_file, record)
+    loaded_records[gds_file] = record
+    return record
+
+
+def cached(gds_file, key, compute):
+    """
+    Return the cached value of key for gds_file, calling compute() and saving its result if missing
+    :param gds_file: the library cell gds file the value is derived from
+    :param key: hashable and picklable key e.g. ("size", units, layer)
+    :param compute: function to evaluate the value from the gds file
+    """
+    if not OPTS.libcell_cache or not os.path.isfile(gds_file):
+        return compute()
+    gds_file = os.path.abspath(gds_file)
+    record = get_record(gds_file)
+    entries = record["entries"]
+    if key not in entries:
+        entries[key] = compute()
+        modified_files.add(gds_file)
+    # callers may modify the result
+    return copy.deepcopy(entries[key])
+
+
+def flush():
+    """Save the new entries, keeping the entries saved by other processes since the record was loaded"""
+    for gds_file in sorted(modified_files):
+        record = loaded_records.get(gds_file)
+        if record is None:
+            continue
+        cache_file = get_cache_file(gds_file)
+        saved_record = read_record(cache_file)
+        if saved_record is not None and saved_record["hash"] == record["hash"]:
+            record["entries"] = {**saved_record["entries"], **record["entries"]}
+        write_record(cache_file, record)
+    modified_files.clear()
+
+
+atexit.register(flush)
@@ -30,4 +30,7 @@ def library_import(cls):
             pin_names = getattr(self.__class__, "pin_names", self.pins)
             self.pin_map = utils.get_libcell_pins(pin_names, mod_name, GDS["unit"], layer["boundary"])
 
+    # the decorated name refers to GdsLibImport so pickle can find the class by that name
+    GdsLibImport.__module__ = cls.__module__
+    GdsLibImport.__qualname__ = cls.__qualname__
     return GdsLibImport
@@ -1,5 +1,6 @@
 import debug
-from base.vector import vector
+from base.vector import vector, grid_vector
+from globals import OPTS
 from tech import GDS
 from tech import layer
 
@@ -10,6 +11,21 @@ except ImportError:
 from tech import purpose as techpurpose
 import tech
 
+def get_layer_name(layer_number):
+    """
+    Name of the layer with number layer_number.
+    Uses the reverse table built by globals.standardize_tech_config
+    """
+    try:
+        return tech.layer_names[layer_number]
+    except (AttributeError, KeyError):
+        # tech wasn't standardized or the layer was added afterwards
+        for layer_name, number in layer.items():
+            if number == layer_number:
+                return layer_name
+        debug.error("Invalid layer number {}".format(layer_number), -1)
+
+
 class pin_layout:
     """
     A class to represent a rectangular design pin. It is limited to a
@@ -18,17 +34,20 @@ class pin_layout:
 
     def __init__(self, name, rect, layer_name_num):
         self.name = name
-        # repack the rect as a vector, just in case
-        if type(rect[0])==vector:
-            self.rect = rect
+        if OPTS.use_grid_vector:
+            self.rect = [grid_vector(rect[0]), grid_vector(rect[1])]
         else:
-            self.rect = [vector(rect[0]),vector(rect[1])]
-        # snap the rect to the grid
-        self.rect = [x.snap_to_grid() for x in self.rect]
+            # repack the rect as a vector, just in case
+            if type(rect[0])==vector:
+                self.rect = rect
+            else:
+                self.rect = [vector(rect[0]),vector(rect[1])]
+            # snap the rect to the grid
+            self.rect = [x.snap_to_grid() for x in self.rect]
         self.normalize()
         # if it's a layer number look up the layer name. this assumes a unique layer number.
         if type(layer_name_num)==int:
-            self.layer = list(layer.keys())[list(layer.values()).index(layer_name_num)]
+            self.layer = get_layer_name(layer_name_num)
         else:
             self.layer=layer_name_num
         self.layer_num = layer[self.layer]
@@ -82,37 +101,12 @@ class pin_layout:
 
     def normalize(self):
         """ Re-find the LL and UR points after a transform """
-        (first,second)=self.rect
-        ll = vector(min(first[0],second[0]),min(first[1],second[1]))
-        ur = vector(max(first[0],second[0]),max(first[1],second[1]))
-        self.rect=[ll,ur]
+        self.rect = normalize_rect(self.rect)
         
     def transform(self,offset,mirror,rotate):
         """ Transform with offset, mirror and rotation to get the absolute pin location. 
         We must then re-find the ll and ur. The master is the cell instance. """
-        (ll,ur) = self.rect
-        if mirror=="MX":
-            ll=ll.scale(1,-1)
-            ur=ur.scale(1,-1)
-        elif mirror=="MY":
-            ll=ll.scale(-1,1)
-            ur=ur.scale(-1,1)
-        elif mirror=="XY":
-            ll=ll.scale(-1,-1)
-            ur=ur.scale(-1,-1)
-            
-        if rotate==90:
-            ll=ll.rotate_scale(-1,1)
-            ur=ur.rotate_scale(-1,1)
-        elif rotate==180:
-            ll=ll.scale(-1,-1)
-            ur=ur.scale(-1,-1)
-        elif rotate==270:
-            ll=ll.rotate_scale(1,-1)
-            ur=ur.rotate_scale(1,-1)
-
-        self.rect=[offset+ll,offset+ur]
-        self.normalize()
+        self.rect = transform_rect(self.rect, offset, mirror, rotate)
 
     def center(self):
         return vector(0.5*(self.rect[0].x+self.rect[1].x),0.5*(self.rect[0].y+self.rect[1].y))
@@ -215,3 +209,64 @@ class pin_layout:
                           magnification=GDS["zoom"],
                           rotate=None)
     
+
+
+def normalize_rect(rect):
+    """ [ll, ur] of a rect given by any two opposite corners """
+    (first,second)=rect
+    if isinstance(first, grid_vector) and isinstance(second, grid_vector):
+        return [first.min(second), first.max(second)]
+    ll = vector(min(first[0],second[0]),min(first[1],second[1]))
+    ur = vector(max(first[0],second[0]),max(first[1],second[1]))
+    return [ll,ur]
+
+
+def transform_rect(rect, offset, mirror, rotate):
+    """ Normalized rect after mirroring, rotating and then translating by offset """
+    (ll,ur) = rect
+    if mirror=="MX":
+        ll=ll.scale(1,-1)
+        ur=ur.scale(1,-1)
+    elif mirror=="MY":
+        ll=ll.scale(-1,1)
+        ur=ur.scale(-1,1)
+    elif mirror=="XY":
+        ll=ll.scale(-1,-1)
+        ur=ur.scale(-1,-1)
+
+    if rotate==90:
+        ll=ll.rotate_scale(-1,1)
+        ur=ur.rotate_scale(-1,1)
+    elif rotate==180:
+        ll=ll.scale(-1,-1)
+        ur=ur.scale(-1,-1)
+    elif rotate==270:
+        ll=ll.rotate_scale(1,-1)
+        ur=ur.rotate_scale(1,-1)
+
+    return normalize_rect([offset+ll,offset+ur])
+
+
+class transformed_pin(pin_layout):
+    """
+    Pin of an instance: a module pin transformed by the instance offset, mirror and rotate.
+    The module pin is already snapped and its layer resolved so none of that is redone.
+    These are cached and shared by the instance so they can't be modified,
+    create a pin_layout from it to get a modifiable copy.
+    The rect is a tuple and ll and ur return copies of its corners.
+    """
+
+    def __init__(self, pin, offset, mirror, rotate):
+        self.__dict__.update(name=pin.name, layer=pin.layer, layer_num=pin.layer_num,
+                             rect=tuple(transform_rect(pin.rect, offset, mirror, rotate)))
+
+    def ll(self):
+        """ Lower left point """
+        return vector(self.rect[0].x, self.rect[0].y)
+
+    def ur(self):
+        """ Upper right point """
+        return vector(self.rect[1].x, self.rect[1].y)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Instance pins are shared and can't be modified")
@@ -0,0 +1,87 @@
+"""
+Index of the rectangles and pins of a design by layer, used by design.get_layer_shapes
+so a query doesn't filter every object of the design.
+"""
+import copy
+import itertools
+
+from base.geometry import rectangle, rectangle_array
+from base.hierarchy_layout import get_purpose
+from tech import layer as tech_layers
+
+
+class ShapeIndex:
+    """
+    Rectangles of a design's objs keyed by (layer number, purpose) and rectangles of its pins.
+    objs only grows through add_rect and friends so new objects are indexed as they show up.
+    The index is rebuilt when the objs list is replaced, cleared or shrinks.
+    """
+
+    def __init__(self):
+        self.objs = None
+        self.num_indexed = 0
+        self.last_obj = None
+        self.rects = {}
+        self.all_rects = []
+        # id(pin) -> (pin, pin.rect, pin.layer, rectangle)
+        self.pin_rects = {}
+        # bumped when the objects are modified in place (e.g. translate_all)
+        self.version = 0
+
+    def invalidate(self):
+        self.version += 1
+        # rectangle arrays create new rects when moved
+        self.objs = None
+
+    def sync(self, objs):
+        """Index the objects added to objs since the last sync"""
+        num_indexed = self.num_indexed
+        if (objs is not self.objs or len(objs) < num_indexed or
+                (num_indexed > 0 and objs[num_indexed - 1] is not self.last_obj)):
+            self.objs = objs
+            self.rects = {}
+            self.all_rects = []
+            num_indexed = 0
+        for obj in itertools.islice(objs, num_indexed, None):
+            if isinstance(obj, rectangle):
+                self.rects.setdefault((obj.layerNumber, obj.layerPurpose), []).append(obj)
+                self.all_rects.append(obj)
+            elif isinstance(obj, rectangle_array):
+                obj_rects = obj.get_rects()
+                self.rects.setdefault((obj.layerNumber, obj.layerPurpose), []).extend(obj_rects)
+                self.all_rects.extend(obj_rects)
+        self.num_indexed = len(objs)
+        self.last_obj = objs[-1] if objs else None
+
+    def get_rects(self, objs, layer_number=None, purpose=None):
+        """Rectangles in objs on (layer_number, purpose), all rectangles if layer_number is None"""
+        self.sync(objs)
+        if layer_number is None:
+            return list(self.all_rects)
+        return list(self.rects.get((layer_number, purpose), []))
+
+    def get_pin_rects(self, pin_map, layer=None):
+        """Rectangles for the pins in pin_map on layer (by name), all pins if layer is None"""
+        results = []
+        for pins in pin_map.values():
+            for pin in pins:
+                if layer and not pin.layer == layer:
+                    continue
+                entry = self.pin_rects.get(id(pin))
+                if (entry is None or entry[0] is not pin or entry[1] is not pin.rect
+                        or entry[2] != pin.layer):
+                    pin_rect = rectangle(layerNumber=tech_layers[pin.layer],
+                                         layerPurpose=get_purpose(pin.layer),
+                                         offset=pin.ll(), width=pin.rx() - pin.lx(),
+                                         height=pin.uy() - pin.by())
+                    entry = (pin, pin.rect, pin.layer, pin_rect)
+                    self.pin_rects[id(pin)] = entry
+                # pin rects used to be created on every call so callers may modify them
+                results.append(copy.copy(entry[3]))
+        return results
+
+    def get_token(self, objs, pin_map):
+        """Changes whenever the rectangles or pins of the design may have changed"""
+        pins = tuple((pin.layer, pin.lx(), pin.by(), pin.rx(), pin.uy())
+                     for pins in pin_map.values() for pin in pins)
+        return (id(objs), len(objs), objs[-1] if objs else None, self.version, pins)
@@ -1,9 +1,13 @@
 """
 Implements a simple spice parser to enable constructing cell hierarchy
 """
+import contextlib
+import functools
+import gc
+import itertools
 import os
 import re
-from typing import Union, TextIO, List, Tuple
+from typing import Union, TextIO, List, Tuple, Dict, Iterator, Iterable, Callable
 
 import debug
 from tech import spice as tech_spice
@@ -17,10 +21,14 @@ SUFFIXES = {
 }
 
 
+@functools.lru_cache(maxsize=None)
+def get_parameter_pattern(param_name):
+    return re.compile(r"{}\s*=\s*(?P<value>[0-9e\.\-]+)(?P<suffix>[munpf]?)".format(param_name))
+
+
 def tx_extract_parameter(param_name, statement):
-    pattern = r"{}\s*=\s*(?P<value>[0-9e\.\-]+)(?P<suffix>[munpf]?)".format(param_name)
     debug.info(4, "Search for parameter {} in {}".format(param_name, statement))
-    match = re.search(pattern, statement)
+    match = get_parameter_pattern(param_name).search(statement)
     if not match:
         return None
     value = float(match.groups()[0])
@@ -30,82 +38,131 @@ def tx_extract_parameter(param_name, statement):
     return value
 
 
-def load_source(source: Union[str, TextIO]):
+def read_lines(source: Union[str, TextIO]) -> Iterator[str]:
+    """Iterate over the lines of source without loading a file's whole content
+    :param source: file name, spice content or file object
+    """
     if isinstance(source, str):
         if "\n" not in source and os.path.exists(source):
             debug.info(3, "Loading spice from source file: {}".format(source))
             with open(source, "r") as f:
-                source = f.read()
+                yield from f
+        else:
+            yield from source.splitlines()
     else:
         source.seek(0)
-        source = source.read()
-    return source
+        yield from source
 
 
-def extract_lines(source: str, lower_case=True):
-    all_lines = []
-    for line in source.splitlines():
-        if not line or not line.strip() or line.strip().startswith("*"):
-            continue
+def strip_comments(lines: Iterable[str], lower_case=True) -> Iterator[str]:
+    """Strip whitespace and comments, skipping empty and comment lines"""
+    for line in lines:
         line = line.strip()
+        if not line or line.startswith("*"):
+            continue
         if lower_case:
             line = line.lower()
-        if '*' not in line:
-            all_lines.append(line)
-        else:  # strip comment from end if applicable
+        if "*" in line:
+            # strip comment from end if applicable, "*" after quotes is part of an expression
+            last_quote = max(line.rfind("'"), line.rfind('"'))
+            end_index = line.find("*", last_quote + 1)
+            if end_index >= 0:
+                line = line[:end_index].strip()
+        yield line
+
+
+def join_continuations(lines: Iterable[str]) -> Iterator[str]:
+    """Append continuation lines (starting with +) to the line they continue"""
+    parts = []
+    for line in lines:
+        if parts and line.startswith("+"):
+            parts.append(line[1:])
+            continue
+        if parts:
+            yield "".join(parts)
+        parts = [line]
+    if parts:
+        yield "".join(parts)
+
+
+def group_mods(lines: Iterable[str], mod_filter: Callable[[str], bool] = None,
+               line_filter: Callable[[str], bool] = None) -> Iterator[List[str]]:
+    """
+    Group full lines (continuations joined) into modules, yielding each module as it ends
+    :param lines: full lines
+    :param mod_filter: only keep modules whose .subckt line passes the filter
+    :param line_filter: only keep the lines within modules that pass the filter
+    :return: iterator of [.subckt line, module lines...]
+    """
+    current_mod = None
+    for line in lines:
+        line_start = line[:7].lower()
+        if line_start.startswith(".subckt"):
+            if current_mod:
+                yield current_mod
+            current_mod = [line] if mod_filter is None or mod_filter(line) else None
+        elif line_start.startswith(".ends"):
+            if current_mod:
+                yield current_mod
+            current_mod = None
+        elif current_mod and (line_filter is None or line_filter(line)):
+            current_mod.append(line)
+    if current_mod:
+        yield current_mod
 
-            end_index = len(line)
-            for i in range(len(line)):
-                if line[i] == "*" and end_index <= len(line):
-                    end_index = min(i, end_index)
-                elif line[i] in ["'", '"']:  # to prevent removing expressions
-                    end_index = len(line)
-            all_lines.append(line[:end_index].strip())
 
-    return all_lines
+def extract_lines(source: str, lower_case=True):
+    return list(strip_comments(source.splitlines(), lower_case=lower_case))
 
 
-MODE_INIT = 0
-MODE_PARSING = 1
-MODE_END = 2
+def group_lines_by_mod(all_lines: List[str]):
+    return list(group_mods(join_continuations(all_lines)))  # List[List[str]]
 
 
-def group_lines_by_mod(all_lines: List[str]):
-    line_counter = 0
+def get_line_nets(tokens: List[str]):
+    """Tokens before the parameters"""
+    return itertools.takewhile(lambda token: "=" not in token, tokens)
 
-    lines_by_module = []
 
-    mode = MODE_INIT
+@contextlib.contextmanager
+def gc_paused():
+    """Pause garbage collection while creating many objects that stay alive, e.g. large netlists"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
 
-    current_mod = []
 
-    while line_counter < len(all_lines):
-        # construct a full line
-        line = all_lines[line_counter]
-        line_counter += 1
-        while line_counter < len(all_lines):
-            if all_lines[line_counter].startswith("+"):
-                line += all_lines[line_counter][1:]
-                line_counter += 1
-            else:
-                break
+@functools.lru_cache(maxsize=None)
+def get_tx_names():
+    tx_names = {tech_spice["nmos"], tech_spice["pmos"]}
+    if "tx_names" in tech_spice:
+        tx_names.update(tech_spice["tx_names"].keys())
+    return tx_names
 
-        if line.lower().startswith(".subckt"):
-            if len(current_mod) > 0:
-                lines_by_module.append(current_mod)
-            current_mod = [line]
-            mode = MODE_PARSING
-            continue
-        elif line.lower().startswith(".ends"):
-            mode = MODE_END
-            continue
-        if mode == MODE_PARSING:
-            current_mod.append(line)
 
-    if len(current_mod) > 0:
-        lines_by_module.append(current_mod)
+def tokens_contain_tx(tokens: List[str]):
+    if tokens and tokens[0].startswith("m"):
+        return True
+    return len(tokens) >= 6 and tokens[5] in get_tx_names()
+
 
-    return lines_by_module  # List[List[str]]
+def tokens_primitive(tokens: List[str]):
+    """Pair of primitive's name and primitive's pins if tokens are a primitive's line"""
+    if tokens_contain_tx(tokens):
+        return tokens[5], ["d", "g", "s", "b"]
+
+    prev_token = None
+    for token in tokens:
+        if "=" in token:
+            break
+        prev_token = token
+    spice_primitives = tech_spice.get("primitives", {})
+    if prev_token and prev_token in spice_primitives:
+        return prev_token, spice_primitives[prev_token]
 
 
 class SpiceMod:
@@ -114,6 +171,54 @@ class SpiceMod:
         self.pins = pins
         self.contents = contents
         self.sub_modules = []  # type: List[SpiceMod]
+        self.reset_index()
+
+    def reset_index(self):
+        """Discard the indices derived from contents. Must be called after modifying contents"""
+        self._tokens = None
+        self._net_index = None
+        self._instance_index = None
+        self._primitives = {}
+
+    @property
+    def tokens(self) -> List[Tuple[str, ...]]:
+        """Whitespace separated tokens of each line in contents"""
+        if self._tokens is None:
+            with gc_paused():
+                self._tokens = [tuple(line.split()) for line in self.contents]
+        return self._tokens
+
+    @property
+    def net_index(self):
+        """net -> indices of the lines containing net"""
+        if self._net_index is None:
+            net_index = {}
+            with gc_paused():
+                for line_index, tokens in enumerate(self.tokens):
+                    for token in tokens:
+                        if "=" in token:  # parameters follow the nets
+                            break
+                        entries = net_index.get(token)
+                        if entries is None:
+                            net_index[token] = [line_index]
+                        elif entries[-1] != line_index:
+                            entries.append(line_index)
+            self._net_index = net_index
+        return self._net_index
+
+    @property
+    def instance_index(self):
+        """instance name -> line index"""
+        if self._instance_index is None:
+            self._instance_index = {tokens[0]: line_index
+                                    for line_index, tokens in enumerate(self.tokens) if tokens}
+        return self._instance_index
+
+    def get_primitive(self, line_index):
+        """SpiceParser.is_primitive of the line at line_index"""
+        if line_index not in self._primitives:
+            self._primitives[line_index] = tokens_primitive(self.tokens[line_index])
+        return self._primitives[line_index]
 
     def __str__(self):
         return f"SpiceMod: ({self.name}: [{', '.join(self.pins)}])"
@@ -124,26 +229,50 @@ class SpiceMod:
 
 class SpiceParser:
 
-    def __init__(self, source: Union[str, TextIO], lower_case=True):
+    def __init__(self, source: Union[str, TextIO], lower_case=True, modules=None, nets=None,
+                 keep_lines=True):
+        """
+        :param source: file name, spice content or file object. Files are read incrementally
+        :param lower_case: convert the content to lower case
+        :param modules: only keep the modules with these names
+        :param nets: only keep the module lines connected to one of these nets
+        :param keep_lines: save the comment stripped lines to all_lines
+        """
         self.mods = []  # type: List[SpiceMod]
 
-        source = load_source(source)
-        self.all_lines = all_lines = extract_lines(source, lower_case=lower_case)
+        lines = strip_comments(read_lines(source), lower_case=lower_case)
+        if keep_lines:
+            self.all_lines = lines = list(lines)
+        else:
+            self.all_lines = None
+
+        mod_filter = line_filter = None
+        if modules is not None:
+            modules = {x.lower() if lower_case else x for x in modules}
+            mod_filter = lambda line: line.split(maxsplit=2)[1] in modules
+        if nets is not None:
+            nets = {x.lower() if lower_case else x for x in nets}
+            line_filter = lambda line: not nets.isdisjoint(get_line_nets(line.split()))
 
-        mods_by_lines = group_lines_by_mod(all_lines)
-        for mod_lines in mods_by_lines:
+        for mod_lines in group_mods(join_continuations(lines), mod_filter, line_filter):
             subckt_line = mod_lines[0].split()
             mod_name = subckt_line[1]
             mod_pins = [x for x in subckt_line[2:] if "=" not in x]
             self.mods.append(SpiceMod(mod_name, mod_pins,
                                       contents=[] if len(mod_lines) == 1 else mod_lines[1:]))
+        self.mods_by_name = {}  # type: Dict[str, SpiceMod]
 
     def get_module(self, module_name):
         module_name = module_name.lower()
-        for mod in self.mods:
-            if mod.name == module_name:
-                return mod
-        assert False, module_name + " not in spice deck"
+        mod = self.mods_by_name.get(module_name)
+        if mod is None or mod.name != module_name:
+            # (re)build the index, mods may have been added or renamed. First module with a name wins
+            self.mods_by_name = {}
+            for mod in reversed(self.mods):
+                self.mods_by_name[mod.name] = mod
+            mod = self.mods_by_name.get(module_name)
+        assert mod is not None, module_name + " not in spice deck"
+        return mod
 
     def get_pins(self, module_name):
         return self.get_module(module_name).pins
@@ -152,29 +281,12 @@ class SpiceParser:
     def line_contains_tx(line: str):
         if line.startswith("m"):
             return True
-        line_split = line.split()
-        if len(line_split) < 6:
-            return False
-        mod_name = line_split[5]
-        tx_names = {tech_spice["nmos"], tech_spice["pmos"]}
-        if "tx_names" in tech_spice:
-            tx_names.update(tech_spice["tx_names"].keys())
-        return mod_name in tx_names
+        return tokens_contain_tx(line.split())
 
     @staticmethod
     def is_primitive(line: str) -> Tuple[str, List]:
         """Check if a line contains a primitive. Return pair of primitive's name and primitive's pins"""
-        if SpiceParser.line_contains_tx(line):
-            return line.split()[5], ["d", "g", "s", "b"]
-
-        prev_token = None
-        for token in line.split():
-            if "=" in token:
-                break
-            prev_token = token
-        spice_primitives = tech_spice.get("primitives", {})
-        if prev_token and prev_token in spice_primitives:
-            return prev_token, spice_primitives[prev_token]
+        return tokens_primitive(line.split())
 
     def deduce_hierarchy_for_pin(self, pin_name, module_name):
 
@@ -189,20 +301,18 @@ class SpiceParser:
         module = self.get_module(module_name)
         nested_hierarchy = []
         # breadth first and then go deep in each
-        for line in module.contents:
-            if pin_name not in line.split():
-                continue
-
-            pin_index = line.split().index(pin_name) - 1
-            is_primitive = self.is_primitive(line)
+        for line_index in module.net_index.get(pin_name, []):
+            line = module.contents[line_index]
+            tokens = module.tokens[line_index]
+            pin_index = tokens.index(pin_name) - 1
+            is_primitive = module.get_primitive(line_index)
             if is_primitive:  # end of hierarchy
-                pin_index = line.split().index(pin_name) - 1
                 yield post_process_callback(line, pin_index, is_primitive)
             else:
-                child_module_name = line.split()[-1]
+                child_module_name = tokens[-1]
                 child_module = self.get_module(child_module_name)
                 child_pin_name = child_module.pins[pin_index]
-                instance_name = line.split()[0]
+                instance_name = tokens[0]
 
                 nested_hierarchy.append((instance_name, child_module_name, child_pin_name))
 
@@ -217,13 +327,9 @@ class SpiceParser:
         hierarchy = node_name.split(".")
         for child in hierarchy[:-1]:
             module = self.get_module(module_name)
-            found = False
-            for line in module.contents:
-                if line.split()[0] == child:
-                    found = True
-                    module_name = line.split()[-1]
-
-            assert found, "Node {} not found in hierarchy".format(node_name)
+            line_index = module.instance_index.get(child)
+            assert line_index is not None, "Node {} not found in hierarchy".format(node_name)
+            module_name = module.tokens[line_index][-1]
 
         target_pin = hierarchy[-1]
         return [hierarchy[:-1] + x for x in self.deduce_hierarchy_for_pin(target_pin, module_name)]
@@ -370,6 +476,7 @@ class SpiceParser:
                 child_module_name = spice_statement.split()[-1]
                 new_line = spice_statement.split()[:-1] + [(child_module_name + suffix)]
                 mod.contents[i] = " ".join(new_line)
+            mod.reset_index()
 
     def export_spice(self):
         content = []
@@ -1,21 +1,66 @@
 # https://stackoverflow.com/questions/3615565/python-get-constructor-to-return-an-existing-object-instead-of-a-new-one/33458129
+import debug
 
 
 class Unique(type):
+    """
+    Metaclass that builds each module once per process.
+    Modules are keyed by the name returned by the class's get_name which is called with the
+    constructor arguments so the name must encode every parameter that changes the module.
+    """
+
+    # class name -> [hits, misses] of all the Unique classes
+    stats = {}
+    # all the Unique classes
+    classes = []
 
     def __call__(cls, *args, **kwargs):
         name = cls.get_name(*args, **kwargs)
+        counts = Unique.stats.setdefault(get_class_name(cls), [0, 0])
         if name not in cls._cache:
+            counts[1] += 1
             self = cls.__new__(cls, *args, **kwargs)
             self.name = name
             cls.__init__(self, *args, **kwargs)
             cls._cache[name] = self
+        else:
+            counts[0] += 1
         return cls._cache[name]
 
     def __init__(cls, name, bases, attributes):
         super().__init__(name, bases, attributes)
         cls._cache = {}
+        Unique.classes.append(cls)
 
     @classmethod
     def get_name(mcs, *args, **kwargs):
         raise NotImplementedError("Classes must implement get_name method to determine uniqueness")
+
+
+def clear_caches():
+    """Forget the modules built so far so they are rebuilt by the next constructor call"""
+    for cls in Unique.classes:
+        cls._cache.clear()
+
+
+def get_class_name(cls):
+    # classes created by decorators such as library_import are named after the decorated class
+    if "<locals>" in cls.__qualname__ and cls.__bases__:
+        return cls.__bases__[0].__name__
+    return cls.__qualname__.rsplit(".", 1)[-1]
+
+
+def get_stats():
+    """(class name, hits, misses) of the Unique classes with the most hits first"""
+    return sorted(((name, hits, misses) for name, (hits, misses) in Unique.stats.items()),
+                  key=lambda x: (-x[1], x[0]))
+
+
+def report_stats(level=1):
+    stats = get_stats()
+    if not stats:
+        return
+    debug.info(level, "Module cache: {} hits {} builds".format(sum(x[1] for x in stats),
+                                                             sum(x[2] for x in stats)))
+    for name, hits, misses in stats:
+        debug.info(level, "    {:<40} hits: {:>6} builds: {:>5}".format(name, hits, misses))
@@ -9,6 +9,8 @@ from typing import List, TYPE_CHECKING
 
 import globals
 import tech
+from base import intervals
+from base import libcell_cache
 from base import run_command as run_command_mod
 from base.geometry import rectangle
 from base.pin_layout import pin_layout
@@ -222,7 +224,7 @@ def auto_measure_libcell(pin_list, name, units, layer):
     """
     cell_gds = os.path.join(OPTS.openram_tech, "gds_lib", str(name) + ".gds")
     cell_vlsi = gdsMill.VlsiLayout(units=units, from_file=cell_gds)
-    cell_vlsi.load_from_file()
+    cell_vlsi.load_from_file(lazy=True)
 
     cell = {}
     measure_result = cell_vlsi.getLayoutBorder(layer)
@@ -236,13 +238,16 @@ def auto_measure_libcell(pin_list, name, units, layer):
     return cell
 
 
-def load_gds(name, units):
+def get_libcell_gds_file(name):
     if os.path.isabs(name) and os.path.exists(name):
-        cell_gds = name
-    else:
-        cell_gds = os.path.join(OPTS.openram_tech, "gds_lib", str(name) + ".gds")
+        return name
+    return os.path.join(OPTS.openram_tech, "gds_lib", str(name) + ".gds")
+
+
+def load_gds(name, units):
+    cell_gds = get_libcell_gds_file(name)
     cell_vlsi = gdsMill.VlsiLayout(units=units, from_file=cell_gds)
-    cell_vlsi.load_from_file()
+    cell_vlsi.load_from_file(lazy=True)
     return cell_vlsi
 
 
@@ -251,14 +256,17 @@ def get_libcell_size(name, units, layer):
     Open a GDS file and return the library cell size from either the
     bounding box or a border layer.
     """
-    cell_vlsi = load_gds(name, units)
+    def measure_size():
+        cell_vlsi = load_gds(name, units)
 
-    measure_result = cell_vlsi.getLayoutBorder(layer)
-    if measure_result == None:
-        name = name.split("/")[-1]
-        measure_result = cell_vlsi.measureSize(name)
-    # returns width,height
-    return measure_result
+        measure_result = cell_vlsi.getLayoutBorder(layer)
+        if measure_result == None:
+            measure_result = cell_vlsi.measureSize(name.split("/")[-1])
+        # returns width,height
+        return measure_result
+
+    key = ("size", tuple(units), layer)
+    return libcell_cache.cached(get_libcell_gds_file(name), key, measure_size)
 
 
 def get_libcell_pins(pin_list, name, units=None, layer=None, cell_vlsi=None):
@@ -270,23 +278,30 @@ def get_libcell_pins(pin_list, name, units=None, layer=None, cell_vlsi=None):
         units = tech.GDS["unit"]
     if layer is None:
         layer = tech.layer["boundary"]
-    cell_vlsi = cell_vlsi or load_gds(name, units)
+
+    def get_label_shapes(pin_name):
+        vlsi = cell_vlsi or load_gds(name, units)
+        return vlsi.getPinShapeByLabel(pin_name, layer_pin_map=layer_pin_map)
 
     cell = {}
     for pin in pin_list:
         cell[str(pin).lower()]=[]
-        label_list=cell_vlsi.getPinShapeByLabel(str(pin), layer_pin_map=layer_pin_map)
+        if cell_vlsi is None:
+            key = ("pins", str(pin), tuple(units))
+            label_list = libcell_cache.cached(get_libcell_gds_file(name), key,
+                                              lambda: get_label_shapes(str(pin)))
+        else:
+            label_list = get_label_shapes(str(pin))
         for label in label_list:
-            (name,layer,boundary)=label
+            (pin_name,pin_layer,boundary)=label
             rect = pin_rect(boundary)
             # this is a list because other cells/designs may have must-connect pins
-            cell[str(pin).lower()].append(pin_layout(pin, rect, layer))
+            cell[str(pin).lower()].append(pin_layout(pin, rect, pin_layer))
     return cell
 
 
 def get_clearances(cell, layer, purpose=None):
-    all_rects = list(sorted(cell.get_gds_layer_rects(layer, purpose),
-                            key=lambda x: x.height))  # type: List[rectangle]
+    all_rects = cell.get_gds_layer_rects(layer, purpose)  # type: List[rectangle]
 
     def remove_empty(rects):
         return list(filter(lambda rect: rect[1] > rect[0], rects))
@@ -294,46 +309,15 @@ def get_clearances(cell, layer, purpose=None):
     height = cell.height
     if len(all_rects) == 0:
         return [(0, height)]
-    elif len(all_rects) == 1:
-        top_rect = all_rects[0]
-        return remove_empty([(0, top_rect.by()), (top_rect.uy(), height)])
-
-
-
-    def overlaps(rect1, rect2):
-        return rect1.by() <= rect2.by() <= rect1.uy() or rect2.by() <= rect1.by() <= rect2.uy()
-
-    def combine_rects(original, rect2):
-        original.boundary = [vector(original.lx(), min(original.by(), rect2.by())),
-                             vector(original.rx(), max(original.uy(), rect2.uy()))]
-
-    def find_overlaps(rects):
-        original_length = len(rects)
-        obstructions = [rects[0]]
-        for rect in rects[1:]:
-            found = False
-            for obstruction in obstructions:
-                if overlaps(rect, obstruction):
-                    combine_rects(obstruction, rect)
-                    found = True
-                    break
-            if not found:
-                obstructions.append(rect)
-        final_length = len(obstructions)
-        return original_length == final_length, obstructions
-
-    obstructions = all_rects
-    while True:
-        stabilized, obstructions = find_overlaps(obstructions)
-        if stabilized:
-            break
-    obstructions = list(sorted(obstructions, key=lambda x: x.by()))
+
+    obstruction_bottoms, obstruction_tops = intervals.merge_intervals(
+        [rect.by() for rect in all_rects], [rect.uy() for rect in all_rects], merge_touching=True)
 
     results = []
     prev_top = 0
-    for obstruction in obstructions:
-        results.append((prev_top, obstruction.by()))
-        prev_top = obstruction.uy()
+    for bottom, top in zip(obstruction_bottoms.tolist(), obstruction_tops.tolist()):
+        results.append((prev_top, bottom))
+        prev_top = top
     results.append((prev_top, height))
 
     return remove_empty(results)
@@ -1,7 +1,24 @@
 import functools
 import math
 
+import numpy as np
+
 import tech
+from globals import OPTS
+
+
+def to_grid_units(offset, grid):
+    """ Nearest multiple of grid to offset as an integer number of grid units """
+    # this gets the nearest integer value
+    # 0.001 added for edge cases: round(196.5, 0) rounds to 196 in python3 but 197 in python 2
+    return int(math.copysign(1, offset) * round(round((abs(offset) / grid), 2) + 0.001, 0))
+
+
+def snap_array_to_grid(values):
+    """ to_grid_units applied to every element of an array, returned as multiples of the grid """
+    grid = tech.drc["grid"]
+    values = np.asarray(values, dtype=float)
+    return np.copysign(1, values) * np.round(np.round(np.abs(values) / grid, 2) + 0.001) * grid
 
 
 @functools.total_ordering
@@ -96,12 +113,8 @@ class vector:
         """
         Changes the coodrinate to match the grid settings
         """
-        grid = tech.drc["grid"]  
-        # this gets the nearest integer value
-        # 0.001 added for edge cases: round(196.5, 0) rounds to 196 in python3 but 197 in python 2
-        off_in_grid = int(math.copysign(1, offset) * round(round((abs(offset) / grid), 2) + 0.001, 0))
-        offset = off_in_grid * grid
-        return offset
+        grid = tech.drc["grid"]
+        return to_grid_units(offset, grid) * grid
 
     def rotate(self):
         """ pass a copy of rotated vector, without altering the vector! """
@@ -141,7 +154,7 @@ class vector:
 
     def __eq__(self, other):
         """Override the default Equals behavior"""
-        if isinstance(other, self.__class__):
+        if isinstance(other, (self.__class__, grid_vector)):
             return math.isclose(self.x, other.x) and math.isclose(self.y, other.y)
         return False
 
@@ -155,3 +168,174 @@ class vector:
     def min(self, other):
         """ Min of both values """
         return vector(min(self.x,other.x),min(self.y,other.y))
+
+
+@functools.total_ordering
+class grid_vector:
+    """
+    Immutable coordinate stored as integer multiples of the manufacturing grid.
+    It is snapped to the grid once on construction and x, y are in microns like vector,
+    so it can be used wherever a snapped vector is read. Sums, differences and
+    Manhattan transforms of grid vectors are exact integer operations.
+    Operations with anything else (vectors, tuples, non integer scales) return a vector.
+    """
+    __slots__ = ("ix", "iy")
+    grid = None
+
+    def __init__(self, x, y=None):
+        if y is None:
+            if isinstance(x, grid_vector):
+                set_ix(self, x.ix)
+                set_iy(self, x.iy)
+                return
+            x, y = x[0], x[1]
+        grid = grid_vector.get_grid()
+        set_ix(self, to_grid_units(x, grid))
+        set_iy(self, to_grid_units(y, grid))
+
+    @staticmethod
+    def get_grid():
+        if grid_vector.grid is None:
+            grid_vector.grid = tech.drc["grid"]
+        return grid_vector.grid
+
+    @classmethod
+    def from_grid_units(cls, ix, iy):
+        """ Create from integer grid units without snapping """
+        result = object.__new__(cls)
+        set_ix(result, ix)
+        set_iy(result, iy)
+        return result
+
+    def __setattr__(self, name, value):
+        raise AttributeError("grid_vector is immutable, create a new one instead")
+
+    def __reduce__(self):
+        return grid_vector.from_grid_units, (self.ix, self.iy)
+
+    @property
+    def x(self):
+        return self.ix * grid_vector.get_grid()
+
+    @property
+    def y(self):
+        return self.iy * grid_vector.get_grid()
+
+    def to_vector(self):
+        return vector(self.x, self.y)
+
+    def __str__(self):
+        return "["+str(self.x)+","+str(self.y)+"]"
+
+    def __repr__(self):
+        return "["+str(self.x)+","+str(self.y)+"]"
+
+    def __getitem__(self, index):
+        if index == 0:
+            return self.x
+        elif index == 1:
+            return self.y
+        else:
+            return self
+
+    def __hash__(self):
+        return hash((self.ix, self.iy))
+
+    def __eq__(self, other):
+        if isinstance(other, grid_vector):
+            return self.ix == other.ix and self.iy == other.iy
+        if isinstance(other, vector):
+            return math.isclose(self.x, other.x) and math.isclose(self.y, other.y)
+        return False
+
+    def __lt__(self, other):
+        return self.x < other.x and self.y < other.y
+
+    def __add__(self, other):
+        if isinstance(other, grid_vector):
+            return grid_vector.from_grid_units(self.ix + other.ix, self.iy + other.iy)
+        return vector(self.x + other[0], self.y + other[1])
+
+    def __radd__(self, other):
+        if other == 0:
+            return self
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        if isinstance(other, grid_vector):
+            return grid_vector.from_grid_units(self.ix - other.ix, self.iy - other.iy)
+        return vector(self.x - other[0], self.y - other[1])
+
+    def __rsub__(self, other):
+        return vector(other[0] - self.x, other[1] - self.y)
+
+    def snap_to_grid(self):
+        """ Already on the grid """
+        return self
+
+    def scale(self, x_factor, y_factor=None):
+        if y_factor is None:
+            y_factor = x_factor[1]
+            x_factor = x_factor[0]
+        if type(x_factor) == int and type(y_factor) == int:
+            return grid_vector.from_grid_units(self.ix * x_factor, self.iy * y_factor)
+        return vector(self.x * x_factor, self.y * y_factor)
+
+    def rotate(self):
+        return grid_vector.from_grid_units(self.iy, self.ix)
+
+    def rotate_scale(self, x_factor, y_factor=None):
+        if y_factor is None:
+            y_factor = x_factor[1]
+            x_factor = x_factor[0]
+        if type(x_factor) == int and type(y_factor) == int:
+            return grid_vector.from_grid_units(self.iy * x_factor, self.ix * y_factor)
+        return vector(self.y * x_factor, self.x * y_factor)
+
+    def transform(self, offset, mirror, rotate):
+        """ Mirror ("MX", "MY", "XY"), rotate (0, 90, 180, 270) and then translate by offset
+        as done to the corners of pins and instances """
+        (x_scale, y_scale) = MIRROR_SCALES.get(mirror, (1, 1))
+        if rotate == 180:
+            x_scale, y_scale = -x_scale, -y_scale
+        ix, iy = self.ix * x_scale, self.iy * y_scale
+        if rotate == 90:
+            ix, iy = -iy, ix
+        elif rotate == 270:
+            ix, iy = iy, -ix
+        return offset + grid_vector.from_grid_units(ix, iy)
+
+    def floor(self):
+        return self.to_vector().floor()
+
+    def ceil(self):
+        return self.to_vector().ceil()
+
+    def round(self):
+        return self.to_vector().round()
+
+    def max(self, other):
+        if isinstance(other, grid_vector):
+            return grid_vector.from_grid_units(max(self.ix, other.ix), max(self.iy, other.iy))
+        return vector(max(self.x, other.x), max(self.y, other.y))
+
+    def min(self, other):
+        if isinstance(other, grid_vector):
+            return grid_vector.from_grid_units(min(self.ix, other.ix), min(self.iy, other.iy))
+        return vector(min(self.x, other.x), min(self.y, other.y))
+
+
+# assign the slots directly since grid_vector.__setattr__ is disabled
+set_ix = grid_vector.ix.__set__
+set_iy = grid_vector.iy.__set__
+MIRROR_SCALES = {"MX": (1, -1), "MY": (-1, 1), "XY": (-1, -1)}
+
+
+def snapped_vector(x, y=None):
+    """
+    Grid snapped coordinate. Returns a grid_vector when OPTS.use_grid_vector is set
+    otherwise a snapped vector
+    """
+    if OPTS.use_grid_vector:
+        return grid_vector(x, y)
+    return vector(x, y).snap_to_grid()
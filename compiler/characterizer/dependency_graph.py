@@ -445,18 +445,14 @@ class GraphPath:
 def get_instance_module(instance_name: str, parent_module: design):
     """Get module for instance given the instance name"""
     instance_name = instance_name.lower()
-
-    def name_matches(inst):
-        candidate_name = inst.name.lower().strip()  # type: str
-        return (candidate_name == instance_name or
-                (instance_name and instance_name.startswith("x") and
-                 instance_name[1:] == candidate_name))
-
-    matches = list(filter(name_matches, parent_module.insts))
+    matches = [parent_module.get_inst_index(instance_name)]
+    if instance_name and instance_name.startswith("x"):
+        matches.append(parent_module.get_inst_index(instance_name[1:]))
+    matches = [x for x in matches if x is not None]
     if not matches:
         raise ValueError("Invalid instance name {} in module {}".format(instance_name, parent_module.name))
 
-    return matches[0]
+    return parent_module.insts[min(matches)]
 
 
 def get_net_hierarchy(net: str, parent_module: design):
@@ -486,17 +482,11 @@ def get_net_hierarchy(net: str, parent_module: design):
 
 
 def get_all_net_connections(net: str, module: design):
-    net = net.lower()
-    # first check if there is an instance whose output is the pin, otherwise, settle for inout
-    for i in range(len(module.conns)):
-        conn = [x.lower() for x in module.conns[i]]
-        if net not in conn:
-            continue
-        child_module = module.insts[i].mod  # type: design
-        pin_index = conn.index(net)
+    for inst_index, pin_index in module.get_net_connections(net):
+        child_module = module.insts[inst_index].mod  # type: design
         child_pin = child_module.pins[pin_index]
-        pin_dir = child_module.get_pin_dir(child_pin)
-        yield child_pin, child_module, i, pin_dir
+        pin_dir = module.get_inst_pin_dir(inst_index, pin_index)
+        yield child_pin, child_module, inst_index, pin_dir
 
 
 def get_net_driver(net: str, module: design):
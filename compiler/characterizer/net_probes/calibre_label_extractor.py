@@ -34,7 +34,7 @@ class CalibreLabelExtractor:
         cls.parent_mod = parent_mod
 
         with open(pex_file, "r") as f:
-            parser = SpiceParser(f, lower_case=False)
+            parser = SpiceParser(f, lower_case=False, keep_lines=False)
 
             for line in parser.mods[0].contents:
                 device = load_device(line)
@@ -1,37 +1,44 @@
 from math import log
 
 import debug
+from base.spice_parser import SpiceParser, get_line_nets
+
+# nets that don't need the load of the removed cells
+SUPPLY_NETS = {"vdd", "gnd", "vss", "0"}
 
 
 class trim_spice():
     """
-    A utility to trim redundant parts of an SRAM spice netlist. 
+    A utility to trim redundant parts of an SRAM spice netlist.
     Input is an SRAM spice file. Output is an equivalent netlist
     that works for a single address and range of data bits.
+    Removed cells are replaced by their capacitance on the nets that are still connected.
     """
 
     def __init__(self, spfile, reduced_spfile):
         self.sp_file = spfile
-        self.reduced_spfile = reduced_spfile        
+        self.reduced_spfile = reduced_spfile
 
         debug.info(1,"Trimming non-critical cells to speed-up characterization: {}.".format(reduced_spfile))
-        
+
         # Load the file into a buffer for performance
 
         with open(self.sp_file, "r") as sp:
-            self.spice = sp.readlines()
-            for i in range(len(self.spice)):
-                self.spice[i] = self.spice[i].rstrip(" \n")
-        
+            self.spice = [line.rstrip(" \n") for line in sp]
+
+        # connectivity of the modules, lower case
+        self.parser = SpiceParser(self.sp_file, keep_lines=False)
+        self.module_names = {mod.name for mod in self.parser.mods}
+        self.pin_caps = {}
 
-        self.sp_buffer = self.spice
+        self.num_devices = self.num_trimmed_devices = None
 
     def set_configuration(self, banks, rows, columns, word_size):
         """ Set the configuration of SRAM sizes that we are simulating.
-        Need the: number of banks, number of rows in each bank, number of 
+        Need the: number of banks, number of rows in each bank, number of
         columns in each bank, and data word size."""
         self.num_banks = banks
-        self.num_rows = rows        
+        self.num_rows = rows
         self.num_columns = columns
         self.word_size = word_size
 
@@ -46,9 +53,6 @@ class trim_spice():
         """ Reduce the spice netlist but KEEP the given bits at the
         address (and things that will add capacitive load!)"""
 
-        # Always start fresh if we do multiple reductions
-        self.sp_buffer = self.spice
-
         # Split up the address and convert to an int
         wl_address = int(address[self.col_addr_size:],2)
         if self.col_addr_size>1:
@@ -57,75 +61,170 @@ class trim_spice():
             col_address = 0
         # 1. Keep cells in the bitcell array based on WL and BL
         wl_name = "wl[{}]".format(wl_address)
-        bl_name = "bl[{}]".format(self.words_per_row*data_bit + col_address)
+        bl_index = self.words_per_row*data_bit + col_address
+        bl_name = "bl[{}]".format(bl_index)
+        br_name = "br[{}]".format(bl_index)
 
         # Prepend info about the trimming
-        addr_msg = "Keeping {} address".format(address)
-        self.sp_buffer.insert(0, "* "+addr_msg)
-        debug.info(1,addr_msg)
-        data_msg = "Keeping {} data bit".format(data_bit)
-        self.sp_buffer.insert(0, "* "+data_msg)
-        debug.info(1,data_msg)
-        bl_msg = "Keeping {} (trimming other BLs)".format(bl_name)
-        wl_msg = "Keeping {} (trimming other WLs)".format(wl_name)
-        self.sp_buffer.insert(0, "* "+bl_msg)
-        debug.info(1,bl_msg)
-        self.sp_buffer.insert(0, "* "+wl_msg)
-        debug.info(1,wl_msg)
-        self.sp_buffer.insert(0, "* It should NOT be used for LVS!!")
-        self.sp_buffer.insert(0, "* WARNING: This is a TRIMMED NETLIST.")
-        
-        self.remove_insts("bitcell_array",[wl_name,bl_name])
-
-        # 2. Keep sense amps basd on BL
-        # FIXME: The bit lines are not indexed the same in sense_amp_array
-        #self.remove_insts("sense_amp_array",[bl_name])
-
-        # 3. Keep column muxes basd on BL
-        self.remove_insts("column_mux_array",[bl_name])
-        
-        # 4. Keep write driver based on DATA
+        header = ["* WARNING: This is a TRIMMED NETLIST.",
+                  "* It should NOT be used for LVS!!"]
+        messages = ["Keeping {} (trimming other WLs)".format(wl_name),
+                    "Keeping {} (trimming other BLs)".format(bl_name),
+                    "Keeping {} data bit".format(data_bit),
+                    "Keeping {} address".format(address)]
+        for message in messages:
+            header.append("* " + message)
+            debug.info(1, message)
+
         data_name = "data[{}]".format(data_bit)
-        self.remove_insts("write_driver_array",[data_name])
-
-        # 5. Keep wordline driver based on WL
-        # Need to keep the gater too
-        #self.remove_insts("wordline_driver",wl_name)
-        
-        # 6. Keep precharges based on BL
-        self.remove_insts("precharge_array",[bl_name])
-        
+        keep_nets = {
+            "bitcell_array": [wl_name, bl_name, br_name],
+            # 2. Keep sense amps basd on BL
+            # FIXME: The bit lines are not indexed the same in sense_amp_array
+            # "sense_amp_array": [bl_name],
+            # 3. Keep column muxes basd on BL
+            "column_mux_array": [bl_name, br_name],
+            "columnmux_array": [bl_name, br_name],
+            # 4. Keep write driver based on DATA
+            "write_driver_array": [data_name],
+            # 5. Keep wordline driver based on WL
+            # Need to keep the gater too
+            # "wordline_driver": [wl_name],
+            # 6. Keep precharges based on BL
+            "precharge_array": [bl_name, br_name]
+        }
         # Everything else isn't worth removing. :)
-        
+        self.trim_modules(keep_nets, header)
+
+    def trim_modules(self, keep_nets, header=None):
+        """
+        Remove the instances in the modules whose names start with a key in keep_nets
+        that aren't connected to any of the key's nets and write the reduced netlist
+        :param keep_nets: module name prefix -> names of the nets whose instances are kept
+        :param header: comment lines to add to the top of the reduced netlist
+        """
+        trimmed = {}
+        for mod in self.parser.mods:
+            for prefix, nets in keep_nets.items():
+                if mod.name.startswith(prefix.lower()):
+                    kept_lines = self.get_kept_lines(mod, nets)
+                    pruned = {mod.tokens[i][0] for i in range(len(mod.tokens)) if i not in kept_lines}
+                    trimmed[mod.name] = (pruned, self.get_lumped_caps(mod, kept_lines))
+                    break
+
+        self.num_devices = self.count_devices({})
+        self.num_trimmed_devices = self.count_devices(trimmed)
+        device_msg = "Trimmed netlist has {} of {} devices ({:.3g}x fewer)".format(
+            self.num_trimmed_devices, self.num_devices,
+            self.num_devices / max(1, self.num_trimmed_devices))
+        debug.info(1, device_msg)
+
         # Finally, write out the buffer as the new reduced file
+        header = (header or []) + ["* " + device_msg]
         with open(self.reduced_spfile, "w") as sp:
-            sp.write("\n".join(self.sp_buffer))
-
-        
-    def remove_insts(self, subckt_name, keep_inst_list):
-        """This will remove all of the instances in the list from the named
-        subckt that DO NOT contain a term in the list.  It just does a
-        match of the line with a term so you can search for a single
-        net connection, the instance name, anything..
-        """
-        start_name = ".SUBCKT {}".format(subckt_name)
-        end_name = ".ENDS {}".format(subckt_name)
-
-        in_subckt=False
-        new_buffer=[]
-        for line in self.sp_buffer:
-            if start_name in line:
-                new_buffer.append(line)
-                in_subckt=True
-            elif end_name in line:
-                new_buffer.append(line)
-                in_subckt=False
-            elif in_subckt:
-                for k in keep_inst_list:
-                    if k in line:
-                        new_buffer.append(line)
-                        break
-            else:
-                new_buffer.append(line)
-
-        self.sp_buffer = new_buffer
+            sp.write("\n".join(header + list(self.get_trimmed_lines(trimmed))))
+
+    def get_kept_lines(self, mod, keep_nets):
+        """Indices of the lines in mod to keep: instances connected to keep_nets or of
+        unknown modules and non-instance lines"""
+        kept_lines = set()
+        for net in keep_nets:
+            net = net.lower()
+            for line_index in mod.net_index.get(net, []):
+                # exclude the instance and module names
+                if net in mod.tokens[line_index][1:-1]:
+                    kept_lines.add(line_index)
+        for line_index, tokens in enumerate(mod.tokens):
+            if not tokens[0].startswith("x") or self.get_child_name(tokens) not in self.module_names:
+                kept_lines.add(line_index)
+        return kept_lines
+
+    @staticmethod
+    def get_child_name(tokens):
+        return list(get_line_nets(tokens))[-1]
+
+    def get_lumped_caps(self, mod, kept_lines):
+        """net -> total capacitance of the removed instances' pins on the nets that remain connected"""
+        connected_nets = set(mod.pins)
+        for line_index in kept_lines:
+            connected_nets.update(list(get_line_nets(mod.tokens[line_index]))[1:])
+        connected_nets.difference_update(SUPPLY_NETS)
+
+        caps = {}
+        for line_index, tokens in enumerate(mod.tokens):
+            if line_index in kept_lines:
+                continue
+            nets = list(get_line_nets(tokens))
+            child_name = nets[-1]
+            child_pins = self.parser.get_pins(child_name)
+            for net, pin in zip(nets[1:-1], child_pins):
+                if net in connected_nets:
+                    caps[net] = caps.get(net, 0) + self.get_pin_cap(child_name, pin)
+        return caps
+
+    def get_pin_cap(self, module_name, pin_name):
+        """Gate and drain capacitance in F of the transistors connected to pin_name"""
+        from pgates.ptx import ptx
+        from tech import spice as tech_spice
+
+        key = (module_name, pin_name)
+        if key not in self.pin_caps:
+            total_cap = 0
+            for hierarchy in self.parser.deduce_hierarchy_for_pin(pin_name, module_name):
+                terminal, spice_statement = hierarchy[-1]
+                if terminal not in ["d", "g", "s"] or not SpiceParser.line_contains_tx(spice_statement):
+                    continue
+                tx_type, m, nf, width = SpiceParser.extract_all_tx_properties(spice_statement)
+                if tech_spice["scale_tx_parameters"]:
+                    width *= 1e6
+                total_cap += ptx.get_tx_cap(tx_type, terminal, width, nf, m)
+            self.pin_caps[key] = total_cap
+        return self.pin_caps[key]
+
+    def count_devices(self, trimmed):
+        """Number of devices in the flattened netlist after removing the trimmed instances"""
+        counts = {}
+
+        def count_module(mod):
+            if mod.name not in counts:
+                pruned, caps = trimmed.get(mod.name, (set(), {}))
+                count = len(caps)
+                for tokens in mod.tokens:
+                    if tokens[0] in pruned:
+                        continue
+                    child_name = self.get_child_name(tokens)
+                    if tokens[0].startswith("x") and child_name in self.module_names:
+                        count += count_module(self.parser.get_module(child_name))
+                    else:
+                        count += 1
+                counts[mod.name] = count
+            return counts[mod.name]
+
+        children = {self.get_child_name(tokens) for mod in self.parser.mods
+                    for tokens in mod.tokens if tokens[0].startswith("x")}
+        return sum(count_module(mod) for mod in self.parser.mods if mod.name not in children)
+
+    def get_trimmed_lines(self, trimmed):
+        """Lines of the original netlist without the trimmed instances, with the lumped caps"""
+        current_mod = None
+        keep_line = True
+        net_names = {}
+        for line in self.spice:
+            tokens = line.split()
+            first_token = tokens[0].lower() if tokens else ""
+            if first_token == ".subckt":
+                current_mod = trimmed.get(tokens[1].lower())
+                net_names = {}
+                keep_line = True
+            elif first_token.startswith(".ends") and current_mod:
+                for i, (net, cap) in enumerate(current_mod[1].items()):
+                    yield "Ctrim_{0} {1} 0 {2:.5g}f".format(i, net_names.get(net, net), cap * 1e15)
+                current_mod = None
+                keep_line = True
+            elif current_mod and first_token and not first_token.startswith("+"):
+                keep_line = first_token.startswith("*") or first_token not in current_mod[0]
+            if current_mod:
+                # original case of the net names
+                net_names.update((x.lower(), x) for x in tokens)
+            if keep_line:
+                yield line
@@ -5,9 +5,13 @@ GDS Mill is a Python package for the creation and manipulation of binary GDS2 la
 """
 
 from .gds2reader import *
+from .gds2mmapReader import *
 from .gds2writer import *
+from .gds2bufferedWriter import *
+from .gds2streamTransformer import *
 #from .pdfLayout import *
 from .vlsiLayout import *
 from .gdsStreamer import *
 from .gdsPrimitives import *
+from .spatialIndex import *
 
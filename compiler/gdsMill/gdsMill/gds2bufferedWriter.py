@@ -0,0 +1,257 @@
+import struct
+from functools import lru_cache
+from itertools import chain
+
+import numpy as np
+
+from .gds2writer import Gds2writer
+from .gdsRecords import *
+
+recordHeader = struct.Struct(">HH")
+int16Record = struct.Struct(">HHh")
+uint16Record = struct.Struct(">HHH")
+int32Record = struct.Struct(">HHi")
+pointRecord = struct.Struct(">HHii")
+colRowRecord = struct.Struct(">HHhh")
+arefPointsRecord = struct.Struct(">HH6i")
+dateRecord = struct.Struct(">HH12h")
+
+# records without a payload
+BOUNDARY_RECORD = recordHeader.pack(4, BOUNDARY)
+PATH_RECORD = recordHeader.pack(4, PATH)
+SREF_RECORD = recordHeader.pack(4, SREF)
+AREF_RECORD = recordHeader.pack(4, AREF)
+TEXT_RECORD = recordHeader.pack(4, TEXT)
+ENDEL_RECORD = recordHeader.pack(4, ENDEL)
+ENDSTR_RECORD = recordHeader.pack(4, ENDSTR)
+ENDLIB_RECORD = recordHeader.pack(4, ENDLIB)
+
+
+@lru_cache(maxsize=None)
+def ibmBytesFromIeeeDouble(value):
+    """Memoized IBM encoding, the same few angles and magnifications are used everywhere"""
+    return Gds2writer.ibmDataFromIeeeDouble(None, value)
+
+
+@lru_cache(maxsize=None)
+def encodeName(name):
+    """Name as bytes padded to an even length"""
+    if len(name) % 2 != 0:
+        name = name + "\0"
+    return name.encode()
+
+
+def realRecord(recordType, value):
+    return recordHeader.pack(12, recordType) + ibmBytesFromIeeeDouble(value)
+
+
+def stringRecord(recordType, payload):
+    return recordHeader.pack(len(payload) + 4, recordType) + payload
+
+
+def transFlagsRecord(transFlags, magnifyIndex=2):
+    flags = (int(transFlags[0]) << 15) | (int(transFlags[1]) << 1) | (int(transFlags[magnifyIndex]) << 3)
+    return uint16Record.pack(6, STRANS, flags)
+
+
+def packCoordinates(coordinateLists):
+    """
+    Encode the XY records of coordinateLists in one NumPy conversion
+    Returns a list with the complete XY record of each coordinate list
+    """
+    counts = [len(coordinates) for coordinates in coordinateLists]
+    flat = np.fromiter(chain.from_iterable(chain.from_iterable(coordinateLists)),
+                       dtype=np.float64, count=2 * sum(counts))
+    data = memoryview(flat.astype(">i4").tobytes())
+    records = []
+    start = 0
+    for count in counts:
+        end = start + 8 * count
+        records.append(recordHeader.pack(8 * count + 4, XY) + data[start:end])
+        start = end
+    return records
+
+
+class Gds2bufferedWriter(Gds2writer):
+    """
+    Writer that encodes each structure into a bytearray using precompiled struct formats
+    and writes the file in large chunks instead of one write per record.
+    The output is identical to Gds2writer
+    """
+    flushSize = 1 << 22
+
+    def __init__(self, layoutObject):
+        super().__init__(layoutObject)
+        self.buffer = bytearray()
+
+    def writeRecord(self, record):
+        # used by the header and the less common elements which reuse the Gds2writer methods
+        self.buffer += struct.pack(">h", len(record) + 2)
+        self.buffer += record
+
+    def encodeBoundaries(self, out, boundaries):
+        coordinateRecords = iter(packCoordinates([boundary.coordinates for boundary in boundaries
+                                                  if boundary.coordinates != ""]))
+        for boundary in boundaries:
+            out += BOUNDARY_RECORD
+            if boundary.elementFlags != "":
+                out += int16Record.pack(6, ELFLAGS, boundary.elementFlags)
+            if boundary.plex != "":
+                out += int32Record.pack(8, PLEX, boundary.plex)
+            if boundary.drawingLayer != "":
+                out += int16Record.pack(6, LAYER, boundary.drawingLayer)
+            if boundary.purposeLayer:
+                out += int16Record.pack(6, TEXTTYPE, boundary.purposeLayer)
+            if boundary.dataType != "":
+                out += int16Record.pack(6, DATATYPE, boundary.dataType)
+            if boundary.coordinates != "":
+                out += next(coordinateRecords)
+            out += ENDEL_RECORD
+
+    def encodePaths(self, out, paths):
+        coordinateRecords = iter(packCoordinates([path.coordinates for path in paths if path.coordinates]))
+        for path in paths:
+            out += PATH_RECORD
+            if path.elementFlags != "":
+                out += int16Record.pack(6, ELFLAGS, path.elementFlags)
+            if path.plex != "":
+                out += int32Record.pack(8, PLEX, path.plex)
+            if path.drawingLayer:
+                out += int16Record.pack(6, LAYER, path.drawingLayer)
+            if path.purposeLayer:
+                out += int16Record.pack(6, TEXTTYPE, path.purposeLayer)
+            if path.dataType is not None:
+                out += int16Record.pack(6, DATATYPE, path.dataType)
+            if path.pathType:
+                out += int16Record.pack(6, PATHTYPE, path.pathType)
+            if path.pathWidth:
+                out += int32Record.pack(8, WIDTH, path.pathWidth)
+            if path.coordinates:
+                out += next(coordinateRecords)
+            out += ENDEL_RECORD
+
+    def encodeSrefs(self, out, srefs):
+        for sref in srefs:
+            out += SREF_RECORD
+            if sref.elementFlags != "":
+                out += int16Record.pack(6, ELFLAGS, sref.elementFlags)
+            if sref.plex != "":
+                out += int32Record.pack(8, PLEX, sref.plex)
+            if sref.sName != "":
+                out += stringRecord(SNAME, encodeName(sref.sName))
+            if sref.transFlags != "":
+                out += transFlagsRecord(sref.transFlags)
+            if sref.magFactor != "":
+                out += realRecord(MAG, sref.magFactor)
+            if sref.rotateAngle != "":
+                out += realRecord(ANGLE, sref.rotateAngle)
+            if sref.coordinates != "":
+                out += pointRecord.pack(12, XY, int(sref.coordinates[0]), int(sref.coordinates[1]))
+            out += ENDEL_RECORD
+
+    def encodeArefs(self, out, arefs):
+        for aref in arefs:
+            out += AREF_RECORD
+            if aref.elementFlags != "":
+                out += int16Record.pack(6, ELFLAGS, aref.elementFlags)
+            if aref.plex != "":
+                out += int32Record.pack(8, PLEX, aref.plex)
+            if aref.aName != "":
+                name = aref.aName.decode() if isinstance(aref.aName, bytes) else aref.aName
+                out += stringRecord(SNAME, encodeName(name))
+            if aref.transFlags != "":
+                out += transFlagsRecord(aref.transFlags)
+            if aref.magFactor != "":
+                out += realRecord(MAG, aref.magFactor)
+            if aref.rotateAngle != "":
+                out += realRecord(ANGLE, aref.rotateAngle)
+            if aref.colRow != "":
+                out += colRowRecord.pack(8, COLROW, aref.colRow[0], aref.colRow[1])
+            if aref.coordinates != "":
+                out += arefPointsRecord.pack(28, XY, *(int(value) for coordinate in aref.coordinates[:3]
+                                                       for value in coordinate))
+            out += ENDEL_RECORD
+
+    def encodeTexts(self, out, texts):
+        for text in texts:
+            if text.presentationFlags != "":
+                # uncommon, let Gds2writer handle it
+                self.buffer = out
+                self.writeText(text)
+                continue
+            out += TEXT_RECORD
+            if text.elementFlags != "":
+                out += int16Record.pack(6, ELFLAGS, text.elementFlags)
+            if text.plex != "":
+                out += int32Record.pack(8, PLEX, text.plex)
+            if text.drawingLayer != "":
+                out += int16Record.pack(6, LAYER, text.drawingLayer)
+                out += int16Record.pack(6, TEXTTYPE, text.purposeLayer)
+            if text.transFlags != "":
+                # Gds2writer uses the mirror flag for magnification in texts
+                out += transFlagsRecord(text.transFlags, magnifyIndex=0)
+            if text.magFactor != "":
+                out += realRecord(MAG, text.magFactor)
+            if text.rotateAngle != "":
+                out += realRecord(ANGLE, text.rotateAngle)
+            if text.pathType != "":
+                out += int16Record.pack(6, PATHTYPE, text.pathType)
+            if text.pathWidth != "":
+                out += int32Record.pack(8, WIDTH, text.pathWidth)
+            if text.coordinates != "":
+                points = [value for coordinate in text.coordinates
+                          for value in (int(coordinate[0]), int(coordinate[1]))]
+                out += recordHeader.pack(4 * len(points) + 4, XY)
+                out += struct.pack(">{}i".format(len(points)), *points)
+            if text.textString:
+                out += stringRecord(STRING, text.textString.encode())
+            out += ENDEL_RECORD
+
+    def encodeStructure(self, structureName):
+        """Return the complete GDS records of structureName as a bytearray"""
+        thisStructure = self.layoutObject.structures[structureName]
+        out = bytearray()
+        out += dateRecord.pack(28, BGNSTR, *thisStructure.createDate[:6], *thisStructure.modDate[:6])
+        out += stringRecord(STRNAME, encodeName(structureName))
+        self.encodeBoundaries(out, thisStructure.boundaries)
+        self.encodePaths(out, thisStructure.paths)
+        self.encodeSrefs(out, thisStructure.srefs)
+        self.encodeArefs(out, thisStructure.arefs)
+        self.encodeTexts(out, thisStructure.texts)
+        # nodes and boxes are rare so reuse the Gds2writer methods
+        self.buffer = out
+        for node in thisStructure.nodes:
+            self.writeNode(node)
+        for box in thisStructure.boxes:
+            self.writeBox(box)
+        out += ENDSTR_RECORD
+        return out
+
+    def writeNextStructure(self, structureName):
+        fileBuffer = self.buffer
+        fileBuffer += self.encodeStructure(structureName)
+        self.buffer = fileBuffer
+        if len(fileBuffer) > self.flushSize:
+            self.flush()
+
+    def flush(self):
+        self.fileHandle.write(self.buffer)
+        self.buffer = bytearray()
+
+    def writeToFile(self, fileName):
+        self.buffer = bytearray()
+        with open(fileName, "wb") as self.fileHandle:
+            self.writeGds2()
+            self.flush()
+        self.fileHandle = 0
+
+    def writeEncodedToFile(self, fileName, encodedStructures):
+        """Write the layout header followed by structures that were already encoded by encodeStructure"""
+        self.buffer = bytearray()
+        with open(fileName, "wb") as self.fileHandle:
+            self.writeHeader()
+            self.flush()
+            for encoded in encodedStructures:
+                self.fileHandle.write(encoded)
+            self.fileHandle.write(ENDLIB_RECORD)
+        self.fileHandle = 0
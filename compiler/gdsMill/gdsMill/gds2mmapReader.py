@@ -0,0 +1,445 @@
+import mmap
+import struct
+from functools import lru_cache
+
+import numpy as np
+
+from .gds2reader import Gds2reader
+from .gdsPrimitives import *
+from .gdsRecords import *
+
+
+def indexRecords(buffer):
+    """
+    Scan the record headers of a GDS buffer in one pass.
+    Returns numpy arrays (offsets, lengths, recordTypes) with one entry per record.
+    Offsets point to the start of the record header, lengths include the 4 byte header.
+    """
+    data = memoryview(buffer)
+    offsets = []
+    addOffset = offsets.append
+    position = 0
+    size = len(data)
+    try:
+        while position + 4 <= size:
+            length = (data[position] << 8) | data[position + 1]
+            if length < 4:  # zero padding after ENDLIB
+                break
+            addOffset(position)
+            position += length
+    finally:
+        data.release()
+    offsets = np.asarray(offsets, dtype=np.int64)
+    byteArray = np.frombuffer(buffer, dtype=np.uint8)
+    lengths = (byteArray[offsets].astype(np.int64) << 8) | byteArray[offsets + 1]
+    recordTypes = (byteArray[offsets + 2].astype(np.int64) << 8) | byteArray[offsets + 3]
+    del byteArray
+    # a truncated last record is dropped
+    valid = offsets + lengths <= size
+    return offsets[valid], lengths[valid], recordTypes[valid]
+
+
+def decodeInt16(byteArray, offsets):
+    """Decode the first signed 16 bit value of the payload of each record in offsets"""
+    values = (byteArray[offsets + 4].astype(np.uint16) << 8) | byteArray[offsets + 5]
+    return values.astype(np.int16)
+
+
+def decodeInt32(byteArray, offsets):
+    """Decode the first signed 32 bit value of the payload of each record in offsets"""
+    values = byteArray[offsets + 4].astype(np.uint32) << 24
+    values |= byteArray[offsets + 5].astype(np.uint32) << 16
+    values |= byteArray[offsets + 6].astype(np.uint32) << 8
+    values |= byteArray[offsets + 7]
+    return values.astype(np.int32)
+
+
+def decodeXY(byteArray, offsets, lengths):
+    """
+    Gather the payloads of all XY records into one contiguous big-endian int32 array
+    Returns the decoded values and the start index of each record within them
+    """
+    payloadLengths = lengths - 4
+    totalLength = int(payloadLengths.sum())
+    if totalLength == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(len(offsets), dtype=np.int64)
+    payloadEnds = np.cumsum(payloadLengths)
+    payloadStarts = payloadEnds - payloadLengths
+    # byte index into the file for every byte of every payload
+    byteIndex = np.repeat(offsets + 4 - payloadStarts, payloadLengths) + np.arange(totalLength)
+    values = byteArray[byteIndex].view(">i4").astype(np.int64)
+    return values, payloadStarts // 4
+
+
+@lru_cache(maxsize=None)
+def ieeeDoubleFromIbmBytes(ibmData):
+    return Gds2reader.ieeeDoubleFromIbmData(None, ibmData)
+
+
+# attributes populated for each element type, keyed by the record that holds them
+elementClasses = {
+    BOUNDARY: (GdsBoundary, "boundaries", [(ELFLAGS, "elementFlags"), (PLEX, "plex"),
+                                           (LAYER, "drawingLayer"), (TEXTTYPE, "purposeLayer"),
+                                           (DATATYPE, "dataType"), (XY, "coordinates")]),
+    PATH: (GdsPath, "paths", [(ELFLAGS, "elementFlags"), (PLEX, "plex"), (LAYER, "drawingLayer"),
+                              (TEXTTYPE, "purposeLayer"), (PATHTYPE, "pathType"),
+                              (DATATYPE, "dataType"), (WIDTH, "pathWidth"), (XY, "coordinates")]),
+    SREF: (GdsSref, "srefs", [(ELFLAGS, "elementFlags"), (PLEX, "plex"), (SNAME, "sName"),
+                              (STRANS, "transFlags"), (MAG, "magFactor"), (ANGLE, "rotateAngle"),
+                              (XY, "coordinates")]),
+    AREF: (GdsAref, "arefs", [(ELFLAGS, "elementFlags"), (PLEX, "plex"), (SNAME, "aName"),
+                              (STRANS, "transFlags"), (MAG, "magFactor"), (ANGLE, "rotateAngle"),
+                              (COLROW, "colRow"), (XY, "coordinates")]),
+    TEXT: (GdsText, "texts", [(ELFLAGS, "elementFlags"), (PLEX, "plex"), (LAYER, "drawingLayer"),
+                              (TEXTTYPE, "purposeLayer"), (STRANS, "transFlags"), (MAG, "magFactor"),
+                              (ANGLE, "rotateAngle"), (PATHTYPE, "pathType"), (WIDTH, "pathWidth"),
+                              (XY, "coordinates"), (STRING, "textString")]),
+    NODE: (GdsNode, "nodes", [(ELFLAGS, "elementFlags"), (PLEX, "plex"), (LAYER, "drawingLayer"),
+                              (NODETYPE, "nodeType"), (XY, "coordinates")]),
+    BOX: (GdsBox, "boxes", [(ELFLAGS, "elementFlags"), (PLEX, "plex"), (LAYER, "drawingLayer"),
+                            (TEXTTYPE, "purposeLayer"), (BOXTYPE, "boxValue"), (XY, "coordinates")]),
+}
+
+
+class LazyGdsStructure(GdsStructure):
+    """
+    GdsStructure whose element lists (boundaries, srefs, texts, ...) are decoded from the file
+    the first time they are accessed. Each list is decoded separately so e.g. traversing the
+    hierarchy only decodes srefs
+    """
+    elementLists = {elementClasses[elementType][1]: elementType for elementType in elementClasses}
+
+    def __init__(self, reader, firstRecord, lastRecord):
+        # element lists are deliberately not created here, see __getattr__
+        self.name = ""
+        self.createDate = ()
+        self.modDate = ()
+        self.reader = reader
+        self.firstRecord = firstRecord
+        self.lastRecord = lastRecord
+
+    def __getattr__(self, name):
+        # only called when the attribute doesn't exist i.e. the element list hasn't been loaded
+        if name in LazyGdsStructure.elementLists and self.__dict__.get("reader") is not None:
+            self.load([name])
+            return self.__dict__[name]
+        raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+
+    def __getstate__(self):
+        # the file can't be pickled so decode everything first
+        self.load()
+        return self.__dict__
+
+    def isLoaded(self):
+        return self.reader is None
+
+    def load(self, listNames=None):
+        """Decode the element lists in listNames (all unloaded lists if None)"""
+        if self.reader is None:
+            return
+        if listNames is None:
+            listNames = LazyGdsStructure.elementLists
+        # lists assigned before loading take precedence
+        listNames = [listName for listName in listNames if listName not in self.__dict__]
+        if listNames:
+            loaded = GdsStructure()
+            self.reader.readStructureBodies([loaded], [self.firstRecord], [self.lastRecord],
+                                            [LazyGdsStructure.elementLists[name] for name in listNames])
+            for listName in listNames:
+                self.__dict__[listName] = getattr(loaded, listName)
+        if all(listName in self.__dict__ for listName in LazyGdsStructure.elementLists):
+            reader = self.reader
+            self.reader = None
+            reader.structureLoaded()
+
+
+class Gds2mmapReader(Gds2reader):
+    """
+    Reader that memory-maps a GDSII file, indexes all records in one pass and bulk-decodes
+    the payloads with NumPy before populating the layout class.
+    Elements are assembled column-wise: every attribute of every element is decoded up front
+    and objects are filled in one pass.
+    Populates the same VlsiLayout model as Gds2reader.
+    In lazy mode only the structure names and record ranges are read and each structure
+    is decoded the first time its elements are accessed.
+    """
+
+    def __init__(self, layoutObject, debugToTerminal=0):
+        super().__init__(layoutObject, debugToTerminal=debugToTerminal)
+        self.buffer = None
+        self.offsets = self.lengths = self.recordTypes = None
+        # decoded payloads of the block of records currently being read
+        self.blockStart = 0
+        self.values = None
+        self.xyValues = None
+        self.xyStarts = None
+        self.strings = {}
+        self.pendingStructures = 0
+
+    def payload(self, index):
+        offset = self.offsets[index]
+        return self.buffer[offset + 4:offset + self.lengths[index]]
+
+    def stringPayload(self, index):
+        # structure and reference names repeat a lot so decode each only once
+        payload = self.payload(index)
+        string = self.strings.get(payload)
+        if string is None:
+            string = self.strings[payload] = self.stripNonASCII(payload)
+        return string
+
+    def realPayload(self, index):
+        offset = self.offsets[index]
+        return ieeeDoubleFromIbmBytes(self.buffer[offset + 4:offset + 12])
+
+    def int16Payload(self, index):
+        offset = self.offsets[index]
+        return struct.unpack(">h", self.buffer[offset + 4:offset + 6])[0]
+
+    def decodeBlock(self, first, last):
+        """Decode the integer and XY payloads of records first to last (inclusive)"""
+        offsets = self.offsets[first:last + 1]
+        lengths = self.lengths[first:last + 1]
+        recordTypes = self.recordTypes[first:last + 1]
+        byteArray = np.frombuffer(self.buffer, dtype=np.uint8)
+        try:
+            dataTypes = recordTypes & 0xff
+            # first int16/int32 value of each record
+            values = np.zeros(len(offsets), dtype=np.int64)
+            for dataType, decode, minLength in [(DATA_INT16, decodeInt16, 6),
+                                                (DATA_BITARRAY, decodeInt16, 6),
+                                                (DATA_INT32, decodeInt32, 8)]:
+                mask = (dataTypes == dataType) & (lengths >= minLength)
+                values[mask] = decode(byteArray, offsets[mask])
+
+            xyMask = recordTypes == XY
+            xyValues, xyStarts = decodeXY(byteArray, offsets[xyMask], lengths[xyMask])
+        finally:
+            # release the export on the mmap so it can be closed
+            del byteArray
+        self.blockStart = first
+        self.values = values
+        # layouts reuse few distinct coordinate values so share one int object per value
+        uniqueValues, valueIndices = np.unique(xyValues, return_inverse=True)
+        uniqueValues = uniqueValues.tolist()
+        self.xyValues = [uniqueValues[index] for index in valueIndices.tolist()]
+        self.xyStarts = np.zeros(len(offsets), dtype=np.int64)
+        self.xyStarts[xyMask] = xyStarts
+
+    def readIndexedHeader(self):
+        """Read the library header. Returns the index of the record after UNITS"""
+        self.layoutObject.info.clear()
+        if len(self.recordTypes) == 0 or self.recordTypes[0] != HEADER or self.lengths[0] != 6:
+            print("Invalid GDSII Header")
+            return -1
+        info = self.layoutObject.info
+        info["gdsVersion"] = self.int16Payload(0)
+        for index in range(1, len(self.recordTypes)):
+            recordType = self.recordTypes[index]
+            if recordType == BGNLIB and self.lengths[index] == 28:
+                info["dates"] = struct.unpack(">12h", self.payload(index))
+            elif recordType == LIBNAME:
+                info["libraryName"] = self.stringPayload(index)
+            elif recordType == REFLIBS:
+                payload = self.payload(index)
+                info["referenceLibraries"] = (payload[0:44], payload[45:89])
+            elif recordType == FONTS:
+                payload = self.payload(index)
+                info["fonts"] = (payload[0:43], payload[44:87], payload[88:131], payload[132:175])
+            elif recordType == ATTRTABLE:
+                info["attributeTable"] = self.payload(index)[0:43]
+            elif recordType == GENERATIONS:
+                info["generations"] = self.int16Payload(index)
+            elif recordType == FORMAT:
+                info["fileFormat"] = self.int16Payload(index)
+            elif recordType == MASK:
+                info["mask"] = self.payload(index)
+            elif recordType == UNITS:
+                offset = self.offsets[index]
+                userUnits = ieeeDoubleFromIbmBytes(self.buffer[offset + 4:offset + 12])
+                dbUnits = ieeeDoubleFromIbmBytes(self.buffer[offset + 12:offset + 20])
+                info["units"] = (userUnits, dbUnits)
+                return index + 1
+        print("There was an error parsing the GDS header.  Aborting...")
+        return -1
+
+    def readLayerNumbers(self):
+        """Add all layers to layerNumbersInUse in the order they first appear"""
+        layerRecords = np.flatnonzero(self.recordTypes == LAYER)
+        if len(layerRecords) == 0:
+            return
+        byteArray = np.frombuffer(self.buffer, dtype=np.uint8)
+        layers = decodeInt16(byteArray, self.offsets[layerRecords])
+        del byteArray
+        layers, firstIndices = np.unique(layers, return_index=True)
+        layerNumbersInUse = self.layoutObject.layerNumbersInUse
+        for layer in layers[np.argsort(firstIndices)].tolist():
+            if layer not in layerNumbersInUse:
+                layerNumbersInUse.append(layer)
+
+    def decodeColumn(self, recordType, elementType, recordIndices):
+        """
+        Decode the records in recordIndices (record type recordType) for elements of elementType
+        recordIndices are relative to the current block
+        """
+        if recordType == XY:
+            xyValues = self.xyValues
+            starts = self.xyStarts[recordIndices]
+            ends = starts + (self.lengths[recordIndices + self.blockStart] - 4) // 4
+            starts = starts.tolist()
+            if elementType == SREF:
+                return [(xyValues[start], xyValues[start + 1]) for start in starts]
+            elif elementType == TEXT:
+                return [[(xyValues[start], xyValues[start + 1])] for start in starts]
+            return [list(zip(xyValues[start:end:2], xyValues[start + 1:end:2]))
+                    for start, end in zip(starts, ends.tolist())]
+        elif recordType == STRANS:
+            return [(bool(flags & 0x8000), bool(flags & 0x0002), bool(flags & 0x0004))
+                    for flags in (self.values[recordIndices] & 0xffff).tolist()]
+
+        fileIndices = (recordIndices + self.blockStart).tolist()
+        if recordType in (MAG, ANGLE):
+            return [self.realPayload(index) for index in fileIndices]
+        elif recordType == STRING:
+            return [self.stringPayload(index) for index in fileIndices]
+        elif recordType == COLROW:
+            return [struct.unpack(">hh", self.payload(index)[:4]) for index in fileIndices]
+        elif recordType == SNAME:
+            return [self.stringPayload(index).rstrip() for index in fileIndices]
+        return self.values[recordIndices].tolist()
+
+    def readIndexedElements(self, structures, structureStarts, structureEnds, loadTypes=None):
+        """
+        Populate the elements of structures. Structure ranges are relative to the current block
+        Only elements in loadTypes are populated if given
+        """
+        recordTypes = self.recordTypes[self.blockStart:self.blockStart + len(self.values)]
+        numRecords = len(recordTypes)
+        elementRecords = np.flatnonzero(np.isin(recordTypes, ELEMENT_TYPES))
+        # discard elements outside of structures
+        owners = np.searchsorted(structureStarts, elementRecords, side="right") - 1
+        valid = owners >= 0
+        valid[valid] = elementRecords[valid] < structureEnds[owners[valid]]
+        elementRecords = elementRecords[valid]
+        owners = owners[valid]
+        if len(elementRecords) == 0:
+            return
+        endelRecords = np.flatnonzero(recordTypes == ENDEL)
+        elementEnds = endelRecords[np.searchsorted(endelRecords, elementRecords)]
+        elementTypes = recordTypes[elementRecords]
+
+        # element each record belongs to, -1 if not inside an element
+        recordNumbers = np.arange(numRecords)
+        recordOwners = np.full(numRecords, -1, dtype=np.int64)
+        elementNumbers = np.searchsorted(elementRecords, recordNumbers, side="right") - 1
+        inside = elementNumbers >= 0
+        inside[inside] = recordNumbers[inside] < elementEnds[elementNumbers[inside]]
+        recordOwners[inside] = elementNumbers[inside]
+
+        for elementType, (elementClass, listName, fields) in elementClasses.items():
+            if loadTypes is not None and elementType not in loadTypes:
+                continue
+            elementNumbers = np.flatnonzero(elementTypes == elementType)
+            if len(elementNumbers) == 0:
+                continue
+            template = elementClass()
+            attributes = []
+            columns = []
+            for recordType, attribute in fields:
+                records = np.flatnonzero((recordTypes == recordType) & inside)
+                records = records[elementTypes[recordOwners[records]] == elementType]
+                if len(records) == 0:
+                    continue
+                # record index per element, the last record wins if repeated
+                column = np.full(len(elementTypes), -1, dtype=np.int64)
+                column[recordOwners[records]] = records
+                column = column[elementNumbers]
+                present = column >= 0
+                decoded = self.decodeColumn(recordType, elementType, column[present])
+                if present.all():
+                    columns.append(decoded)
+                else:
+                    default = getattr(template, attribute)
+                    filled = [default] * len(column)
+                    for position, value in zip(np.flatnonzero(present).tolist(), decoded):
+                        filled[position] = value
+                    columns.append(filled)
+                attributes.append(attribute)
+
+            elements = [elementClass() for _ in range(len(elementNumbers))]
+            for attribute, column in zip(attributes, columns):
+                # elements are slotted so assign each column through the slot descriptor
+                list(map(getattr(elementClass, attribute).__set__, elements, column))
+            structureLists = [getattr(structure, listName) for structure in structures]
+            for owner, element in zip(owners[elementNumbers].tolist(), elements):
+                structureLists[owner].append(element)
+
+    def readStructureBodies(self, structures, structureStarts, structureEnds, loadTypes=None):
+        """Decode the elements of structures, structure ranges are file record indices"""
+        if len(structures) == 0:
+            return
+        first = structureStarts[0]
+        self.decodeBlock(first, structureEnds[-1])
+        self.readIndexedElements(structures, np.asarray(structureStarts) - first,
+                                 np.asarray(structureEnds) - first, loadTypes)
+        self.values = self.xyValues = self.xyStarts = None
+
+    def structureLoaded(self):
+        """Called by lazy structures. The file is released once all structures are loaded"""
+        self.pendingStructures -= 1
+        if self.pendingStructures == 0:
+            self.buffer.close()
+            self.buffer = None
+            self.strings = {}
+
+    def readIndexedGds2(self, lazy=False):
+        headerEnd = self.readIndexedHeader()
+        if headerEnd < 0:
+            return
+        recordTypes = self.recordTypes
+        structureStarts = np.flatnonzero((recordTypes == BGNSTR) & (self.lengths == 28))
+        structureStarts = structureStarts[structureStarts >= headerEnd]
+        endstrRecords = np.flatnonzero(recordTypes == ENDSTR)
+        endIndices = np.searchsorted(endstrRecords, structureStarts)
+        if len(structureStarts) > 0 and endIndices[-1] >= len(endstrRecords):
+            print("There was an error reading the structure list.")
+            return
+        structureEnds = endstrRecords[endIndices]
+        nameRecords = np.flatnonzero(recordTypes == STRNAME)
+
+        self.readLayerNumbers()
+        structures = []
+        for start, end in zip(structureStarts.tolist(), structureEnds.tolist()):
+            if lazy:
+                thisStructure = LazyGdsStructure(self, start, end)
+            else:
+                thisStructure = GdsStructure()
+            dates = struct.unpack(">12h", self.payload(start))
+            thisStructure.createDate = dates[:6]
+            thisStructure.modDate = dates[6:]
+            names = nameRecords[np.searchsorted(nameRecords, start):np.searchsorted(nameRecords, end)]
+            if len(names) > 0:
+                thisStructure.name = self.stringPayload(int(names[-1]))
+            structures.append(thisStructure)
+
+        if lazy:
+            self.pendingStructures = len(structures)
+        else:
+            self.readStructureBodies(structures, structureStarts, structureEnds)
+        for thisStructure in structures:
+            self.layoutObject.structures[thisStructure.name] = thisStructure
+
+        lastRecord = structureEnds[-1] + 1 if len(structureEnds) > 0 else headerEnd
+        if lastRecord >= len(recordTypes) or recordTypes[lastRecord] != ENDLIB:
+            print("There was an error reading the structure list.")
+
+    def loadFromFile(self, fileName, lazy=False):
+        with open(fileName, "rb") as fileHandle:
+            self.buffer = mmap.mmap(fileHandle.fileno(), 0, access=mmap.ACCESS_READ)
+        self.offsets, self.lengths, self.recordTypes = indexRecords(self.buffer)
+        self.readIndexedGds2(lazy=lazy)
+        if self.pendingStructures == 0:
+            self.buffer.close()
+            self.buffer = None
+            self.strings = {}
+        self.layoutObject.initialize()
@@ -0,0 +1,98 @@
+import struct
+
+from .gds2bufferedWriter import encodeName, int16Record, stringRecord
+from .gdsRecords import *
+
+int16Payload = struct.Struct(">h")
+
+
+def iterRecords(fileHandle, chunkSize=1 << 20):
+    """
+    Yield (recordType, record) for each record in a GDS file, record is the complete record
+    including the 4 byte header. Reads the file in chunks so memory use is independent of file size
+    Raises ValueError if the file ends within a record
+    """
+    buffer = b""
+    position = 0
+    while True:
+        if len(buffer) - position < 4 or \
+                len(buffer) - position < ((buffer[position] << 8) | buffer[position + 1]):
+            chunk = fileHandle.read(chunkSize)
+            if not chunk:
+                # only zero padding may follow the last complete record
+                if buffer[position:].strip(b"\0"):
+                    raise ValueError("Truncated GDS record at the end of {}".format(
+                        getattr(fileHandle, "name", "file")))
+                return
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        length = (buffer[position] << 8) | buffer[position + 1]
+        if length < 4:  # zero padding after ENDLIB
+            return
+        recordType = (buffer[position + 2] << 8) | buffer[position + 3]
+        yield recordType, buffer[position:position + length]
+        position += length
+
+
+class Gds2streamTransformer:
+    """
+    Copy a GDSII file record by record, rewriting structure names and layers through callbacks
+    without building a VlsiLayout. Memory use is independent of the file size.
+    renameStructure(name) -> new name: applied to STRNAME and the SNAME of srefs and arefs
+    mapLayer(layer) -> new layer: applied to LAYER records
+    mapDataType(layer, dataType) -> new data type: applied to DATATYPE and TEXTTYPE records,
+        layer is the original layer of the element
+    Structure names are passed without the zero padding.
+    """
+    flushSize = 1 << 22
+
+    def __init__(self, renameStructure=None, mapLayer=None, mapDataType=None):
+        self.renameStructure = renameStructure
+        self.mapLayer = mapLayer
+        self.mapDataType = mapDataType
+
+    def transformRecord(self, recordType, record, layer):
+        if recordType in (STRNAME, SNAME):
+            if self.renameStructure is None:
+                return record
+            name = bytes(record[4:]).decode().rstrip("\0")
+            return stringRecord(recordType, encodeName(self.renameStructure(name)))
+        elif recordType == LAYER:
+            if self.mapLayer is None:
+                return record
+            return int16Record.pack(6, LAYER, self.mapLayer(layer))
+        elif recordType in (DATATYPE, TEXTTYPE):
+            if self.mapDataType is None:
+                return record
+            dataType = int16Payload.unpack_from(record, 4)[0]
+            return int16Record.pack(6, recordType, self.mapDataType(layer, dataType))
+        return record
+
+    def transformFile(self, inputFileName, outputFileName):
+        transformedTypes = {STRNAME, SNAME, LAYER, DATATYPE, TEXTTYPE}
+        layer = None
+        with open(inputFileName, "rb") as inputFile, open(outputFileName, "wb") as outputFile:
+            output = bytearray()
+            for recordType, record in iterRecords(inputFile):
+                if recordType in transformedTypes:
+                    if recordType == LAYER:
+                        layer = int16Payload.unpack_from(record, 4)[0]
+                    record = self.transformRecord(recordType, record, layer)
+                elif recordType == ENDEL:
+                    layer = None
+                output += record
+                if len(output) > self.flushSize:
+                    outputFile.write(output)
+                    output = bytearray()
+            outputFile.write(output)
+
+
+def addSuffixToStructures(inputFileName, outputFileName, suffix, exclusions=()):
+    """Stream a GDS file adding suffix to all structure names except those in exclusions
+    (streaming equivalent of VlsiLayout.add_suffix_to_structures)"""
+    def rename(name):
+        if name in exclusions:
+            return name
+        return name + suffix
+    Gds2streamTransformer(renameStructure=rename).transformFile(inputFileName, outputFileName)
@@ -124,7 +124,7 @@ class Gds2writer:
         if("libraryName" in self.layoutObject.info):
             idBits=b'\x02\x06'
             if (len(self.layoutObject.info["libraryName"]) % 2 != 0):
-                libraryName = self.layoutObject.info["libraryName"].encode() + "\0"
+                libraryName = self.layoutObject.info["libraryName"].encode() + b"\0"
             else:
                 libraryName = self.layoutObject.info["libraryName"].encode()
             self.writeRecord(idBits+libraryName)                
@@ -317,38 +317,43 @@ class Gds2writer:
             idBits=b'\x26\x01' #ELFLAGS
             elementFlags = struct.pack(">h",thisAref.elementFlags)
             self.writeRecord(idBits+elementFlags)
-        if(thisAref.plex):
+        if(thisAref.plex!=""):
             idBits=b'\x2F\x03'  #PLEX
             plex = struct.pack(">i",thisAref.plex)
             self.writeRecord(idBits+plex)
-        if(thisAref.aName):
+        if(thisAref.aName!=""):
             idBits=b'\x12\x06'
-            if (len(thisAref.aName) % 2 != 0):
-                aName = thisAref.aName+"\0"
-            else:
-                aName = thisAref.aName
+            aName = thisAref.aName
+            if isinstance(aName, str):
+                aName = aName.encode()
+            if (len(aName) % 2 != 0):
+                aName = aName+b"\0"
             self.writeRecord(idBits+aName)
-        if(thisAref.transFlags):
+        if(thisAref.transFlags!=""):
             idBits=b'\x1A\x01'
             mirrorFlag = int(thisAref.transFlags[0])<<15
             rotateFlag = int(thisAref.transFlags[1])<<1
-            magnifyFlag = int(thisAref.transFlags[0])<<3
+            magnifyFlag = int(thisAref.transFlags[2])<<3
             transFlags = struct.pack(">H",mirrorFlag|rotateFlag|magnifyFlag)
             self.writeRecord(idBits+transFlags)
-        if(thisAref.magFactor):
+        if(thisAref.magFactor!=""):
             idBits=b'\x1B\x05'
             magFactor=self.ibmDataFromIeeeDouble(thisAref.magFactor)
             self.writeRecord(idBits+magFactor)
-        if(thisAref.rotateAngle):
+        if(thisAref.rotateAngle!=""):
             idBits=b'\x1C\x05'            
             rotateAngle=self.ibmDataFromIeeeDouble(thisAref.rotateAngle)
             self.writeRecord(idBits+rotateAngle)
-        if(thisAref.coordinates):
+        if(thisAref.colRow!=""):
+            idBits=b'\x13\x02'
+            colRow = struct.pack(">hh",thisAref.colRow[0],thisAref.colRow[1])
+            self.writeRecord(idBits+colRow)
+        if(thisAref.coordinates!=""):
             idBits=b'\x10\x03' #XY Data Points
             coordinateRecord = idBits
             for coordinate in thisAref.coordinates:
-                x=struct.pack(">i",coordinate[0])
-                y=struct.pack(">i",coordinate[1])
+                x=struct.pack(">i",int(coordinate[0]))
+                y=struct.pack(">i",int(coordinate[1]))
                 coordinateRecord+=x
                 coordinateRecord+=y
             self.writeRecord(coordinateRecord)
@@ -442,10 +447,10 @@ class Gds2writer:
             idBits=b'\x2A\x02'
             nodeType = struct.pack(">h",thisNode.nodeType)
             self.writeRecord(idBits+nodeType)            
-        if(thisText.coordinates!=""):
+        if(thisNode.coordinates!=""):
             idBits=b'\x10\x03' #XY Data Points
             coordinateRecord = idBits
-            for coordinate in thisText.coordinates:
+            for coordinate in thisNode.coordinates:
                 x=struct.pack(">i",int(coordinate[0]))
                 y=struct.pack(">i",int(coordinate[1]))
                 coordinateRecord+=x
@@ -457,7 +462,7 @@ class Gds2writer:
         self.writeRecord(coordinateRecord)
     
     def writeBox(self,thisBox):
-        idBits=b'\x2E\x02'  #record Type
+        idBits=b'\x2D\x00'  #record Type
         self.writeRecord(idBits)
         if(thisBox.elementFlags!=""):
             idBits=b'\x26\x01' #ELFLAGS
@@ -476,7 +481,7 @@ class Gds2writer:
             purposeLayer = struct.pack(">h",thisBox.purposeLayer)
             self.writeRecord(idBits+purposeLayer)
         if(thisBox.boxValue!=""):
-            idBits=b'\x2D\x00'
+            idBits=b'\x2E\x02'
             boxValue = struct.pack(">h",thisBox.boxValue)
             self.writeRecord(idBits+boxValue)            
         if(thisBox.coordinates!=""):
@@ -14,7 +14,10 @@ class GdsStructure:
         self.boxes=[]
 
 class GdsBoundary:
-    """Class represent a GDS Boundary Object"""
+    """Class represent a GDS Boundary Object
+    The elements use __slots__ since a large layout has millions of them"""
+    __slots__ = ("elementFlags", "plex", "drawingLayer", "purposeLayer", "dataType", "coordinates")
+
     def __init__(self):
         self.elementFlags=""
         self.plex=""
@@ -25,6 +28,9 @@ class GdsBoundary:
     
 class GdsPath:
     """Class represent a GDS Path Object"""
+    __slots__ = ("elementFlags", "plex", "drawingLayer", "purposeLayer", "pathType", "dataType", "pathWidth",
+                 "coordinates")
+
     def __init__(self):
         self.elementFlags=""
         self.plex=""
@@ -113,6 +119,8 @@ class GdsPath:
 
 class GdsSref:
     """Class represent a GDS structure reference Object"""
+    __slots__ = ("elementFlags", "plex", "sName", "transFlags", "magFactor", "rotateAngle", "coordinates")
+
     def __init__(self):
         self.elementFlags=""
         self.plex=""
@@ -124,6 +132,8 @@ class GdsSref:
 
 class GdsAref:
     """Class represent a GDS array reference Object"""
+    __slots__ = ("elementFlags", "plex", "aName", "transFlags", "magFactor", "rotateAngle", "colRow", "coordinates")
+
     def __init__(self):
         self.elementFlags=""
         self.plex=""
@@ -131,10 +141,14 @@ class GdsAref:
         self.transFlags=(False,False,False)
         self.magFactor=""
         self.rotateAngle=""
+        self.colRow=""
         self.coordinates=""
 
 class GdsText:
     """Class represent a GDS text Object"""
+    __slots__ = ("elementFlags", "plex", "drawingLayer", "purposeLayer", "transFlags", "magFactor", "rotateAngle",
+                 "pathType", "pathWidth", "presentationFlags", "coordinates", "textString")
+
     def __init__(self):
         self.elementFlags=""
         self.plex=""
@@ -151,6 +165,8 @@ class GdsText:
         
 class GdsNode:
     """Class represent a GDS Node Object"""
+    __slots__ = ("elementFlags", "plex", "drawingLayer", "nodeType", "coordinates")
+
     def __init__(self):
         self.elementFlags=""
         self.plex=""
@@ -160,6 +176,8 @@ class GdsNode:
         
 class GdsBox:
     """Class represent a GDS Box Object"""
+    __slots__ = ("elementFlags", "plex", "drawingLayer", "purposeLayer", "boxValue", "coordinates")
+
     def __init__(self):
         self.elementFlags=""
         self.plex=""
@@ -0,0 +1,59 @@
+"""
+GDSII record type constants.
+Each record starts with a 2 byte length (including the 4 byte header) followed by
+a 2 byte record type: the high byte is the record id and the low byte the data type.
+"""
+
+## Based on info from http://www.rulabinsky.com/cavd/text/chapc.html
+
+HEADER = 0x0002
+BGNLIB = 0x0102
+LIBNAME = 0x0206
+UNITS = 0x0305
+ENDLIB = 0x0400
+BGNSTR = 0x0502
+STRNAME = 0x0606
+ENDSTR = 0x0700
+BOUNDARY = 0x0800
+PATH = 0x0900
+SREF = 0x0A00
+AREF = 0x0B00
+TEXT = 0x0C00
+LAYER = 0x0D02
+DATATYPE = 0x0E02
+WIDTH = 0x0F03
+XY = 0x1003
+ENDEL = 0x1100
+SNAME = 0x1206
+COLROW = 0x1302
+NODE = 0x1500
+TEXTTYPE = 0x1602
+PRESENTATION = 0x1701
+STRING = 0x1906
+STRANS = 0x1A01
+MAG = 0x1B05
+ANGLE = 0x1C05
+REFLIBS = 0x1F06
+FONTS = 0x2006
+PATHTYPE = 0x2102
+GENERATIONS = 0x2202
+ATTRTABLE = 0x2306
+ELFLAGS = 0x2601
+NODETYPE = 0x2A02
+PROPATTR = 0x2B02
+PROPVALUE = 0x2C06
+BOX = 0x2D00
+BOXTYPE = 0x2E02
+PLEX = 0x2F03
+FORMAT = 0x3602
+MASK = 0x3706
+
+# low byte of the record type
+DATA_NONE = 0x00
+DATA_BITARRAY = 0x01
+DATA_INT16 = 0x02
+DATA_INT32 = 0x03
+DATA_REAL64 = 0x05
+DATA_ASCII = 0x06
+
+ELEMENT_TYPES = (BOUNDARY, PATH, SREF, AREF, TEXT, NODE, BOX)
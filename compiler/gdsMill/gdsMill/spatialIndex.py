@@ -0,0 +1,154 @@
+import math
+
+import numpy as np
+
+
+class GridIndex:
+    """
+    Uniform grid over a set of rectangles [left, bottom, right, top] for point queries.
+    Each rectangle is binned into every grid cell it overlaps, the rectangles in each cell
+    are stored in ascending order so query results preserve the original order.
+    """
+    def __init__(self, rectangles):
+        self.rectangles = rectangles
+        # point containment uses the truncated rectangle (see VlsiLayout.labelInRectangle)
+        self.bounds = np.trunc(rectangles)
+        numRectangles = len(rectangles)
+        if numRectangles == 0:
+            self.cellStarts = np.zeros(2, dtype=np.int64)
+            self.cellEntries = np.zeros(0, dtype=np.int64)
+            self.origin = (0.0, 0.0)
+            self.cellSize = (1.0, 1.0)
+            self.gridSize = (1, 1)
+            return
+
+        left, bottom = self.bounds[:, 0].min(), self.bounds[:, 1].min()
+        right, top = self.bounds[:, 2].max(), self.bounds[:, 3].max()
+        numCells = max(1, int(math.sqrt(numRectangles)))
+        self.origin = (left, bottom)
+        self.cellSize = (max((right - left) / numCells, 1.0), max((top - bottom) / numCells, 1.0))
+        self.gridSize = (numCells, numCells)
+
+        x0, y0 = self.cellIndices(self.bounds[:, 0], self.bounds[:, 1])
+        x1, y1 = self.cellIndices(self.bounds[:, 2], self.bounds[:, 3])
+        spanX = x1 - x0 + 1
+        counts = spanX * (y1 - y0 + 1)
+        # (rectangle, cell) pairs for every cell covered by each rectangle
+        rectangleIds = np.repeat(np.arange(numRectangles), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cellX = x0[rectangleIds] + local % spanX[rectangleIds]
+        cellY = y0[rectangleIds] + local // spanX[rectangleIds]
+        cells = cellY * numCells + cellX
+        order = np.argsort(cells, kind="stable")
+        self.cellEntries = rectangleIds[order]
+        self.cellStarts = np.zeros(numCells * numCells + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=numCells * numCells), out=self.cellStarts[1:])
+
+    def cellIndices(self, x, y):
+        numX, numY = self.gridSize
+        cellX = np.clip(np.floor((x - self.origin[0]) / self.cellSize[0]).astype(np.int64), 0, numX - 1)
+        cellY = np.clip(np.floor((y - self.origin[1]) / self.cellSize[1]).astype(np.int64), 0, numY - 1)
+        return cellX, cellY
+
+    def queryPoint(self, coordinate):
+        """Indices (ascending) of the rectangles containing coordinate, edges inclusive"""
+        x, y = coordinate[0], coordinate[1]
+        cellX, cellY = self.cellIndices(np.asarray([x]), np.asarray([y]))
+        cell = cellY[0] * self.gridSize[0] + cellX[0]
+        candidates = self.cellEntries[self.cellStarts[cell]:self.cellStarts[cell + 1]]
+        bounds = self.bounds[candidates]
+        inside = ((x >= bounds[:, 0]) & (x <= bounds[:, 2]) &
+                  (y >= bounds[:, 1]) & (y <= bounds[:, 3]))
+        return candidates[inside]
+
+
+class SpatialIndex:
+    """
+    Per layer index of the rectangular boundaries of a VlsiLayout in the root coordinate space.
+    Shapes are stored in xyTree order so results match the linear search through xyTree
+    """
+    def __init__(self, layout):
+        self.layout = layout
+        self.xyTreeLength = len(layout.xyTree)
+        self.rootStructureName = layout.rootStructureName
+        # used to detect structures changed after the index was built
+        self.structureSizes = {}
+        self.layerRectangles = {}
+        self.layerPurposes = {}
+        self.layerGrids = {}
+        self.build()
+
+    def structureShapes(self, structureName):
+        """Rectangles, layers and purposes of the rectangular boundaries in a structure"""
+        structure = self.layout.structures[str(structureName)]
+        self.structureSizes[structureName] = (structure, len(structure.boundaries))
+        rectangles = []
+        layers = []
+        purposes = []
+        for boundary in structure.boundaries:
+            # Pin enclosures only work on rectangular pins so ignore any non rectangle
+            if len(boundary.coordinates) != 5:
+                continue
+            left_bottom = boundary.coordinates[0]
+            right_top = boundary.coordinates[2]
+            rectangles.append((left_bottom[0], left_bottom[1], right_top[0], right_top[1]))
+            layers.append(boundary.drawingLayer)
+            purposes.append(boundary.dataType)
+        return np.asarray(rectangles, dtype=np.float64).reshape(-1, 4), layers, purposes
+
+    def build(self):
+        shapesCache = {}
+        layerRectangles = {}
+        layerPurposes = {}
+        for structureName, origin, uVector, vVector in self.layout.xyTree:
+            if structureName not in shapesCache:
+                rectangles, layers, purposes = self.structureShapes(structureName)
+                groups = {}
+                for index, layer in enumerate(layers):
+                    groups.setdefault(layer, []).append(index)
+                shapesCache[structureName] = [(layer, rectangles[indices],
+                                               [purposes[index] for index in indices])
+                                              for layer, indices in groups.items()]
+            for layer, rectangles, purposes in shapesCache[structureName]:
+                # same arithmetic as VlsiLayout.transformRectangle
+                leftBottom = (rectangles[:, 0] * uVector[0].item() + rectangles[:, 1] * uVector[1].item(),
+                              rectangles[:, 1] * vVector[1].item() + rectangles[:, 0] * vVector[0].item())
+                rightTop = (rectangles[:, 2] * uVector[0].item() + rectangles[:, 3] * uVector[1].item(),
+                            rectangles[:, 3] * vVector[1].item() + rectangles[:, 2] * vVector[0].item())
+                transformed = np.column_stack([np.minimum(leftBottom[0], rightTop[0]) + origin[0].item(),
+                                               np.minimum(leftBottom[1], rightTop[1]) + origin[1].item(),
+                                               np.maximum(leftBottom[0], rightTop[0]) + origin[0].item(),
+                                               np.maximum(leftBottom[1], rightTop[1]) + origin[1].item()])
+                layerRectangles.setdefault(layer, []).append(transformed)
+                layerPurposes.setdefault(layer, []).extend(purposes)
+        for layer in layerRectangles:
+            self.layerRectangles[layer] = np.concatenate(layerRectangles[layer])
+            self.layerPurposes[layer] = np.asarray(layerPurposes[layer], dtype=object)
+
+    def isValid(self):
+        """Check the layout hasn't changed since the index was built"""
+        layout = self.layout
+        if len(layout.xyTree) != self.xyTreeLength or layout.rootStructureName != self.rootStructureName:
+            return False
+        for structureName, (structure, numBoundaries) in self.structureSizes.items():
+            if (layout.structures.get(str(structureName)) is not structure or
+                    len(structure.boundaries) != numBoundaries):
+                return False
+        return True
+
+    def getRectangles(self, layer, purpose=None):
+        """All rectangles on layer (and purpose if given) in DB units"""
+        if layer not in self.layerRectangles:
+            return np.zeros((0, 4))
+        rectangles = self.layerRectangles[layer]
+        if purpose is not None:
+            rectangles = rectangles[self.layerPurposes[layer] == purpose]
+        return rectangles
+
+    def getRectanglesAtPoint(self, coordinate, layer):
+        """Rectangles on layer that contain coordinate (DB units)"""
+        if layer not in self.layerRectangles:
+            return np.zeros((0, 4))
+        if layer not in self.layerGrids:
+            self.layerGrids[layer] = GridIndex(self.layerRectangles[layer])
+        return self.layerRectangles[layer][self.layerGrids[layer].queryPoint(coordinate)]
@@ -5,6 +5,7 @@ import numpy as np
 
 import debug
 from .gdsPrimitives import *
+from .spatialIndex import SpatialIndex
 
 
 class UniqueMeta(type):
@@ -33,6 +34,8 @@ class VlsiLayout(metaclass=UniqueMeta):
     """Class represent a hierarchical layout
     if from_file is supplied, only one instance of the given file will be in memory
     """
+    # answer pin and shape queries using a per layer spatial index instead of searching the xyTree
+    useSpatialIndex = True
 
     def __init__(self, name=None, units=(0.001,1e-9), libraryName = "DEFAULT.DB", gdsVersion=5, from_file=None):
         #keep a list of all the structures in this layout
@@ -82,19 +85,24 @@ class VlsiLayout(metaclass=UniqueMeta):
                         #expanded to include srefs / arefs separately.
                         #each structure will have an X,Y,offset, and rotate associated
                         #with it.  Populate via traverseTheHierarchy method.
+        self.xyTreeRoot = None  # root the xyTree was populated for, None after adding instances
         
+        self.spatialIndex = None  # built from xyTree on the first query
+        self.invalidateBoundingBoxes()
+
         #temp variables used in delegate functions
         self.tempCoordinates=None
         self.tempPassFail = True
 
-    def load_from_file(self, force_reload=False):
+    def load_from_file(self, force_reload=False, lazy=False):
+        """Read from_file. If lazy, the elements of each structure are only decoded when first accessed"""
         if self.from_file is None:
             debug.error("load_from_file should only be called from instances which supplied 'from_file' in the "
                         "constructor", -1)
         if force_reload or len(self.xyTree) == 0:
-            from .gds2reader import Gds2reader
-            reader = Gds2reader(self)
-            reader.loadFromFile(self.from_file)
+            from .gds2mmapReader import Gds2mmapReader
+            reader = Gds2mmapReader(self)
+            reader.loadFromFile(self.from_file, lazy=lazy)
 
 
     def rotatedCoordinates(self,coordinatesToRotate,rotateAngle):
@@ -189,6 +197,8 @@ class VlsiLayout(metaclass=UniqueMeta):
             structures[new_name].name = new_name
             for sref in structures[new_name].srefs:
                 sref.sName = add_suffix(sref.sName)
+            for aref in structures[new_name].arefs:
+                aref.aName = add_suffix(referenceName(aref))
         self.structures = structures
         self.prepareForWrite()
 
@@ -207,65 +217,47 @@ class VlsiLayout(metaclass=UniqueMeta):
             structureNames+=[name]
             
         for name in self.structures:
-            if(len(self.structures[name].srefs)>0): #does this structure reference any others?
-                for sref in self.structures[name].srefs: #go through each reference
-                    if sref.sName in structureNames: #and compare to our list
-                        structureNames.remove(sref.sName)
+            referencedNames = [sref.sName for sref in self.structures[name].srefs]
+            referencedNames += [referenceName(aref) for aref in self.structures[name].arefs]
+            for referencedName in referencedNames: #go through each reference
+                if referencedName in structureNames: #and compare to our list
+                    structureNames.remove(referencedName)
 
         self.rootStructureName = structureNames[0]
 
-    def traverseTheHierarchy(self, startingStructureName=None, delegateFunction = None, 
-                             transformPath = [], rotateAngle = 0, transFlags = (0,0,0), coordinates = (0,0)):
-        #since this is a recursive function, must deal with the default
-        #parameters explicitly        
+    def getReferences(self, structureName):
+        """ Return (structure name, transform) of every sref and aref element in a structure """
+        structure = self.structures[structureName]
+        references = []
+        for sref in structure.srefs:
+            references.append((sref.sName, referenceTransform(sref.rotateAngle, sref.transFlags,
+                                                              sref.coordinates)))
+        for aref in structure.arefs:
+            name = referenceName(aref)
+            for coordinates in arefPlacements(aref):
+                references.append((name, referenceTransform(aref.rotateAngle, aref.transFlags,
+                                                            coordinates)))
+        return references
+
+    def traverseTheHierarchy(self, startingStructureName=None, delegateFunction = None):
+        """ Visit every structure instance in the hierarchy depth first.
+        delegateFunction is called with the structure name and the composed transform
+        (a, b, c, d, tx, ty) from the structure to the starting structure i.e.
+        x' = a*x + b*y + tx, y' = c*x + d*y + ty
+        Iterative so deep hierarchies don't hit the recursion limit."""
         if startingStructureName == None:
-            startingStructureName = self.rootStructureName            
-
-        #set up the rotation matrix        
-        if(rotateAngle == None or rotateAngle == ""):
-            rotateAngle = 0
-        else:
-            rotateAngle = math.radians(float(rotateAngle))
-        mRotate = np.asarray([[math.cos(rotateAngle),-math.sin(rotateAngle),0.0],
-                          [math.sin(rotateAngle),math.cos(rotateAngle),0.0],
-                          [0.0,0.0,1.0]])
-        #set up the translation matrix
-        translateX = float(coordinates[0])
-        translateY = float(coordinates[1])
-        mTranslate = np.asarray([[1.0,0.0,translateX],[0.0,1.0,translateY],[0.0,0.0,1.0]])
-        #set up the scale matrix (handles mirror X)
-        scaleX = 1.0
-        if(transFlags[0]):
-            scaleY = -1.0
-        else:
-            scaleY = 1.0
-        mScale = np.asarray([[scaleX,0.0,0.0],[0.0,scaleY,0.0],[0.0,0.0,1.0]])
-        
-        #we need to keep track of all transforms in the hierarchy
-        #when we add an element to the xy tree, we apply all transforms from the bottom up
-        transformPath += [(mRotate,mScale,mTranslate)]
-        if delegateFunction != None:
-            delegateFunction(startingStructureName, transformPath)
-        #starting with a particular structure, we will recursively traverse the tree
-        #********might have to set the recursion level deeper for big layouts!
-        if(len(self.structures[startingStructureName].srefs)>0): #does this structure reference any others?
-            #if so, go through each and call this function again
-            #if not, return back to the caller (caller can be this function)            
-            for sref in self.structures[startingStructureName].srefs:
-                #here, we are going to modify the sref coordinates based on the parent objects rotation                
-#                if (sref.sName.count("via") == 0): 
-                self.traverseTheHierarchy(startingStructureName = sref.sName,                                    
-                                          delegateFunction = delegateFunction,
-                                          transformPath = transformPath,
-                                          rotateAngle = sref.rotateAngle,
-                                          transFlags = sref.transFlags,
-                                          coordinates = sref.coordinates)
-#            else:
-#                print("WARNING: via encountered, ignoring:", sref.sName)
-            #MUST HANDLE AREFs HERE AS WELL
-        #when we return, drop the last transform from the transformPath
-        del transformPath[-1]
-        return
+            startingStructureName = self.rootStructureName
+        referencesCache = {}
+        stack = [(startingStructureName, IDENTITY_TRANSFORM)]
+        while stack:
+            structureName, transform = stack.pop()
+            if delegateFunction != None:
+                delegateFunction(structureName, transform)
+            if structureName not in referencesCache:
+                referencesCache[structureName] = self.getReferences(structureName)
+            # push in reverse so children are visited in order
+            for childName, childTransform in reversed(referencesCache[structureName]):
+                stack.append((childName, composeTransforms(transform, childTransform)))
     
     def initialize(self):
         self.deduceHierarchy()
@@ -273,28 +265,18 @@ class VlsiLayout(metaclass=UniqueMeta):
         self.populateCoordinateMap()    
     
     def populateCoordinateMap(self):
-        def addToXyTree(startingStructureName = None,transformPath = None):
-        #print("populateCoordinateMap")
-            uVector = np.asarray([1.0,0.0,0.0]).transpose()  #start with normal basis vectors
-            vVector = np.asarray([0.0,1.0,0.0]).transpose()
-            origin = np.asarray([0.0,0.0,1.0]).transpose() #and an origin (Z component is 1.0 to indicate position instead of vector)
-            #make a copy of all the transforms and reverse it            
-            reverseTransformPath = transformPath[:]
-            if len(reverseTransformPath) > 1:
-                reverseTransformPath.reverse()               
-            #now go through each transform and apply them to our basis and origin in succession
-            for transform in reverseTransformPath:
-                origin = transform[0] @ origin  #rotate
-                uVector = transform[0] @ uVector  #rotate
-                vVector = transform[0] @ vVector  #rotate
-                origin = transform[1] @ origin  #scale
-                uVector = transform[1] @ uVector  #rotate
-                vVector = transform[1] @ vVector  #rotate
-                origin = transform[2] @ origin  #translate
-                #we don't need to do a translation on the basis vectors            
+        def addToXyTree(startingStructureName, transform):
+            (a, b, c, d, tx, ty) = transform
+            #the basis vectors are the columns of the transform and the origin is the translation
+            #(Z component of the origin is 1.0 to indicate position instead of vector)
+            origin = np.asarray([tx, ty, 1.0])
+            uVector = np.asarray([a, c, 0.0])
+            vVector = np.asarray([b, d, 0.0])
             self.xyTree+=[(startingStructureName,origin,uVector,vVector)]  #populate the xyTree with each
                                                                             #structureName and coordinate space
+        self.spatialIndex = None
         self.traverseTheHierarchy(delegateFunction = addToXyTree)
+        self.xyTreeRoot = self.rootStructureName
         
     def microns(self,userUnits):
         """Utility function to convert user units to microns"""
@@ -340,8 +322,49 @@ class VlsiLayout(metaclass=UniqueMeta):
         if self.debug==1: 
             debug.info(0,"DEBUG:  GdsMill vlsiLayout: addInstance: type %s, nameOfLayout "%type(layoutToAdd),nameOfLayout)
 
+        StructureName = self.includeLayout(layoutToAdd, nameOfLayout)
 
+        #add a reference to the new layout structure in this layout's root
+        layoutToAddSref = GdsSref()
+        layoutToAddSref.sName = StructureName
+        layoutToAddSref.coordinates = offsetInLayoutUnits
+        self.setReferenceOrientation(layoutToAddSref, mirror, rotate)
+
+        #add the sref to the root structure
+        self.structures[self.rootStructureName].srefs+=[layoutToAddSref]
+        self.invalidateBoundingBoxes()
+        self.xyTreeRoot = None
 
+    def addArrayInstance(self, layoutToAdd, nameOfLayout=0, offsetInLayoutUnits=(0, 0),
+                         columnPitch=(0, 0), rowPitch=(0, 0), columns=1, rows=1,
+                         mirror=None, rotate=None):
+        """
+        Method to insert a columns x rows array of one layout as a single AREF.
+        offsetInLayoutUnits is the offset of the first element, columnPitch and rowPitch
+        are the displacements in layout units between adjacent columns and rows.
+        """
+        StructureName = self.includeLayout(layoutToAdd, nameOfLayout)
+
+        layoutToAddAref = GdsAref()
+        layoutToAddAref.aName = StructureName
+        layoutToAddAref.colRow = (columns, rows)
+        origin = (int(offsetInLayoutUnits[0]), int(offsetInLayoutUnits[1]))
+        layoutToAddAref.coordinates = [origin,
+                                       (origin[0] + columns * int(columnPitch[0]),
+                                        origin[1] + columns * int(columnPitch[1])),
+                                       (origin[0] + rows * int(rowPitch[0]),
+                                        origin[1] + rows * int(rowPitch[1]))]
+        self.setReferenceOrientation(layoutToAddAref, mirror, rotate)
+
+        self.structures[self.rootStructureName].arefs+=[layoutToAddAref]
+        self.invalidateBoundingBoxes()
+        self.xyTreeRoot = None
+
+    def includeLayout(self, layoutToAdd, nameOfLayout=0):
+        """
+        Combine the structures of layoutToAdd into this layout
+        and return the name of the structure to reference
+        """
         # Determine if we are instantiating the root design of 
         #  layoutToAdd (default) or nameOfLayout
         if nameOfLayout == 0:
@@ -381,16 +404,14 @@ class VlsiLayout(metaclass=UniqueMeta):
             #print("ERROR:  vlsiLayout.addInstance: [%s] Name not found in local structures, "%(nameOfLayout))
             #return #FIXME: remove!
             #exit(1)
+        return StructureName
 
-
-        #add a reference to the new layout structure in this layout's root
-        layoutToAddSref = GdsSref()
-        layoutToAddSref.sName = StructureName
-        layoutToAddSref.coordinates = offsetInLayoutUnits
-
+    @staticmethod
+    def setReferenceOrientation(reference, mirror=None, rotate=None):
+        """ Set the transFlags and rotateAngle of an sref or aref from a mirror and rotate """
         if mirror or rotate:
         ########flags = (mirror around x-axis, absolute rotation, absolute magnification) 
-            layoutToAddSref.transFlags = (False,False,False)
+            reference.transFlags = (False,False,False)
         #Below angles are angular angles(relative), not absolute
             if mirror=="R90":
                 rotate = 90.0
@@ -399,18 +420,15 @@ class VlsiLayout(metaclass=UniqueMeta):
             if mirror=="R270":
                 rotate = 270.0
             if rotate:
-                layoutToAddSref.rotateAngle = rotate
+                reference.rotateAngle = rotate
             if mirror == "x" or mirror == "MX":
-                layoutToAddSref.transFlags = (True,False,False)
+                reference.transFlags = (True,False,False)
             if mirror == "y" or mirror == "MY": #NOTE: "MY" option will override specified rotate angle
-                layoutToAddSref.transFlags = (True,False,False)
-                layoutToAddSref.rotateAngle = 180.0
+                reference.transFlags = (True,False,False)
+                reference.rotateAngle = 180.0
             if mirror == "xy" or mirror == "XY": #NOTE: "XY" option will override specified rotate angle
-                layoutToAddSref.transFlags = (False,False,False)
-                layoutToAddSref.rotateAngle = 180.0
-
-        #add the sref to the root structure
-        self.structures[self.rootStructureName].srefs+=[layoutToAddSref]        
+                reference.transFlags = (False,False,False)
+                reference.rotateAngle = 180.0
         
     def addBox(self,layerNumber=0, purposeNumber=None, offsetInMicrons=(0,0), width=1.0, height=1.0,center=False):
         """
@@ -446,7 +464,31 @@ class VlsiLayout(metaclass=UniqueMeta):
         boundaryToAdd.purposeLayer = 0
         #add the sref to the root structure
         self.structures[self.rootStructureName].boundaries+=[boundaryToAdd]
+        self.invalidateBoundingBoxes()
     
+    def addBoxes(self, layerNumber=0, purposeNumber=None, offsetsInMicrons=(), sizesInMicrons=()):
+        """
+        Method to add many boxes on one layer to a layout.
+        offsetsInMicrons and sizesInMicrons are N x 2 arrays of lower left corners and (width, height)
+        """
+        userUnit = self.units[1]/self.units[0]
+        layoutUnitsPerMicron = (userUnit / userUnit) / self.units[0]
+        offsets = np.round(np.asarray(offsetsInMicrons, dtype=float).reshape(-1, 2) * layoutUnitsPerMicron)
+        sizes = np.round(np.asarray(sizesInMicrons, dtype=float).reshape(-1, 2) * layoutUnitsPerMicron)
+        left, bottom = offsets.T.tolist()
+        right, top = (offsets + sizes).T.tolist()
+        dataType = purposeNumber if purposeNumber is not None else 0
+        boundaries = []
+        for x0, y0, x1, y1 in zip(left, bottom, right, top):
+            boundaryToAdd = GdsBoundary()
+            boundaryToAdd.drawingLayer = layerNumber
+            boundaryToAdd.dataType = dataType
+            boundaryToAdd.coordinates = [(x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0, y0)]
+            boundaryToAdd.purposeLayer = 0
+            boundaries.append(boundaryToAdd)
+        self.structures[self.rootStructureName].boundaries += boundaries
+        self.invalidateBoundingBoxes()
+
     def addPath(self, layerNumber=0, purposeNumber = None, coordinates=[(0,0)], width=1.0):
         """
         Method to add a path to a layout
@@ -465,13 +507,13 @@ class VlsiLayout(metaclass=UniqueMeta):
         pathToAdd.coordinates=layoutUnitCoordinates
         #add the sref to the root structure
         self.structures[self.rootStructureName].paths+=[pathToAdd]
+        self.invalidateBoundingBoxes()
         
     def addText(self, text, layerNumber=0, purposeNumber = None, offsetInMicrons=(0,0), magnification=0.1, rotate = None):
         offsetInLayoutUnits = (self.userUnits(offsetInMicrons[0]),self.userUnits(offsetInMicrons[1]))
         textToAdd = GdsText()
         textToAdd.drawingLayer = layerNumber
         textToAdd.purposeLayer = purposeNumber
-        textToAdd.dataType = 0
         textToAdd.coordinates = [offsetInLayoutUnits]
         if(len(text)%2 == 1):
             #pad with a zero
@@ -671,7 +713,17 @@ class VlsiLayout(metaclass=UniqueMeta):
                 boundaries.append((scale_units(left_bottom), scale_units(right_top)))
         return boundaries
 
+    def getSpatialIndex(self):
+        """Return the spatial index of xyTree shapes, (re)building it if the layout has changed"""
+        if self.spatialIndex is None or not self.spatialIndex.isValid():
+            self.spatialIndex = SpatialIndex(self)
+        return self.spatialIndex
+
     def getShapesInLayerRecursive(self, layer, purpose=0):
+        if self.useSpatialIndex:
+            rectangles = self.getSpatialIndex().getRectangles(layer, purpose) * self.units[0]
+            return [([x[0], x[1]], [x[2], x[3]]) for x in rectangles.tolist()]
+
         boundaries = []
 
         for TreeUnit in self.xyTree:
@@ -685,23 +737,98 @@ class VlsiLayout(metaclass=UniqueMeta):
 
 
     def measureSize(self,startStructure):
-        self.rootStructureName=startStructure
-        self.populateCoordinateMap()
-        cellBoundary = [None, None, None, None]
-        for TreeUnit in self.xyTree:
-            cellBoundary=self.measureSizeInStructure(TreeUnit,cellBoundary)
+        cellBoundary = self.measureStructureBoundary(startStructure)
         cellSize=[cellBoundary[2]-cellBoundary[0],cellBoundary[3]-cellBoundary[1]]
         cellSizeMicron=[cellSize[0]*self.units[0],cellSize[1]*self.units[0]]
         return cellSizeMicron
 
     def measureBoundary(self,startStructure):
-        self.rootStructureName=startStructure
-        self.populateCoordinateMap()
-        cellBoundary = [None, None, None, None]
-        for TreeUnit in self.xyTree:
-            cellBoundary=self.measureSizeInStructure(TreeUnit,cellBoundary)
+        cellBoundary = self.measureStructureBoundary(startStructure)
         return [[self.units[0]*cellBoundary[0],self.units[0]*cellBoundary[1]],
                 [self.units[0]*cellBoundary[2],self.units[0]*cellBoundary[3]]]
+
+    def measureStructureBoundary(self, startStructure):
+        """ Boundary [left, bottom, right, top] in DB units of startStructure, which becomes the root.
+        Same result as applying measureSizeInStructure to every xyTree entry but computed from
+        the cached bounding boxes of the structures. The xyTree is repopulated if instances were
+        added since it was populated """
+        if startStructure != self.xyTreeRoot or len(self.xyTree) == 0:
+            self.rootStructureName = startStructure
+            del self.xyTree[:]
+            self.populateCoordinateMap()
+        return list(self.getBoundingBox(startStructure))
+
+    def invalidateBoundingBoxes(self):
+        """ Discard the cached structure bounding boxes, called when the layout is modified """
+        #(structure name, linear transform) -> bounding box
+        self.boundingBoxes = {}
+        #structure name -> (structure, number of boundaries, srefs, arefs) when its boxes were computed
+        self.boundingBoxSignatures = {}
+
+    def structureSignature(self, structure):
+        return (structure, len(structure.boundaries), len(structure.srefs), len(structure.arefs))
+
+    def validateBoundingBoxes(self):
+        """ Catch structures modified without going through addInstance/addBox/addPath """
+        for structureName, signature in self.boundingBoxSignatures.items():
+            structure = self.structures.get(structureName)
+            if structure is None or self.structureSignature(structure) != signature:
+                self.invalidateBoundingBoxes()
+                return
+
+    def getBoundingBox(self, structureName, linear=None):
+        """ Bounding box of the boundaries in the hierarchy of structureName with the structure's
+        shapes transformed by the linear part (a, b, c, d) of an xyTree transform.
+        Boxes are memoized bottom up for each (structure, linear transform), a parent box is the union
+        of its own boundaries and the translated boxes of its children so each structure is only
+        measured once per orientation. Returns [None]*4 if there are no boundaries """
+        if linear is None:
+            linear = IDENTITY_TRANSFORM[:4]
+        self.validateBoundingBoxes()
+        boundingBoxes = self.boundingBoxes
+        referencesCache = {}
+        startKey = (structureName, linear)
+        stack = [(structureName, linear, False)]
+        while stack:
+            name, linear, childrenDone = stack.pop()
+            if (name, linear) in boundingBoxes:
+                continue
+            if name not in referencesCache:
+                referencesCache[name] = self.getReferences(name)
+            (a, b, c, d) = linear
+            children = [((childName, (a * childA + b * childC, a * childB + b * childD,
+                                      c * childA + d * childC, c * childB + d * childD)),
+                         a * childTx + b * childTy, c * childTx + d * childTy)
+                        for childName, (childA, childB, childC, childD, childTx, childTy)
+                        in referencesCache[name]]
+            if not childrenDone:
+                #measure the children first
+                stack.append((name, linear, True))
+                stack.extend((childKey[0], childKey[1], False) for childKey, _, _ in children
+                             if childKey not in boundingBoxes)
+                continue
+
+            structure = self.structures[name]
+            cellBoundary = [None, None, None, None]
+            for boundary in structure.boundaries:
+                #same arithmetic as transformRectangle with the uVector and vVector of the xyTree
+                (left, bottom), (right, top) = boundary.coordinates[0], boundary.coordinates[2]
+                leftBottom = (left * a + bottom * c, bottom * d + left * b)
+                rightTop = (right * a + top * c, top * d + right * b)
+                cellBoundary = self.updateBoundary([min(leftBottom[0], rightTop[0]),
+                                                    min(leftBottom[1], rightTop[1]),
+                                                    max(leftBottom[0], rightTop[0]),
+                                                    max(leftBottom[1], rightTop[1])], cellBoundary)
+            for childKey, offsetX, offsetY in children:
+                childBox = boundingBoxes[childKey]
+                if childBox[0] is None:
+                    continue
+                cellBoundary = self.updateBoundary([childBox[0] + offsetX, childBox[1] + offsetY,
+                                                    childBox[2] + offsetX, childBox[3] + offsetY],
+                                                   cellBoundary)
+            boundingBoxes[(name, linear)] = tuple(cellBoundary)
+            self.boundingBoxSignatures[name] = self.structureSignature(structure)
+        return boundingBoxes[startKey]
     
     def measureSizeInStructure(self,Structure,cellBoundary):
         StructureName=Structure[0]
@@ -868,6 +995,9 @@ class VlsiLayout(metaclass=UniqueMeta):
         Given a coordinate, search for enclosing structures on the given layer.
         Return all pin shapes.
         """
+        if self.useSpatialIndex:
+            return self.getSpatialIndex().getRectanglesAtPoint(coordinates, layer).tolist()
+
         boundaries = []
 
         for TreeUnit in self.xyTree:
@@ -963,6 +1093,60 @@ class VlsiLayout(metaclass=UniqueMeta):
         else:
             return False
 
+IDENTITY_TRANSFORM = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+
+def rotationCosSin(rotateAngle):
+    """ cos and sin of an angle in degrees, exact for multiples of 90 """
+    quarterTurns, remainder = divmod(float(rotateAngle), 90.0)
+    if remainder == 0:
+        return [(1.0, 0.0), (0.0, 1.0), (-1.0, 0.0), (0.0, -1.0)][int(quarterTurns) % 4]
+    rotateAngle = math.radians(float(rotateAngle))
+    return math.cos(rotateAngle), math.sin(rotateAngle)
+
+
+def referenceTransform(rotateAngle, transFlags, coordinates):
+    """ Transform of a structure reference: rotate, then mirror about X, then translate """
+    if rotateAngle == None or rotateAngle == "":
+        rotateAngle = 0
+    cos, sin = rotationCosSin(rotateAngle)
+    scaleY = -1.0 if transFlags[0] else 1.0
+    return (cos, -sin, scaleY * sin, scaleY * cos, float(coordinates[0]), float(coordinates[1]))
+
+
+def composeTransforms(parent, child):
+    """ Transform equivalent to applying child then parent """
+    (a, b, c, d, tx, ty) = parent
+    (childA, childB, childC, childD, childTx, childTy) = child
+    return (a * childA + b * childC, a * childB + b * childD,
+            c * childA + d * childC, c * childB + d * childD,
+            a * childTx + b * childTy + tx, c * childTx + d * childTy + ty)
+
+
+def referenceName(aref):
+    """ Name of the structure referenced by an aref (may be bytes in arefs created elsewhere) """
+    name = aref.aName
+    if isinstance(name, bytes):
+        name = name.decode()
+    return name
+
+
+def arefPlacements(aref):
+    """ Offsets of the elements of an aref, row by row.
+    The aref coordinates are the origin, the origin displaced by columns * column pitch
+    and the origin displaced by rows * row pitch """
+    columns, rows = aref.colRow
+    origin, columnEnd, rowEnd = aref.coordinates[:3]
+    columnStep = ((columnEnd[0] - origin[0]) / columns, (columnEnd[1] - origin[1]) / columns)
+    rowStep = ((rowEnd[0] - origin[0]) / rows, (rowEnd[1] - origin[1]) / rows)
+    placements = []
+    for row in range(rows):
+        for column in range(columns):
+            placements.append((origin[0] + column * columnStep[0] + row * rowStep[0],
+                               origin[1] + column * columnStep[1] + row * rowStep[1]))
+    return placements
+
+
 def boundaryArea(A):
     """
     Returns boundary area for sorting.
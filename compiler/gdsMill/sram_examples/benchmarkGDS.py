@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Compare the run time and memory of the gdsMill readers and writers on a GDS file
+usage: python benchmarkGDS.py file.gds [repeats]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from gdsMill import gdsMill
+
+gds_file = sys.argv[1]
+repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+
+class ParseOnlyLayout(gdsMill.VlsiLayout):
+    """Skip the hierarchy traversal so only the file decoding is timed"""
+    def initialize(self):
+        pass
+
+
+def best_time(func):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def loaded_memory(func):
+    """Memory held by the object returned by func in MB"""
+    tracemalloc.start()
+    result = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size / 1e6
+
+
+def read_with(reader_class, layout_class=ParseOnlyLayout, **kwargs):
+    def read():
+        layout = layout_class()
+        reader_class(layout).loadFromFile(gds_file, **kwargs)
+        return layout
+    return read
+
+
+print("File: {} ({:.2f} MB)".format(gds_file, os.path.getsize(gds_file) / 1e6))
+
+reference = best_time(read_with(gdsMill.Gds2reader))
+print("Parse Gds2reader:     {:.3f} s".format(reference))
+mmap_time = best_time(read_with(gdsMill.Gds2mmapReader))
+print("Parse Gds2mmapReader: {:.3f} s ({:.1f}x)".format(mmap_time, reference / mmap_time))
+lazy_time = best_time(read_with(gdsMill.Gds2mmapReader, lazy=True))
+print("Parse Gds2mmapReader (lazy): {:.3f} s ({:.1f}x)".format(lazy_time, reference / lazy_time))
+
+print("Memory Gds2reader:     {:.1f} MB".format(loaded_memory(read_with(gdsMill.Gds2reader))))
+print("Memory Gds2mmapReader: {:.1f} MB".format(loaded_memory(read_with(gdsMill.Gds2mmapReader))))
+
+layout = read_with(gdsMill.Gds2mmapReader)()
+print("Hierarchy initialize: {:.3f} s".format(best_time(lambda: gdsMill.VlsiLayout.initialize(layout))))
+
+with tempfile.TemporaryDirectory() as temp_dir:
+    reference_file = os.path.join(temp_dir, "reference.gds")
+    buffered_file = os.path.join(temp_dir, "buffered.gds")
+    reference = best_time(lambda: gdsMill.Gds2writer(layout).writeToFile(reference_file))
+    print("Write Gds2writer:         {:.3f} s".format(reference))
+    buffered_time = best_time(lambda: gdsMill.Gds2bufferedWriter(layout).writeToFile(buffered_file))
+    print("Write Gds2bufferedWriter: {:.3f} s ({:.1f}x)".format(buffered_time, reference / buffered_time))
+    with open(reference_file, "rb") as reference_gds, open(buffered_file, "rb") as buffered_gds:
+        print("Identical output: {}".format(reference_gds.read() == buffered_gds.read()))
@@ -258,6 +258,9 @@ def read_config(config_file, is_unit_test=True, openram_temp=None):
         
 def end_openram():
     """ Clean up openram for a proper exit """
+    from base import libcell_cache, unique_meta
+    unique_meta.report_stats()
+    libcell_cache.flush()
     cleanup_paths()
     
 
@@ -378,6 +381,12 @@ def standardize_tech_config():
     if "tap_active" not in tech.layer:
         tech.layer["tap_active"] = tech.layer["active"]
 
+    # reverse lookup of layer numbers to layer names
+    # the first name wins when layers share a number (e.g. tap_active and active)
+    tech.layer_names = {}
+    for layer_name, layer_number in tech.layer.items():
+        tech.layer_names.setdefault(layer_number, layer_name)
+
     if not hasattr(tech, "drc_exceptions"):
         tech.drc_exceptions = {}
 
@@ -413,6 +422,9 @@ def initialize_classes():
         import verify
         reload(verify)
     # only bitcell is preloaded here because most unit tests only require loading bitcell to get it's dimensions
+    if OPTS.prefetch_gds:
+        from base.gds_prefetch import prefetch_gds
+        prefetch_gds(max_workers=OPTS.prefetch_gds_workers)
     reload(__import__(OPTS.bitcell))
     OPTS.check_lvsdrc = check_lvsdrc
 
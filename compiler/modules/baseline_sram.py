@@ -4,6 +4,7 @@ import re
 from typing import TYPE_CHECKING
 
 import debug
+from base import design_cache
 from base.contact import m1m2, m2m3, cross_m2m3, cross_m1m2, m3m4
 from base.contact_full_stack import ContactFullStack
 from base.design import METAL1, METAL2, METAL3, METAL4, design, PWELL, ACTIVE, NIMP, PIMP, NWELL
@@ -175,8 +176,9 @@ class BaselineSram(SramPowerGridMixin, SramOutputMixin, design):
 
     def create_bank(self):
         bank_class = self.get_bank_class()
-        self.bank = bank_class(name="bank", word_size=self.word_size, num_words=self.num_words_per_bank,
-                               words_per_row=self.words_per_row, num_banks=self.num_banks)
+        self.bank = design_cache.create(bank_class, name="bank", word_size=self.word_size,
+                                        num_words=self.num_words_per_bank,
+                                        words_per_row=self.words_per_row, num_banks=self.num_banks)
         self.add_mod(self.bank)
         if self.num_banks == 2:
             debug.info(1, "Creating left bank")
@@ -247,13 +247,15 @@ class BitcellAlignedArray(design, ABC):
             if len(right_buffer_x_offsets) > 0:
                 tap_offsets += right_buffer_x_offsets
 
+        offsets, sizes = [], []
         for rect in rects:
             # only right hand side  needs to be extended, must also start on the left
             if rect.rx() >= self.child_mod.width and rect.lx() <= 0:
                 right_extension = rect.rx() - self.child_mod.width
                 for tap_offset in tap_offsets:
-                    self.add_rect(layer, offset=vector(tap_offset, rect.by()), height=rect.height,
-                                  width=tap_width + right_extension)
+                    offsets.append((tap_offset, rect.by()))
+                    sizes.append((tap_width + right_extension, rect.height))
+        self.add_rects(layer, offsets, sizes)
 
     def add_dummy_polys(self):
         """Add dummy poly's at edges"""
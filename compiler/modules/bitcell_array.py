@@ -143,18 +143,21 @@ class bitcell_array(design.design):
         return "{0} {1} vdd gnd".format(bl_nets, wl_conn).split()
 
     def add_bitcell_cells(self):
+        names, offsets, mirrors, connections = [], [], [], []
         for col in range(self.column_size):
             for row in range(self.row_size):
-                name = "bit_r{0}_c{1}".format(row, col)
+                names.append("bit_r{0}_c{1}".format(row, col))
                 x_offset, y_offset, mirror = self.get_cell_offset(col + OPTS.num_bitcell_dummies,
                                                                   row + OPTS.num_bitcell_dummies)
-
-                cell_inst = self.add_inst(name=name, mod=self.cell,
-                                          offset=vector(x_offset, y_offset),
-                                          mirror=mirror)
-                self.cell_inst[row][col] = cell_inst
-                self.connect_inst(self.get_bitcell_connections(row + OPTS.num_bitcell_dummies,
-                                                               col + OPTS.num_bitcell_dummies))
+                offsets.append((x_offset, y_offset))
+                mirrors.append(mirror)
+                connections.append(self.get_bitcell_connections(row + OPTS.num_bitcell_dummies,
+                                                                col + OPTS.num_bitcell_dummies))
+        cell_insts = self.add_inst_array(names, self.cell, offsets, mirror=mirrors,
+                                         connections=connections)
+        for col in range(self.column_size):
+            for row in range(self.row_size):
+                self.cell_inst[row][col] = cell_insts[col * self.row_size + row]
 
     def add_bitcell_dummy_cells(self):
         """Add dummy on all four edges. Total rows = rows + 2, total_cols = cols + 2"""
@@ -220,20 +223,21 @@ class bitcell_array(design.design):
 
         cell_offsets = list(sorted(cell_offsets + dummy_offsets))
 
+        offsets, tap_mirrors = [], []
         for tap_offset in tap_offsets:
             for var in sweep_var:
-                mirror = mirrors[var % 2]
+                tap_mirrors.append(mirrors[var % 2])
                 if OPTS.use_x_body_taps:
                     x_offset = tap_offset
                     y_offset = cell_offsets[var] + (var % 2 == 0) * tap_size
                 else:
                     x_offset = cell_offsets[var] + (var % 2 == 0) * tap_size
                     y_offset = tap_offset
+                offsets.append((x_offset, y_offset))
 
-                tap_inst = self.add_inst(name=self.body_tap.name, mod=self.body_tap,
-                                         offset=vector(x_offset, y_offset), mirror=mirror)
-                self.connect_inst([])
-                self.body_tap_insts.append(tap_inst)
+        self.body_tap_insts.extend(self.add_inst_array(self.body_tap.name, self.body_tap, offsets,
+                                                       mirror=tap_mirrors,
+                                                       connections=[[] for _ in offsets]))
 
     def connect_dummy_cell_layouts(self):
         """Connect dummy wordlines to gnd and dummy bitlines to vdd"""
@@ -244,6 +248,8 @@ class bitcell_array(design.design):
         if not OPTS.use_x_body_taps or not getattr(OPTS, "repeaters_array_space_offsets", None):
             return
         fill_rects = create_wells_and_implants_fills(self.body_tap, self.body_tap)
+        # layer -> (offsets, sizes)
+        layer_rects = {}
         for row in range(self.row_size):
             for x_offset in OPTS.repeaters_array_space_offsets[1:]:
                 for fill_rect in fill_rects:
@@ -254,22 +260,26 @@ class bitcell_array(design.design):
                     rect_left = x_offset + (rect_instance.rx() - self.body_tap.width)
                     rect_right = x_offset + rect_instance.lx()
                     rect_y = row * self.cell.height + fill_rect[1]
-                    self.add_rect(fill_rect[0], offset=vector(rect_left, rect_y),
-                                  width=rect_right - rect_left,
-                                  height=fill_rect[2] - fill_rect[1])
+                    offsets, sizes = layer_rects.setdefault(fill_rect[0], ([], []))
+                    offsets.append((rect_left, rect_y))
+                    sizes.append((rect_right - rect_left, fill_rect[2] - fill_rect[1]))
+        for layer, (offsets, sizes) in layer_rects.items():
+            self.add_rects(layer, offsets, sizes)
 
     def add_dummy_polys(self):
         if not self.has_dummy:
             return
 
+        offsets, sizes = [], []
         for row in range(self.row_size + len(self.dummy_rows)):
             row_instances = self.get_cell_inst_row(row)
             y_base = row_instances[0].by()
             rects = self.add_dummy_poly(self.cell, row_instances, True)
             for rect in rects:
                 if self.cell.height - rect.height < self.poly_vert_space:
-                    self.add_rect(PO_DUMMY, vector(rect.lx(), y_base),
-                                  width=rect.width, height=self.cell.height)
+                    offsets.append((rect.lx(), y_base))
+                    sizes.append((rect.width, self.cell.height))
+        self.add_rects(PO_DUMMY, offsets, sizes)
 
     def get_full_width(self):
         if "vdd" not in self.cell.pins:
@@ -85,6 +85,7 @@ class BlSram(BaselineSram):
     def add_row_decoder(self):
         super().add_row_decoder()
         self.row_decoder_inst.name = "row_decoder_1"
+        self.invalidate_netlist()
         x_offset = self.row_decoder_inst.lx() - self.row_decoder.width - self.bus_space
         self.row_decoder_inst_0 = self.add_inst("row_decoder", self.row_decoder,
                                                 offset=vector(x_offset, self.row_decoder_inst.by()))
@@ -28,18 +28,11 @@ class hierarchical_predecode(design.design):
         self.number_of_inputs = input_number
         self.number_of_outputs = int(math.pow(2, self.number_of_inputs))
 
-        name = "pre{0}x{1}".format(self.number_of_inputs, self.number_of_outputs)
-        if not route_top_rail:
-            name += "_no_top"
-        if use_flops:
-            name += "_flops"
+        name = self.get_predecode_name(input_number, route_top_rail, use_flops, buffer_sizes, negate)
         if buffer_sizes is not None:
             self.buffer_sizes = buffer_sizes
-            name += "_" + ("_".join(['{:.3g}'.format(x) for x in buffer_sizes])).replace(".", "__")
         else:
             self.buffer_sizes = OPTS.predecode_sizes
-        if negate:
-            name += "_neg"
 
         if len(self.buffer_sizes) % 2 == 1:
             negate = not negate
@@ -52,6 +45,22 @@ class hierarchical_predecode(design.design):
         self.mod_bitcell = self.create_mod_from_str(OPTS.bitcell)
         self.bitcell_height = self.mod_bitcell.height
 
+    @staticmethod
+    def get_predecode_name(input_number, route_top_rail=True, use_flops=False, buffer_sizes=None,
+                           negate=False):
+        name = "pre{0}x{1}".format(input_number, int(math.pow(2, input_number)))
+        if not route_top_rail:
+            name += "_no_top"
+        if use_flops:
+            name += "_flops"
+        # the default sizes change with the buffer optimizations so they are part of the name
+        if buffer_sizes is None:
+            buffer_sizes = OPTS.predecode_sizes
+        name += "_" + ("_".join(['{:.3g}'.format(x) for x in buffer_sizes])).replace(".", "__")
+        if negate:
+            name += "_neg"
+        return name
+
     def create_flops(self):
         self.vertical_flops = OPTS.predecoder_flop_layout == "v" and self.use_flops
         if self.use_flops:
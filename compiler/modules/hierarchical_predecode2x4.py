@@ -1,10 +1,15 @@
+from base.unique_meta import Unique
 from modules.hierarchical_predecode import hierarchical_predecode
 
 
-class hierarchical_predecode2x4(hierarchical_predecode):
+class hierarchical_predecode2x4(hierarchical_predecode, metaclass=Unique):
     """
     Pre 2x4 decoder used in hierarchical_decoder.
     """
+    @classmethod
+    def get_name(cls, route_top_rail=True, use_flops=False, buffer_sizes=None, negate=False):
+        return cls.get_predecode_name(2, route_top_rail, use_flops, buffer_sizes, negate)
+
     def __init__(self, route_top_rail=True, use_flops=False, buffer_sizes=None, negate=False):
         hierarchical_predecode.__init__(self, 2, route_top_rail, use_flops=use_flops,
                                         buffer_sizes=buffer_sizes, negate=negate)
@@ -59,14 +59,18 @@ class precharge_characterization:
         return "{}_{}".format(self.__class__.__name__, self.bitcell.name)
 
 
-class precharge(precharge_characterization, design.design):
+class precharge(precharge_characterization, design.design, metaclass=Unique):
     """
     Creates a single precharge cell
     This module implements the precharge bitline cell used in the design.
     """
 
+    @classmethod
+    def get_name(cls, name=None, size=1):
+        return f"{name or 'precharge'}_{size:.5g}"
+
     def __init__(self, name=None, size=1):
-        name = name or f"precharge_{size:.5g}"
+        name = self.get_name(name, size)
         design.design.__init__(self, name)
         debug.info(2, "create single precharge cell: {0}".format(name))
 
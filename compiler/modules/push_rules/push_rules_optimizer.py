@@ -8,5 +8,6 @@ class PushRulesOptimizer(ControlBufferOptimizer):
         logic_buffer = LogicBufferHorizontal(buffer_stages=driver_mod.buffer_stages, logic="pnand2")
         buffer_index = logic_buffer.insts.index(logic_buffer.buffer_inst)
         logic_buffer.insts[buffer_index].mod = driver_mod.logic_buffer
+        logic_buffer.invalidate_netlist()
         driver_mod.logic_buffer = logic_buffer
         return super().extract_wordline_buffer_load(driver_mod, net, buffer_stages_str)
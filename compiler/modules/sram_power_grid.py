@@ -106,6 +106,7 @@ class SramPowerGridMixin(BaselineSram):
         prev_m4_rect = None
         m4_space = self.get_wide_space(METAL4)
         rail_space = self.power_grid_y_space
+        m5_offsets, m5_sizes = [], []
 
         for m4_rect in m4_rects:
             if m4_rect.by() > rail_rect.by() or m4_rect.uy() < rail_rect.uy():
@@ -128,10 +129,9 @@ class SramPowerGridMixin(BaselineSram):
                                      prev_m4_rect.cx() + 0.5 * m5_via.width + rail_space):
                     # just connect using M5
                     rect_height = m4_m5_via.second_layer_width
-                    self.add_rect(METAL5, offset=vector(prev_m4_rect.cx(),
-                                                        rail_rect.cy() - 0.5 * rect_height),
-                                  width=m4_rect.cx() + 0.5 * m4_via.width - prev_m4_rect.cx(),
-                                  height=rect_height)
+                    m5_offsets.append((prev_m4_rect.cx(), rail_rect.cy() - 0.5 * rect_height))
+                    m5_sizes.append((m4_rect.cx() + 0.5 * m4_via.width - prev_m4_rect.cx(),
+                                     rect_height))
                 else:
                     self.add_inst(m5_via.name, mod=m5_via,
                                   offset=vector(m4_rect.cx(),
@@ -139,6 +139,7 @@ class SramPowerGridMixin(BaselineSram):
                     self.connect_inst([])
 
                 prev_m4_rect = m4_rect
+        self.add_rects(METAL5, m5_offsets, m5_sizes)
 
     def route_power_grid(self):
         if not self.add_power_grid:
@@ -192,10 +193,10 @@ class SramPowerGridMixin(BaselineSram):
             rail_rect = pin
             # connect to top grid
             top_pins = top_gnd if i % 2 == 0 else top_vdd
-            for top_pin in top_pins:
-                self.add_inst(m_top_via.name, m_top_via,
-                              offset=vector(top_pin.cx(), rail_rect.cy() - 0.5 * m_top_via.height))
-                self.connect_inst([])
+            via_offsets = [(top_pin.cx(), rail_rect.cy() - 0.5 * m_top_via.height)
+                           for top_pin in top_pins]
+            self.add_inst_array(m_top_via.name, m_top_via, via_offsets,
+                                connections=[[] for _ in via_offsets])
 
             # connect to m4 below
             m4_rects = m4_gnd_rects if i % 2 == 0 else m4_vdd_rects
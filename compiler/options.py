@@ -85,6 +85,24 @@ class options(optparse.Values):
     cache_optimization = True
     cache_optimization_prefix = ""
 
+    # store instance offsets, rectangles and pins as immutable integer grid coordinates (grid_vector)
+    use_grid_vector = False
+
+    # write regularly placed instances of the same module as GDS array references (AREF)
+    gds_array_references = True
+    # reuse the encoded GDS structures of modules whose content didn't change since they were last written
+    gds_structure_cache = True
+
+    # cache library cell sizes, pins and shapes across runs
+    libcell_cache = True
+    libcell_cache_dir = None  # defaults to $XDG_CACHE_HOME/openram/libcells
+    # save generated srams and banks and load them in later runs with the same configuration
+    design_cache = False
+    design_cache_dir = None  # defaults to $XDG_CACHE_HOME/openram/designs
+    # load the library cell gds files named in the config in parallel at startup
+    prefetch_gds = False
+    prefetch_gds_workers = None  # defaults to the number of cpus
+
     # use data from characterizations or dynamically compute
     use_characterization_data = True
     # Require exact match in loading characterization data or permit interpolation
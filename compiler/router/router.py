@@ -468,21 +468,27 @@ class router:
                 
 
         # recurse given the mirror, angle, etc.
-        for cur_sref in self.layout.structures[sref].srefs:
+        structure = self.layout.structures[sref]
+        references = [(cur_sref.sName, cur_sref.transFlags, cur_sref.rotateAngle, cur_sref.coordinates)
+                      for cur_sref in structure.srefs]
+        # each element of an array reference is placed like an sref
+        references += [(gdsMill.referenceName(cur_aref), cur_aref.transFlags, cur_aref.rotateAngle, coordinates)
+                       for cur_aref in structure.arefs for coordinates in gdsMill.arefPlacements(cur_aref)]
+        for (name, transFlags, rotateAngle, coordinates) in references:
             sMirr = 1
-            if cur_sref.transFlags[0] == True:
+            if transFlags[0] == True:
                 sMirr = -1
             sAngle = math.radians(float(0))
-            if cur_sref.rotateAngle:
-                sAngle = math.radians(float(cur_sref.rotateAngle))
+            if rotateAngle:
+                sAngle = math.radians(float(rotateAngle))
             sAngle += angle
-            x = cur_sref.coordinates[0]
-            y = cur_sref.coordinates[1]
+            x = coordinates[0]
+            y = coordinates[1]
             newX = (x)*math.cos(angle) - mirr*(y)*math.sin(angle) + xyShift[0] 
             newY = (x)*math.sin(angle) + mirr*(y)*math.cos(angle) + xyShift[1] 
             sxyShift = (newX, newY)
             
-            self.get_blockages(cur_sref.sName, sMirr, sAngle, sxyShift)
+            self.get_blockages(name, sMirr, sAngle, sxyShift)
 
     def convert_point_to_units(self,p):
         """ 
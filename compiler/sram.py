@@ -993,9 +993,7 @@ class sram(design.design, sram_power_grid_old.Mixin):
         # sp.write("* User: {0}\n".format(getpass.getuser()))
         # sp.write(".global {0} {1}\n".format(spice["vdd_name"], 
         #                                     spice["gnd_name"]))
-        usedMODS = list()
-        self.sp_write_file(sp, usedMODS)
-        del usedMODS
+        self.sp_write_file(sp, set())
         sp.close()
 
     def analytical_delay(self,slew,load):
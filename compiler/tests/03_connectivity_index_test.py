@@ -0,0 +1,66 @@
+from testutils import OpenRamTest
+
+
+class ConnectivityIndexTest(OpenRamTest):
+
+    def test_index_follows_connections(self):
+        from base.design import design
+        from base.hierarchy_spice import INOUT, INPUT, OUTPUT
+        from base.vector import vector
+        from characterizer.dependency_graph import get_all_net_connections, get_instance_module
+        from pgates.pinv import pinv
+
+        self.reset()
+        inv = pinv()
+        parent = design("connectivity_index_parent")
+        parent.add_pin_list(["A", "Z", "vdd", "gnd"])
+        parent.add_inst("inv0", inv, vector(0, 0))
+        parent.connect_inst(["A", "mid", "vdd", "gnd"])
+        parent.add_inst("inv1", inv, vector(0, 0))
+        parent.connect_inst(["mid", "Z", "vdd", "gnd"])
+
+        self.assertEqual(parent.get_net_connections("MID"), [(0, 1), (1, 0)])
+        self.assertEqual(parent.get_pin_dir("mid"), INOUT)
+        self.assertEqual(parent.get_pin_dir("A"), INPUT)
+        self.assertIs(get_instance_module("Xinv1", parent), parent.insts[1])
+        connections = [(pin, index, pin_dir) for pin, _, index, pin_dir in
+                       get_all_net_connections("z", parent)]
+        self.assertEqual(connections, [("Z", 1, OUTPUT)])
+
+        # the index is rebuilt after adding instances
+        parent.add_inst("inv2", inv, vector(0, 0))
+        parent.connect_inst(["Z", "out", "vdd", "gnd"])
+        self.assertEqual(parent.get_net_connections("z"), [(1, 1), (2, 0)])
+        self.assertEqual(parent.get_inst_index("INV2"), 2)
+        self.assertIsNone(parent.get_inst_index("inv3"))
+
+        # connections replaced in place
+        parent.conns[2] = ["mid", "out", "vdd", "gnd"]
+        parent.invalidate_netlist()
+        self.assertEqual(parent.get_net_connections("mid"), [(0, 1), (1, 0), (2, 0)])
+
+    def test_pin_dir_follows_submodules(self):
+        from base.design import design
+        from base.hierarchy_spice import INOUT, INPUT
+        from base.vector import vector
+        from pgates.pinv import pinv
+
+        self.reset()
+        inv = pinv()
+        child = design("connectivity_index_child")
+        child.width, child.height = 1, 1
+        child.add_pin_list(["A", "Z", "vdd", "gnd"])
+        child.add_inst("inv0", inv, vector(0, 0))
+        child.connect_inst(["A", "Z", "vdd", "gnd"])
+        parent = design("connectivity_index_top")
+        parent.add_pin_list(["in", "out", "vdd", "gnd"])
+        parent.add_inst("child", child, vector(0, 0))
+        parent.connect_inst(["in", "out", "vdd", "gnd"])
+        self.assertEqual(parent.get_pin_dir("in"), INPUT)
+
+        child.add_inst("inv1", inv, vector(0, 0))
+        child.connect_inst(["Z", "A", "vdd", "gnd"])
+        self.assertEqual(parent.get_pin_dir("in"), INOUT)
+
+
+OpenRamTest.run_tests(__name__)
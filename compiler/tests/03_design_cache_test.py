@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+
+from testutils import OpenRamTest
+
+
+class DesignCacheTest(OpenRamTest):
+
+    def setUp(self):
+        from globals import OPTS
+        self.cache_dir = tempfile.mkdtemp()
+        OPTS.design_cache = True
+        OPTS.design_cache_dir = self.cache_dir
+
+    def tearDown(self):
+        from globals import OPTS
+        OPTS.design_cache = False
+        OPTS.design_cache_dir = None
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def write_outputs(self, module, suffix):
+        from globals import OPTS
+        file_prefix = os.path.join(OPTS.openram_temp, module.name + suffix)
+        module.sp_write(file_prefix + ".sp")
+        module.gds_write(file_prefix + ".gds")
+        outputs = []
+        for extension in [".sp", ".gds"]:
+            with open(file_prefix + extension, "rb") as f:
+                outputs.append(f.read())
+        return outputs
+
+    def test_load_matches_generated(self):
+        """A module loaded from the cache should produce the same netlist and layout"""
+        from base import design_cache
+        from base.design import design
+        from modules.bitcell_array import bitcell_array
+
+        self.reset()
+        generated = design_cache.create(bitcell_array, name="design_cache_array", cols=4, rows=4)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        self.reset()
+        loaded = design_cache.create(bitcell_array, name="design_cache_array", cols=4, rows=4)
+        self.assertIsNot(generated, loaded)
+        self.assertIn(loaded.name, design.name_map)
+        self.assertEqual(self.write_outputs(generated, "_generated"),
+                         self.write_outputs(loaded, "_loaded"))
+
+        self.reset()
+        design_cache.create(bitcell_array, name="design_cache_array", cols=4, rows=2)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+    def test_changed_options_restored(self):
+        """Options set while building the module should be set again when it's loaded"""
+        from base import design_cache
+        from globals import OPTS
+        from modules.bitcell_array import bitcell_array
+
+        original_init = bitcell_array.__init__
+
+        def optimizing_init(self_, *args, **kwargs):
+            OPTS.design_cache_test_sizes = [2, 8]
+            original_init(self_, *args, **kwargs)
+
+        bitcell_array.__init__ = optimizing_init
+        try:
+            self.reset()
+            design_cache.create(bitcell_array, name="design_cache_options", cols=2, rows=2)
+        finally:
+            bitcell_array.__init__ = original_init
+        del OPTS.design_cache_test_sizes
+
+        self.reset()
+        design_cache.create(bitcell_array, name="design_cache_options", cols=2, rows=2)
+        self.assertEqual(OPTS.design_cache_test_sizes, [2, 8])
+        del OPTS.design_cache_test_sizes
+
+    def test_unkeyed_arguments(self):
+        from base import design_cache
+        from modules.bitcell_array import bitcell_array
+        self.assertIsNone(design_cache.get_cache_file(bitcell_array, (object(),), {}))
+        self.assertIsNotNone(design_cache.get_cache_file(bitcell_array, (), {"cols": [1, 2.5]}))
+
+
+OpenRamTest.run_tests(__name__)
@@ -0,0 +1,23 @@
+from testutils import OpenRamTest
+
+
+class GdsBoundaryTest(OpenRamTest):
+
+    def test_instances_added_after_measure(self):
+        """Measuring after adding instances should include them in the boundary and the xyTree"""
+        from gdsMill import gdsMill
+        child = gdsMill.VlsiLayout(name="boundary_child", units=(0.001, 1e-9))
+        child.addBox(layerNumber=1, offsetInMicrons=(0, 0), width=1.0, height=0.5)
+        top = gdsMill.VlsiLayout(name="boundary_top", units=(0.001, 1e-9))
+        top.addInstance(child, offsetInMicrons=(0, 0))
+        self.assertEqual(top.measureBoundary("boundary_top"), [[0, 0], [1.0, 0.5]])
+        self.assertEqual(len(top.xyTree), 2)
+
+        top.addInstance(child, offsetInMicrons=(2, 1))
+        self.assertEqual(top.measureBoundary("boundary_top"), [[0, 0], [3.0, 1.5]])
+        self.assertEqual(len(top.xyTree), 3)
+        self.assertEqual(top.measureSize("boundary_top"), [3.0, 1.5])
+        self.assertEqual(len(top.xyTree), 3)
+
+
+OpenRamTest.run_tests(__name__)
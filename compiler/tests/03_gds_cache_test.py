@@ -0,0 +1,85 @@
+from testutils import OpenRamTest
+
+
+class GdsCacheTest(OpenRamTest):
+
+    def make_design(self, name, child_name="gds_cache_child"):
+        from base.design import design, METAL1
+        from base.vector import vector
+        # regenerated modules reuse the names
+        self.reset()
+        child = design(child_name)
+        child.width, child.height = 1, 0.5
+        child.add_rect(METAL1, vector(0, 0), width=0.5, height=0.5)
+        child.add_layout_pin("a", METAL1, vector(0.6, 0), width=0.2, height=0.2)
+        parent = design(name)
+        parent.add_inst("inst0", child, vector(0, 0))
+        parent.add_inst("inst1", child, vector(3, 0), mirror="MY")
+        parent.add_rect(METAL1, vector(0, 2), width=4, height=0.2)
+        return parent, child
+
+    def read_structures(self, gds_file):
+        from gdsMill import gdsMill
+        layout = gdsMill.VlsiLayout()
+        gdsMill.Gds2reader(layout).loadFromFile(gds_file)
+        return {name: sorted(repr(boundary.coordinates) for boundary in structure.boundaries) +
+                sorted(repr((sref.sName, sref.coordinates)) for sref in structure.srefs)
+                for name, structure in layout.structures.items()}
+
+    def test_matches_uncached_write(self):
+        import os
+        from base import gds_cache
+        from globals import OPTS
+
+        gds_files = []
+        for use_cache in [False, True]:
+            OPTS.gds_structure_cache = use_cache
+            parent, _ = self.make_design("gds_cache_parent_{}".format(int(use_cache)))
+            gds_files.append(os.path.join(OPTS.openram_temp, parent.name + ".gds"))
+            parent.gds_write(gds_files[-1])
+        OPTS.gds_structure_cache = True
+
+        uncached, cached = map(self.read_structures, gds_files)
+        self.assertEqual(uncached.pop("gds_cache_parent_0"), cached.pop("gds_cache_parent_1"))
+        self.assertEqual(uncached, cached)
+
+        # a regenerated module with the same content reuses the encoded structures
+        num_entries = len(gds_cache.encoded_structures)
+        parent, _ = self.make_design("gds_cache_parent_1")
+        parent.gds_write(gds_files[-1])
+        self.assertEqual(len(gds_cache.encoded_structures), num_entries)
+
+    def test_modified_module_is_rewritten(self):
+        import os
+        from base.design import METAL1
+        from base.vector import vector
+        from globals import OPTS
+
+        parent, child = self.make_design("gds_cache_modified", child_name="gds_cache_modified_child")
+        gds_file = os.path.join(OPTS.openram_temp, parent.name + ".gds")
+        parent.gds_write(gds_file)
+        self.assertEqual(len(self.read_structures(gds_file)[child.name]), 2)
+        child.add_rect(METAL1, vector(0, 1), width=0.5, height=0.5)
+        parent.gds_write(gds_file)
+        self.assertEqual(len(self.read_structures(gds_file)[child.name]), 3)
+
+    def test_least_recently_used_evicted(self):
+        from base import gds_cache
+
+        entries = [("a", b"x" * 10)]
+        max_cached_bytes = gds_cache.max_cached_bytes
+        gds_cache.clear()
+        try:
+            gds_cache.max_cached_bytes = 25
+            gds_cache.add_cached(("a", "0"), entries)
+            gds_cache.add_cached(("a", "1"), entries)
+            self.assertIs(gds_cache.get_cached(("a", "0")), entries)
+            gds_cache.add_cached(("a", "2"), entries)
+            self.assertEqual(list(gds_cache.encoded_structures), [("a", "0"), ("a", "2")])
+            self.assertEqual(gds_cache.cached_bytes, 20)
+        finally:
+            gds_cache.max_cached_bytes = max_cached_bytes
+            gds_cache.clear()
+
+
+OpenRamTest.run_tests(__name__)
@@ -0,0 +1,34 @@
+from testutils import OpenRamTest
+
+
+class GdsPrefetchTest(OpenRamTest):
+
+    def test_prefetch_seeds_layout_cache(self):
+        """Prefetched layouts should be returned by VlsiLayout(from_file=...) and match a normal load"""
+        from base import gds_prefetch, utils
+        from gdsMill import gdsMill
+        from globals import OPTS
+        from tech import GDS, layer
+
+        cell_names = gds_prefetch.get_config_cells()
+        self.assertIn(OPTS.bitcell_mod, cell_names)
+
+        gds_file = utils.get_libcell_gds_file(OPTS.bitcell_mod)
+        gdsMill.VlsiLayout._cache.pop(gds_file, None)
+        loaded = gds_prefetch.prefetch_gds([OPTS.bitcell_mod], max_workers=1)
+        self.assertEqual(loaded, [gds_file])
+
+        prefetched = gdsMill.VlsiLayout(units=GDS["unit"], from_file=gds_file)
+        self.assertTrue(len(prefetched.xyTree) > 0, "Prefetched layout should be initialized")
+        self.assertEqual(gds_prefetch.prefetch_gds([OPTS.bitcell_mod]), [], "Cached files are skipped")
+
+        gdsMill.VlsiLayout._cache.pop(gds_file)
+        reference = gds_prefetch.load_layout(gds_file, GDS["unit"])
+        self.assertIsNot(reference, prefetched)
+        self.assertEqual(sorted(prefetched.structures), sorted(reference.structures))
+        self.assertEqual(len(prefetched.xyTree), len(reference.xyTree))
+        self.assertEqual(prefetched.getLayoutBorder(layer["boundary"]),
+                         reference.getLayoutBorder(layer["boundary"]))
+
+
+OpenRamTest.run_tests(__name__)
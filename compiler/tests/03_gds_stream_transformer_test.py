@@ -0,0 +1,67 @@
+import os
+
+from testutils import OpenRamTest
+
+
+class GdsStreamTransformerTest(OpenRamTest):
+
+    def read_structures(self, gds_file):
+        from gdsMill import gdsMill
+        layout = gdsMill.VlsiLayout(from_file=gds_file)
+        layout.load_from_file()
+        return {name.rstrip("\x00"): (sorted(repr((boundary.drawingLayer, boundary.coordinates))
+                                             for boundary in structure.boundaries),
+                                      sorted(repr((sref.sName.rstrip("\x00"), sref.coordinates))
+                                             for sref in structure.srefs))
+                for name, structure in layout.structures.items()}
+
+    def write_design(self):
+        from base.design import design, METAL1, METAL2
+        from base.vector import vector
+        from globals import OPTS
+        self.reset()
+        child = design("stream_child")
+        child.width, child.height = 1, 0.5
+        child.add_rect(METAL1, vector(0, 0), width=0.5, height=0.5)
+        parent = design("stream_parent")
+        parent.add_inst("inst0", child, vector(0, 0))
+        parent.add_inst("inst1", child, vector(3, 0), mirror="MY")
+        parent.add_rect(METAL2, vector(0, 2), width=4, height=0.2)
+        gds_file = os.path.join(OPTS.openram_temp, parent.name + ".gds")
+        parent.gds_write(gds_file)
+        return gds_file, parent.name
+
+    def test_matches_layout_suffix(self):
+        """Streamed renaming should match renaming the loaded layout"""
+        from gdsMill import gdsMill
+        gds_file, root_name = self.write_design()
+
+        layout = gdsMill.VlsiLayout(from_file=gds_file)
+        layout.load_from_file()
+        layout.add_suffix_to_structures("_ram2")
+        layout_file = gds_file.replace(".gds", "_layout.gds")
+        gdsMill.Gds2writer(layout).writeToFile(layout_file)
+
+        stream_file = gds_file.replace(".gds", "_stream.gds")
+        gdsMill.addSuffixToStructures(gds_file, stream_file, "_ram2", exclusions=[root_name])
+
+        streamed = self.read_structures(stream_file)
+        self.assertIn("stream_child_ram2", streamed)
+        self.assertIn(root_name, streamed)
+        self.assertEqual(self.read_structures(layout_file), streamed)
+
+    def test_truncated_file(self):
+        from gdsMill import gdsMill
+        gds_file, _ = self.write_design()
+        with open(gds_file, "rb") as f:
+            records = [record for _, record in gdsMill.iterRecords(f)]
+        # end the file halfway through the last record with a payload
+        last_index = max(i for i, record in enumerate(records) if len(record) > 4)
+        truncated_file = gds_file.replace(".gds", "_truncated.gds")
+        with open(truncated_file, "wb") as f:
+            f.write(b"".join(records[:last_index]) + records[last_index][:len(records[last_index]) // 2])
+        with self.assertRaises(ValueError):
+            gdsMill.addSuffixToStructures(truncated_file, truncated_file + ".out", "_ram2")
+
+
+OpenRamTest.run_tests(__name__)
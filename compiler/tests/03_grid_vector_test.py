@@ -0,0 +1,39 @@
+from testutils import OpenRamTest
+
+
+class GridVectorTest(OpenRamTest):
+
+    def test_matches_snapped_vector(self):
+        """grid_vector coordinates should equal those of a snapped vector"""
+        from base.vector import vector, grid_vector
+        for x, y in [(0.0, 0.0), (1.2349, -3.71), (-0.0012, 196.5 * 0.0025), (10.123, 0.5)]:
+            snapped = vector(x, y).snap_to_grid()
+            on_grid = grid_vector(x, y)
+            self.assertEqual((on_grid.x, on_grid.y), (snapped.x, snapped.y))
+            self.assertEqual(on_grid, snapped)
+            self.assertEqual(snapped, on_grid)
+
+    def test_immutable_and_hashable(self):
+        from base.vector import grid_vector
+        offset = grid_vector(1, 2)
+        with self.assertRaises(AttributeError):
+            offset.ix = 3
+        self.assertEqual(len({offset, grid_vector(1, 2), grid_vector(2, 1)}), 2)
+
+    def test_transform_matches_pin_transform(self):
+        """Manhattan transforms should match pin_layout.transform on vectors"""
+        from base.pin_layout import pin_layout
+        from base.vector import vector, grid_vector
+        offset = vector(3.5, -1.25)
+        for mirror in ["R0", "MX", "MY", "XY"]:
+            for rotate in [0, 90, 180, 270]:
+                pin = pin_layout("a", [vector(0.1, 0.2), vector(0.5, 1.0)], "metal1")
+                pin.transform(offset, mirror, rotate)
+                corners = [grid_vector(0.1, 0.2).transform(grid_vector(offset), mirror, rotate),
+                           grid_vector(0.5, 1.0).transform(grid_vector(offset), mirror, rotate)]
+                self.assertEqual(pin.rect[0], corners[0].min(corners[1]))
+                self.assertEqual(pin.rect[1], corners[0].max(corners[1]))
+                self.assertIsInstance(corners[0], grid_vector)
+
+
+OpenRamTest.run_tests(__name__)
@@ -0,0 +1,64 @@
+from testutils import OpenRamTest
+
+
+class InstanceArraysTest(OpenRamTest):
+
+    def test_find_arrays(self):
+        from base.instance_arrays import find_arrays
+        grid = [(10 * col, 20 * row) for row in range(3) for col in range(4)]
+        self.assertEqual(find_arrays(grid), [(list(range(12)), (0, 0), (10, 0), (0, 20), 4, 3)])
+
+        column = [(5, 7 * row) for row in range(4)]
+        self.assertEqual(find_arrays(column), [([0, 1, 2, 3], (5, 0), (7, 0), (0, 7), 1, 4)])
+
+        # the irregular point and the overlapping duplicate are written on their own
+        irregular = [(0, 0), (10, 0), (20, 0), (35, 0), (10, 0)]
+        self.assertEqual(find_arrays(irregular), [([0, 1, 2], (0, 0), (10, 0), (0, 10), 3, 1),
+                                                  ([3], (35, 0), (1, 0), (0, 1), 1, 1),
+                                                  ([4], (10, 0), (1, 0), (0, 1), 1, 1)])
+
+    def test_gds_round_trip(self):
+        """Arrays written as AREFs should place the same structures as individual SREFs"""
+        import os
+        from base.design import design, METAL1
+        from base.vector import vector
+        from gdsMill import gdsMill
+        from globals import OPTS
+        from tech import layer as tech_layers
+
+        child = design("aref_child")
+        child.width, child.height = 1, 0.5
+        child.add_rect(METAL1, vector(0, 0), width=0.5, height=0.5)
+        child.add_layout_pin("a", METAL1, vector(0.6, 0), width=0.2, height=0.2)
+
+        def placements(use_arrays):
+            OPTS.gds_array_references = use_arrays
+            parent = design("aref_parent_{}".format(int(use_arrays)))
+            offsets = [(col, row) for row in range(3) for col in range(4)]
+            mirrors = ["R0" if row % 2 == 0 else "MX" for row in range(3) for col in range(4)]
+            parent.add_inst_array(["inst_{}".format(i) for i in range(len(offsets))], child,
+                                  offsets, mirror=mirrors)
+            parent.add_inst("other", child, vector(10, 0), rotate=90)
+            gds_file = os.path.join(OPTS.openram_temp, parent.name + ".gds")
+            parent.gds_write(gds_file)
+            layout = gdsMill.VlsiLayout(from_file=gds_file)
+            layout.load_from_file()
+            root = layout.structures[layout.rootStructureName]
+            references = sorted((name, tuple(round(x) for x in transform))
+                                for name, transform in layout.getReferences(layout.rootStructureName))
+            shapes = sorted(tuple(round(x, 5) for point in shape for x in point)
+                            for shape in layout.getShapesInLayerRecursive(tech_layers["metal1"]))
+            return references, shapes, len(root.arefs)
+
+        try:
+            sref_placements = placements(False)
+            aref_placements = placements(True)
+        finally:
+            OPTS.gds_array_references = True
+        self.assertEqual(sref_placements[2], 0)
+        self.assertEqual(aref_placements[2], 2)
+        self.assertEqual(len(aref_placements[1]), 2 * 13)
+        self.assertEqual(sref_placements[:2], aref_placements[:2])
+
+
+OpenRamTest.run_tests(__name__)
@@ -0,0 +1,65 @@
+from testutils import OpenRamTest
+
+
+class LayerShapesTest(OpenRamTest):
+
+    def test_flattened_shapes_follow_changes(self):
+        """Memoized flattened shapes should be refreshed when a design in the subtree changes"""
+        from base.design import design, METAL1
+        from base.vector import vector
+
+        child = design("layer_shapes_child")
+        child.width, child.height = 1, 0.5
+        child.add_rect(METAL1, vector(0, 0), width=1, height=0.5)
+        parent = design("layer_shapes_parent")
+        parent.add_inst("inst0", mod=child, offset=vector(0, 0))
+        inst = parent.add_inst("inst1", mod=child, offset=vector(5, 0), mirror="MY")
+
+        def boundaries():
+            return [tuple(round(x, 5) for x in [rect.lx(), rect.by(), rect.rx(), rect.uy()])
+                    for rect in parent.get_layer_shapes(METAL1, recursive=True)]
+
+        self.assertEqual(boundaries(), [(0, 0, 1, 0.5), (4, 0, 5, 0.5)])
+        child.add_rect(METAL1, vector(0, 1), width=1, height=0.5)
+        child.add_layout_pin("a", METAL1, vector(2, 0), width=0.5, height=0.5)
+        self.assertEqual(len(boundaries()), 6)
+        inst.offset = vector(10, 0)
+        self.assertIn((9, 0, 10, 0.5), boundaries())
+        child.translate_all(vector(-1, 0))
+        self.assertIn((1, 0, 2, 0.5), boundaries())
+        self.assertEqual(len(parent.get_layer_shapes(METAL1)), 0)
+
+    def test_rect_array(self):
+        """Rects added with add_rects should match rects added one at a time"""
+        from base.design import design, METAL1
+        from base.vector import vector
+        from gdsMill import gdsMill
+        from tech import GDS
+
+        offsets = [(0.1 * i, 0.3 * (i % 3)) for i in range(10)]
+        sizes = [(0.07, 0.2 + 0.01 * i) for i in range(10)]
+        single, batch = design("single_rects"), design("batch_rects")
+        for offset, size in zip(offsets, sizes):
+            single.add_rect(METAL1, vector(offset), width=size[0], height=size[1])
+        batch.add_rects(METAL1, offsets, sizes)
+        self.assertIsNone(batch.add_rects(METAL1, [(0, 0)], [(0, 1)]), "Empty rects are skipped")
+        self.assertIsNone(batch.add_rects(METAL1, [], []), "No rects to add")
+
+        def boundaries(cell):
+            return [tuple(round(x, 5) for x in [rect.lx(), rect.by(), rect.rx(), rect.uy()])
+                    for rect in cell.get_layer_shapes(METAL1)]
+        self.assertEqual(boundaries(single), boundaries(batch))
+
+        def gds_boxes(cell):
+            layout = gdsMill.VlsiLayout(name=cell.name, units=GDS["unit"])
+            cell.gds_write_file(layout)
+            return [boundary.coordinates for boundary in layout.structures[cell.name].boundaries]
+        self.assertEqual(gds_boxes(single), gds_boxes(batch))
+
+        for cell in [single, batch]:
+            cell.translate_all(vector(-1, -1))
+        self.assertEqual(boundaries(single), boundaries(batch))
+        self.assertEqual(single.find_lowest_coords(), batch.find_lowest_coords())
+
+
+OpenRamTest.run_tests(__name__)
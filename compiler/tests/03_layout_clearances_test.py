@@ -99,5 +99,29 @@ class LayoutClearancesTest(OpenRamTest):
         self.assertEqual(clearances[0], (0, edges_1[0]), "Left clearance")
         self.assertEqual(clearances[1], (edges_2[1], mod.width), "Right clearance")
 
+    def test_subtract_intervals(self):
+        """Touching intervals leave ranges intact, covered parts are removed"""
+        from base.intervals import subtract_intervals
+        self.assertEqual(subtract_intervals([(0, 10)], [2, 4, 10], [4, 6, 12]), [(0, 2), (6, 10)])
+        self.assertEqual(subtract_intervals([(0, 10), (20, 30)], [-1, 25], [1, 25]),
+                         [(1, 10), (20, 25), (25, 30)])
+        self.assertEqual(subtract_intervals([(0, 10)], [], []), [(0, 10)])
+
+    def test_extract_unique_rects(self):
+        """Rects connected through other rects should be combined"""
+        from base.design import METAL1
+        from base.layout_clearances import extract_unique_rects
+        from base.vector import vector
+        mod = self.make_design()
+        rects = [mod.add_rect(METAL1, vector(0, 0), width=1, height=1),
+                 mod.add_rect(METAL1, vector(3, 0), width=1, height=1),
+                 mod.add_rect(METAL1, vector(1.5, 0), width=1, height=1),
+                 mod.add_rect(METAL1, vector(10, 0), width=1, height=1)]
+        self.assertEqual(len(extract_unique_rects(rects)), 4)
+        unique_rects = extract_unique_rects(rects, min_space=0.5)
+        self.assertEqual(len(unique_rects), 2)
+        self.assertEqual((unique_rects[0].lx(), unique_rects[0].rx()), (0, 4))
+        self.assertIs(unique_rects[1], rects[3])
+
 
 OpenRamTest.run_tests(__name__)
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+
+from testutils import OpenRamTest
+
+
+class LibcellCacheTest(OpenRamTest):
+
+    def setUp(self):
+        from globals import OPTS
+        from base import libcell_cache
+        self.cache_dir = tempfile.mkdtemp()
+        OPTS.libcell_cache_dir = self.cache_dir
+        libcell_cache.loaded_records.clear()
+
+    def tearDown(self):
+        from globals import OPTS
+        from base import libcell_cache
+        libcell_cache.flush()
+        OPTS.libcell_cache_dir = None
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_warm_cache_matches_gds(self):
+        """Cached size and pins should match those measured from the gds file"""
+        from base import libcell_cache, utils
+        from tech import GDS, layer
+        cold_size = utils.get_libcell_size("cell_6t", GDS["unit"], layer["boundary"])
+        cold_pins = utils.get_libcell_pins(["BL", "WL"], "cell_6t", GDS["unit"])
+        libcell_cache.flush()
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1, "One cache file per gds")
+
+        libcell_cache.loaded_records.clear()
+        warm_size = utils.get_libcell_size("cell_6t", GDS["unit"], layer["boundary"])
+        warm_pins = utils.get_libcell_pins(["BL", "WL"], "cell_6t", GDS["unit"])
+        self.assertEqual(list(cold_size), list(warm_size))
+        for pin_name in cold_pins:
+            self.assertEqual([(pin.layer, pin.rect) for pin in cold_pins[pin_name]],
+                             [(pin.layer, pin.rect) for pin in warm_pins[pin_name]])
+
+    def test_content_change_invalidates(self):
+        """Entries should be discarded when the gds content changes but not when only mtime changes"""
+        from base import libcell_cache, utils
+        gds_file = os.path.join(self.cache_dir, "cell.gds")
+        shutil.copy(utils.get_libcell_gds_file("cell_6t"), gds_file)
+        self.assertEqual(libcell_cache.cached(gds_file, "key", lambda: 1), 1)
+
+        libcell_cache.flush()
+        os.utime(gds_file, ns=(0, 0))
+        libcell_cache.loaded_records.clear()
+        self.assertEqual(libcell_cache.cached(gds_file, "key", lambda: 2), 1)
+
+        with open(gds_file, "ab") as f:
+            f.write(b"\x00\x00")
+        self.assertEqual(libcell_cache.cached(gds_file, "key", lambda: 3), 3)
+
+    def test_flush_merges_saved_entries(self):
+        """Entries saved by another process after the record was loaded should be kept"""
+        from base import libcell_cache, utils
+        gds_file = os.path.abspath(utils.get_libcell_gds_file("cell_6t"))
+        libcell_cache.cached(gds_file, "first", lambda: 1)
+        record = libcell_cache.loaded_records.pop(gds_file)
+        # another process loads the record and saves its own entry
+        libcell_cache.cached(gds_file, "second", lambda: 2)
+        libcell_cache.flush()
+
+        libcell_cache.loaded_records[gds_file] = record
+        libcell_cache.modified_files.add(gds_file)
+        libcell_cache.flush()
+        libcell_cache.loaded_records.clear()
+        self.assertEqual(libcell_cache.cached(gds_file, "first", lambda: 3), 1)
+        self.assertEqual(libcell_cache.cached(gds_file, "second", lambda: 3), 2)
+
+
+OpenRamTest.run_tests(__name__)
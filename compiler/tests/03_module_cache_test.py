@@ -0,0 +1,38 @@
+from testutils import OpenRamTest
+
+
+class ModuleCacheTest(OpenRamTest):
+
+    def test_identical_modules_are_shared(self):
+        from base import unique_meta
+        from modules.hierarchical_predecode2x4 import hierarchical_predecode2x4
+        from modules.precharge import precharge
+
+        first = precharge(size=1.5)
+        hits, misses = unique_meta.Unique.stats["precharge"]
+        self.assertIs(precharge(name=None, size=1.5), first)
+        self.assertIsNot(precharge(size=2.5), first)
+        self.assertEqual(unique_meta.Unique.stats["precharge"], [hits + 1, misses + 1])
+        named = precharge(name="precharge", size=1.5)
+        self.assertIsNot(precharge(name="precharge", size=2.5), named)
+
+        self.reset()
+        self.assertIsNot(precharge(size=1.5), first, "reset rebuilds the modules")
+
+        decoder = hierarchical_predecode2x4(use_flops=False)
+        self.assertIs(hierarchical_predecode2x4(route_top_rail=True, use_flops=False), decoder)
+        self.assertIn("hierarchical_predecode2x4", [x[0] for x in unique_meta.get_stats()])
+
+        # the default sizes come from OPTS which the optimizer changes
+        from globals import OPTS
+        predecode_sizes = OPTS.predecode_sizes
+        try:
+            OPTS.predecode_sizes = [2, 8]
+            resized = hierarchical_predecode2x4(use_flops=False)
+            self.assertIsNot(resized, decoder)
+            self.assertEqual(resized.buffer_sizes, [2, 8])
+        finally:
+            OPTS.predecode_sizes = predecode_sizes
+
+
+OpenRamTest.run_tests(__name__)
@@ -0,0 +1,20 @@
+from testutils import OpenRamTest
+
+
+class PinLayoutTest(OpenRamTest):
+
+    def test_layer_number_lookup(self):
+        """Layer numbers should resolve to the first layer name with that number"""
+        import tech
+        from base.pin_layout import get_layer_name, pin_layout
+        names = list(tech.layer.keys())
+        numbers = list(tech.layer.values())
+        for layer_number in numbers:
+            expected = names[numbers.index(layer_number)]
+            self.assertEqual(get_layer_name(layer_number), expected)
+            pin = pin_layout("a", [[0, 0], [1, 1]], layer_number)
+            self.assertEqual((pin.layer, pin.layer_num), (expected, layer_number))
+        self.assertEqual(get_layer_name(tech.layer["active"]), "active")
+
+
+OpenRamTest.run_tests(__name__)
@@ -0,0 +1,59 @@
+import os
+
+from testutils import OpenRamTest
+
+
+class SpiceWriterTest(OpenRamTest):
+
+    def read_spice(self, module):
+        from globals import OPTS
+        sp_file = os.path.join(OPTS.openram_temp, module.name + ".sp")
+        module.sp_write(sp_file)
+        with open(sp_file, "r") as f:
+            return f.read()
+
+    def test_shared_modules_written_once(self):
+        from base.design import design
+        from base.vector import vector
+        from pgates.pinv import pinv
+
+        self.reset()
+        inv = pinv()
+        child = design("spice_writer_child")
+        child.width, child.height = 1, 1
+        child.add_pin_list(["A", "Z", "vdd", "gnd"])
+        child.add_mod(inv)
+        child.add_inst("inv0", inv, vector(0, 0))
+        child.connect_inst(["A", "Z", "vdd", "gnd"])
+
+        parent = design("spice_writer_parent")
+        parent.width, parent.height = 1, 1
+        parent.add_pin_list(["A", "Z", "vdd", "gnd"])
+        parent.add_mod(child)
+        parent.add_mod(inv)
+        for i, net in enumerate(["A", "Z"]):
+            parent.add_inst("child{}".format(i), child, vector(0, 0))
+            parent.connect_inst([net, "out{}".format(i), "vdd", "gnd"])
+        parent.add_inst("inv", inv, vector(0, 0))
+        parent.connect_inst(["out0", "Z", "vdd", "gnd"])
+
+        spice = self.read_spice(parent)
+        for mod in [inv, child, parent]:
+            self.assertEqual(spice.count(".SUBCKT {} ".format(mod.name)), 1)
+        self.assertIn("Xchild1 Z out1 vdd gnd spice_writer_child", spice)
+
+        # the cached subckt is rendered again after adding an instance
+        self.assertEqual(self.read_spice(parent), spice)
+        parent.add_inst("inv2", inv, vector(0, 0))
+        parent.connect_inst(["out1", "Z", "vdd", "gnd"])
+        self.assertIn("Xinv2 out1 Z vdd gnd {}".format(inv.name), self.read_spice(parent))
+
+        # connections replaced in place and renamed submodules
+        parent.conns[-1] = ["out0", "Z", "vdd", "gnd"]
+        parent.invalidate_netlist()
+        self.assertIn("Xinv2 out0 Z vdd gnd {}".format(inv.name), self.read_spice(parent))
+        child.rename("spice_writer_child_renamed")
+        self.assertIn("Xchild1 Z out1 vdd gnd spice_writer_child_renamed", self.read_spice(parent))
+
+
+OpenRamTest.run_tests(__name__)
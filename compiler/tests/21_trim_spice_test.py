@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+import os
+
+from testutils import OpenRamTest
+
+array_netlist = """
+.SUBCKT cell bl br wl vdd gnd
+m0 q wl bl gnd nmos_vtg w=135n l=50n m=1
+m1 br wl qbar gnd nmos_vtg w=135n l=50n m=1
+m2 q qbar gnd gnd nmos_vtg w=205n l=50n m=1
+m3 qbar q gnd gnd nmos_vtg w=205n l=50n m=1
+.ENDS cell
+.SUBCKT bitcell_array bl[0] br[0] bl[1] br[1] WL[1] WL[10] vdd gnd
+Xbit_r1_c0 bl[0] br[0] WL[1] vdd gnd cell
+Xbit_r10_c0 bl[0] br[0] WL[10] vdd gnd cell
+Xbit_r1_c1 bl[1] br[1] WL[1] vdd gnd cell
+Xbit_r10_c1 bl[1] br[1]
++ WL[10] vdd gnd cell
+.ENDS bitcell_array
+.SUBCKT top bl[0] br[0] bl[1] br[1] wl[1] wl[10] vdd gnd
+Xarray bl[0] br[0] bl[1] br[1] wl[1] wl[10] vdd gnd bitcell_array
+.ENDS top
+"""
+
+
+class TrimSpiceTest(OpenRamTest):
+
+    def test_trim_by_connectivity(self):
+        from characterizer.trim_spice import trim_spice
+        from globals import OPTS
+        from pgates.ptx import ptx
+
+        sp_file = os.path.join(OPTS.openram_temp, "trim_array.sp")
+        reduced_file = os.path.join(OPTS.openram_temp, "trim_array_reduced.sp")
+        with open(sp_file, "w") as f:
+            f.write(array_netlist)
+
+        trimmer = trim_spice(sp_file, reduced_file)
+        trimmer.trim_modules({"bitcell_array": ["wl[1]", "bl[0]"]})
+        with open(reduced_file, "r") as f:
+            reduced = f.read()
+
+        # wl[1] doesn't keep the cells on wl[10]
+        for inst_name in ["Xbit_r1_c0", "Xbit_r10_c0", "Xbit_r1_c1"]:
+            self.assertIn(inst_name, reduced)
+        self.assertNotIn("Xbit_r10_c1", reduced)
+        self.assertNotIn("+ WL[10]", reduced)
+        self.assertIn("Xarray", reduced)
+
+        # the removed cell is replaced by its load on the nets that are still connected
+        caps = {line.split()[1]: float(line.split()[3][:-1]) for line in reduced.splitlines()
+                if line.startswith("Ctrim")}
+        self.assertEqual(set(caps.keys()), {"bl[1]", "br[1]", "WL[10]"})
+        wl_cap = 2 * ptx.get_tx_cap("n", "g", 0.135, 1, 1)
+        self.assertAlmostEqual(caps["WL[10]"], wl_cap * 1e15, places=3)
+
+        self.assertEqual(trimmer.num_devices, 16)
+        self.assertEqual(trimmer.num_trimmed_devices, 12 + 3)
+
+
+OpenRamTest.run_tests(__name__)
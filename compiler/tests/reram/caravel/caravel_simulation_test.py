@@ -192,12 +192,11 @@ class CaravelSimulationTest(SimulatorBase, ReRamTestBase):
             def add_srams(self):
                 super().add_srams()
                 from base.geometry import instance
+                from base.pin_layout import pin_layout
 
                 def get_pins(self_, pin_name):
-                    pins = instance.get_pins(self_, "vdd")
-                    for pin in pins:
-                        pin.name = pin_name
-                    return pins
+                    return [pin_layout(pin_name, pin.rect, pin.layer)
+                            for pin in instance.get_pins(self_, "vdd")]
 
                 def get_pin(self_, pin_name):
                     return self_.get_pins(pin_name)[0]
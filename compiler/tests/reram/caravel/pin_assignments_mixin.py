@@ -104,6 +104,7 @@ class PinAssignmentsMixin(Wrapper):
 
         conn_index = self.insts.index(self.sram_inst)
         self.conns[conn_index] = sram_conns
+        self.invalidate_netlist()
 
         # wrapper to vdd/gnd connections
         for source_pin, dest_pin in self.wrapper_to_wrapper_conns.items():
@@ -123,7 +124,7 @@ class PinAssignmentsMixin(Wrapper):
         del self.conns[inst_index]
 
         temp_file = StringIO()
-        super().sp_write_file(temp_file, [])
+        super().sp_write_file(temp_file, set())
         temp_file.seek(0)
         self.lvs_spice_content = temp_file.read()
 
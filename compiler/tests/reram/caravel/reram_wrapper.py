@@ -16,6 +16,7 @@ from base.spice_parser import SpiceParser
 from base.utils import pin_rect, round_to_grid as round_
 from base.vector import vector
 from caravel_config import sram_configs, module_y_space, rail_pitch, rail_width
+from gdsMill import gdsMill
 from globals import OPTS
 from pin_assignments_mixin import PinAssignmentsMixin
 from router_mixin import METAL6
@@ -106,6 +107,7 @@ class ReRamWrapper(design):
             pins.update([x for x in connections if not x.startswith("data_out_internal")])
 
             self.conns[conn_index] = connections
+            self.invalidate_netlist()
             replacements_sort = sorted([(key, value) for key, value in replacements.items()],
                                        key=lambda x: x[0])
             replacement_str = [f"{key} <==> {value}" for key, value in replacements_sort]
@@ -132,12 +134,18 @@ class ReRamWrapper(design):
             if config.module_name in self.sram_mods:
                 sram = self.sram_mods[config.module_name]
             else:
-                sram = LoadFromGDS(config.module_name, config.get_gds_file(), config.spice_file)
-                self.sram_mods[config.module_name] = sram
                 create_count += 1
                 suffix = f"_ram{create_count}"
+                gds_file = config.get_gds_file()
+                if create_count > 1:
+                    # rename while copying instead of renaming the loaded layout
+                    renamed_gds = os.path.join(OPTS.openram_temp, config.module_name + suffix + ".gds")
+                    gdsMill.addSuffixToStructures(gds_file, renamed_gds, suffix,
+                                                  exclusions=[config.module_name])
+                    gds_file = renamed_gds
+                sram = LoadFromGDS(config.module_name, gds_file, config.spice_file)
+                self.sram_mods[config.module_name] = sram
                 if create_count > 1:
-                    sram.gds.add_suffix_to_structures(suffix)
                     parser = SpiceParser(config.spice_file)
                     parser.add_module_suffix(suffix=suffix, exclusions=[sram.name])
                     temp_spice = parser.export_spice()
@@ -21,11 +21,12 @@ class SimulatorBase(OpenRamTest):
         return self.load_class_from_opts("sram_class")
 
     def create_sram(self):
+        from base import design_cache
         from globals import OPTS
         sram_class = self.get_sram_class()
-        sram = sram_class(word_size=OPTS.word_size, num_words=OPTS.num_words,
-                          num_banks=OPTS.num_banks, words_per_row=OPTS.words_per_row,
-                          name="sram1", add_power_grid=True)
+        sram = design_cache.create(sram_class, word_size=OPTS.word_size, num_words=OPTS.num_words,
+                                   num_banks=OPTS.num_banks, words_per_row=OPTS.words_per_row,
+                                   name="sram1", add_power_grid=True)
         return sram
 
     def run_simulation(self):
@@ -97,6 +98,8 @@ class SimulatorBase(OpenRamTest):
         parser.add_argument("--run_lvs", action="store_true")
         parser.add_argument("--run_pex", action="store_true")
         parser.add_argument("--verbose_save", action="store_true")
+        parser.add_argument("--design_cache", action="store_true",
+                            help="Load the sram from the design cache if previously generated")
         parser.add_argument("--brief_errors", action="store_true",
                             help="Only print errors in saved nodes")
         parser.add_argument("--skip_write_check", action="store_true")
@@ -148,6 +151,7 @@ class SimulatorBase(OpenRamTest):
         OPTS.run_pex = options.run_pex
         OPTS.spice_name = options.spice_name
         OPTS.verbose_save = options.verbose_save
+        OPTS.design_cache = options.design_cache
 
         OPTS.num_banks = options.num_banks
         OPTS.word_size = self.word_size = options.word_size
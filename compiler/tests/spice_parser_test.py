@@ -101,6 +101,22 @@ class SpiceParserTest(OpenRamTest):
         self.assertEqual(mods[0].name, "tri_gate")
         self.assertEqual(mods[0].pins, simple_mod_pins)
 
+    def test_filtered_modules_and_nets(self):
+        from base.spice_parser import SpiceParser
+        spice_deck = SpiceParser(hierarchical, modules=["MS_FLOP"], keep_lines=False)
+        self.assertEqual([mod.name for mod in spice_deck.mods], ["ms_flop"])
+        self.assertIsNone(spice_deck.all_lines)
+
+        mod = SpiceParser(simple_mod, nets=["in_inv", "en_bar"]).mods[0]
+        self.assertEqual(mod.pins, simple_mod_pins)
+        self.assertEqual([line.split()[0] for line in mod.contents],
+                         ["m_1", "m_3", "m_4", "m_5", "m_6"])
+
+    def test_line_pipeline(self):
+        from base.spice_parser import strip_comments, join_continuations, group_mods
+        lines = join_continuations(strip_comments(split_lines_mod.splitlines()))
+        self.assertEqual(next(group_mods(lines)), [".subckt tri_gate in out en en_bar vdd gnd"])
+
     def test_module_pins(self):
         from base.spice_parser import SpiceParser
         self.assertEqual(SpiceParser(simple_mod).get_pins("tri_gate"),
@@ -146,6 +162,19 @@ class SpiceParserTest(OpenRamTest):
                           ("s", "mtmP1 din clk int1 vdd PMOS_VTG W=180.0n L=50n m=1".lower())
                           ])
 
+    def test_renamed_modules(self):
+        """Lookups should follow modules renamed after the indices were built"""
+        from base.spice_parser import SpiceParser
+        spice_deck = SpiceParser(hierarchical)
+        self.assertEqual(len(spice_deck.deduce_hierarchy_for_node("xmaster.int1", "ms_flop")), 6)
+        spice_deck.add_module_suffix("_1")
+        self.assertEqual(spice_deck.get_module("dlatch_1").name, "dlatch_1")
+        self.assertEqual(next(spice_deck.deduce_hierarchy_for_pin("dout_bar", "ms_flop_1")),
+                         ["xslave",
+                          ("d", "mPff4 dout dout_bar vdd vdd PMOS_VTG W=180.0n L=50n m=1".lower())
+                          ])
+        self.assertRaises(AssertionError, spice_deck.get_module, "dlatch")
+
     def test_module_caps(self):
         from base.spice_parser import SpiceParser
         spice_deck = SpiceParser(simple_mod)
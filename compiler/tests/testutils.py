@@ -114,9 +114,10 @@ class OpenRamTest(unittest.TestCase):
                 os.remove(f)        
 
     def reset(self):
-        """ Reset the static duplicate name checker for unit tests """
-        from base import design
+        """ Reset the static duplicate name checker and the module caches for unit tests """
+        from base import design, unique_meta
         design.design.name_map=[]
+        unique_meta.clear_caches()
 
     @staticmethod
     def load_class_from_opts(mod_name):